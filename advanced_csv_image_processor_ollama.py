@@ -269,12 +269,13 @@ def extract_text_from_image(file_path):
 def download_file(url, output_path):
     """Download a file from a URL to the specified output path."""
     try:
-        response = requests.get(url, stream=True)
-        response.raise_for_status()
-        
-        with open(output_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
+        # The context manager hands the connection back even if the download fails midway
+        with requests.get(url, stream=True) as response:
+            response.raise_for_status()
+            
+            with open(output_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=8192):
+                    f.write(chunk)
         
         return True
     except Exception as e:
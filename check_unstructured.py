@@ -5,20 +5,26 @@ Check if unstructured is installed and working.
 
 import os
 import sys
+from importlib.metadata import version, PackageNotFoundError
 
 print("Python version:", sys.version)
 print("Python executable:", sys.executable)
 
+def installed_version(distribution):
+    """Return the installed version of a distribution, without importing it."""
+    try:
+        return version(distribution)
+    except PackageNotFoundError:
+        return None
+
 # Check if unstructured is installed
-try:
-    import unstructured
+unstructured_version = installed_version("unstructured")
+if unstructured_version:
     print("unstructured is installed.")
-    try:
-        print("Version:", unstructured.__version__)
-    except AttributeError:
-        print("Version information not available.")
+    print("Version:", unstructured_version)
 
-    # Check if PDF-specific partitioner is available
+    # Check if PDF-specific partitioner is available (importing it is the check,
+    # since it fails when optional dependencies are missing)
     try:
         from unstructured.partition.pdf import partition_pdf
         print("PDF partitioner is available.")
@@ -31,45 +37,30 @@ try:
         print("Auto partitioner is available.")
     except ImportError:
         print("Auto partitioner is not available. You may need to install additional dependencies.")
-
-except ImportError:
+else:
     print("unstructured is not installed.")
     print("Please install it with: pip install 'unstructured[pdf]'")
 
+# Versions come from the installed package metadata, so these libraries are never imported
+def report(name, distribution=None):
+    """Print whether a library is installed, and its version."""
+    package_version = installed_version(distribution or name)
+    if package_version:
+        print(f"{name} is installed. Version:", package_version)
+    else:
+        print(f"{name} is not installed.")
+
 print("\nChecking for PDF processing dependencies:")
 
 # Check for other PDF processing libraries
-try:
-    import PyPDF2
-    print("PyPDF2 is installed. Version:", PyPDF2.__version__)
-except ImportError:
-    print("PyPDF2 is not installed.")
-
-try:
-    import pdfplumber
-    print("pdfplumber is installed. Version:", pdfplumber.__version__)
-except ImportError:
-    print("pdfplumber is not installed.")
+report("PyPDF2")
+report("pdfplumber")
 
 # Check for other dependencies
 print("\nChecking for other dependencies:")
 
-try:
-    import pandas
-    print("pandas is installed. Version:", pandas.__version__)
-except ImportError:
-    print("pandas is not installed.")
-
-try:
-    import numpy
-    print("numpy is installed. Version:", numpy.__version__)
-except ImportError:
-    print("numpy is not installed.")
-
-try:
-    from PIL import Image
-    print("Pillow is installed. Version:", Image.__version__)
-except ImportError:
-    print("Pillow is not installed.")
+report("pandas")
+report("numpy")
+report("Pillow")
 
 print("\nDone checking dependencies.")
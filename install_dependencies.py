@@ -24,7 +24,7 @@ def install_dependencies():
         "unstructured[all-docs]>=0.17.0",
         "PyPDF2>=3.0.0",
         "fastapi>=0.104.0",
-        "uvicorn>=0.23.2",
+        "uvicorn[standard]>=0.23.2",
         "python-multipart>=0.0.6",
         "pydantic>=2.4.2",
         "httpx>=0.25.0",
@@ -43,7 +43,10 @@ def install_dependencies():
     # Install pip packages
     print("Installing pip packages...")
     try:
-        subprocess.run([sys.executable, "-m", "pip", "install"] + pip_packages, check=True)
+        # One pip run resolves and downloads everything together; skip the
+        # self-update check and prompts, and prefer wheels over source builds
+        subprocess.run([sys.executable, "-m", "pip", "install", "--no-input",
+                        "--disable-pip-version-check", "--prefer-binary"] + pip_packages, check=True)
     except subprocess.CalledProcessError as e:
         print(f"❌ Error installing pip packages: {e}")
         return False
@@ -21,23 +21,26 @@ def install_dependencies():
     # Define the dependencies to install
     dependencies = [
         "PyPDF2",
-        "unstructured",
+        "unstructured[pdf]",
         "pdfplumber"
     ]
-    
-    # Install dependencies
-    for dependency in dependencies:
-        print(f"Installing {dependency}...")
-        try:
-            if dependency == "unstructured":
-                # Install unstructured with PDF support
-                subprocess.check_call([sys.executable, "-m", "pip", "install", "unstructured[pdf]"])
-            else:
-                subprocess.check_call([sys.executable, "-m", "pip", "install", dependency])
-            print(f"✅ Successfully installed {dependency}")
-        except subprocess.CalledProcessError as e:
-            print(f"❌ Failed to install {dependency}: {e}")
-            return False
+
+    # Prefer a pre-resolved lock file (generated with pip-compile) so pip
+    # skips dependency resolution; otherwise resolve everything in one pass
+    lock_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pdf_requirements.lock")
+    if os.path.exists(lock_file):
+        print(f"Installing pinned dependencies from {lock_file}...")
+        command = [sys.executable, "-m", "pip", "install", "--no-deps", "-r", lock_file]
+    else:
+        print(f"Installing {', '.join(dependencies)}...")
+        command = [sys.executable, "-m", "pip", "install", *dependencies]
+
+    try:
+        subprocess.check_call(command)
+        print("✅ Successfully installed PDF processing dependencies")
+    except subprocess.CalledProcessError as e:
+        print(f"❌ Failed to install PDF processing dependencies: {e}")
+        return False
     
     print("\nInstallation complete!")
     print("You can now process problematic PDFs with the enhanced PDF processing capabilities.")
@@ -54,7 +57,9 @@ def main():
         print("   pip install unstructured[pdf]")
         print("   pip install pdfplumber")
     
-    input("\nPress Enter to exit...")
+    # Only pause for interactive runs so scripted installs don't block
+    if sys.stdin.isatty() and not os.environ.get("CI"):
+        input("\nPress Enter to exit...")
 
 if __name__ == "__main__":
     main()
@@ -18,19 +18,25 @@ def install_dependencies():
     # Define the dependencies to install
     dependencies = [
         "PyPDF2>=3.0.0",
-        "unstructured>=0.10.0",
         "unstructured[pdf]>=0.10.0",
         "pdfplumber>=0.10.0"
     ]
-    
-    # Install dependencies
-    for dependency in dependencies:
-        print(f"Installing {dependency}...")
-        try:
-            subprocess.check_call([sys.executable, "-m", "pip", "install", dependency])
-            print(f"✅ Successfully installed {dependency}")
-        except subprocess.CalledProcessError as e:
-            print(f"❌ Failed to install {dependency}: {e}")
+
+    # Prefer a pre-resolved lock file (generated with pip-compile) so pip
+    # skips dependency resolution; otherwise resolve everything in one pass
+    lock_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pdf_requirements.lock")
+    if os.path.exists(lock_file):
+        print(f"Installing pinned dependencies from {lock_file}...")
+        command = [sys.executable, "-m", "pip", "install", "--no-deps", "-r", lock_file]
+    else:
+        print(f"Installing {', '.join(dependencies)}...")
+        command = [sys.executable, "-m", "pip", "install", *dependencies]
+
+    try:
+        subprocess.check_call(command)
+        print("✅ Successfully installed PDF processing dependencies")
+    except subprocess.CalledProcessError as e:
+        print(f"❌ Failed to install PDF processing dependencies: {e}")
     
     print("\nInstallation complete!")
     print("You can now process problematic PDFs with the enhanced PDF processing capabilities.")
@@ -58,15 +58,12 @@ def main():
         logger.info("Checking database services status...")
         status = db_manager.check_all_services()
         
-        print("\nDatabase Services Status:")
-        for service, running in status.items():
-            print(f"  {service}: {'✅ Running' if running else '❌ Not running'}")
-        
         all_running = all(status.values())
-        if all_running:
-            print("\nAll database services are running.")
-        else:
-            print("\nSome database services are not running.")
+        lines = [f"  {service}: {'✅ Running' if running else '❌ Not running'}"
+                 for service, running in status.items()]
+        summary = ("All database services are running." if all_running
+                   else "Some database services are not running.")
+        print("\nDatabase Services Status:\n" + "\n".join(lines) + f"\n\n{summary}")
         
         sys.exit(0 if all_running else 1)
 
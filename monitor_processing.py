@@ -12,6 +12,30 @@ from multifilerag_utils import (
     get_pipeline_status, get_document_counts, get_server_url
 )
 
+# (connect, read) timeout for each status request, so a hung server
+# cannot stall the monitor
+REQUEST_TIMEOUT = (3.0, 10.0)
+
+def poll_with_retry(fetch, server_url, retries=3, backoff_factor=0.5):
+    """Call a status helper, retrying with exponential backoff on errors.
+
+    Args:
+        fetch: Helper returning a dict with an "error" key on failure
+        server_url: Server URL passed through to the helper
+        retries: Number of retries after the first attempt
+        backoff_factor: Base delay in seconds, doubled after each retry
+
+    Returns:
+        Dict: The last result returned by the helper
+    """
+    result = fetch(server_url, timeout=REQUEST_TIMEOUT)
+    for attempt in range(retries):
+        if "error" not in result:
+            break
+        time.sleep(backoff_factor * (2 ** attempt))
+        result = fetch(server_url, timeout=REQUEST_TIMEOUT)
+    return result
+
 def monitor_processing(interval=10, server_url=None):
     """Monitor document processing with periodic updates.
 
@@ -33,10 +57,10 @@ def monitor_processing(interval=10, server_url=None):
             now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
             # Get pipeline status
-            status = get_pipeline_status(server_url)
+            status = poll_with_retry(get_pipeline_status, server_url)
 
             # Get document counts
-            counts = get_document_counts(server_url)
+            counts = poll_with_retry(get_document_counts, server_url)
 
             # Print status
             print(f"\n[{now}] Pipeline Status:")
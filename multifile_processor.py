@@ -1,6 +1,14 @@
 import os
 import argparse
 import json
+import hashlib
+import shutil
+import tempfile
+import multiprocessing
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
 from pathlib import Path
 
 # Required dependencies
@@ -19,115 +27,621 @@ except ImportError:
     print("Warning: unstructured not installed. Document processing will be limited.")
     print("Please install unstructured with: pip install 'unstructured[pdf]'")
 
-def extract_text_from_pdf(file_path):
-    """Extract text from PDF files using unstructured library.
+# Optional fast JSON serializer for the results file
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Optional text-layer PDF backends
+pypdfium2_available = False
+pypdf2_available = False
+
+try:
+    import pypdfium2 as pdfium
+    pypdfium2_available = True
+except ImportError:
+    pass
 
-    This function uses the unstructured library to extract text from PDFs,
-    which provides robust handling for a wide variety of PDF formats.
+try:
+    import PyPDF2
+    pypdf2_available = True
+except ImportError:
+    pass
+
+# Optional OCR fallback for scanned PDFs
+ocr_available = False
+
+try:
+    from pdf2image import convert_from_path
+    import easyocr
+    ocr_available = True
+except ImportError:
+    pass
+
+def _select_pdf_backend():
+    """Pick the PDF extraction backend.
+
+    PDF_BACKEND may name "unstructured", "pypdfium2" or "pypdf2". With the
+    default of "auto", unstructured is used when installed for its layout
+    aware partitioning, then the native PDFium text layer, then PyPDF2.
+    """
+    available = [
+        name for name, installed in (
+            ("unstructured", unstructured_available),
+            ("pypdfium2", pypdfium2_available),
+            ("pypdf2", pypdf2_available),
+        ) if installed
+    ]
+    requested = os.getenv("PDF_BACKEND", "auto").lower()
+    if requested in available:
+        return requested
+    if requested != "auto":
+        print(f"Warning: PDF backend '{requested}' is not available, using automatic selection")
+    return available[0] if available else None
+
+PDF_BACKEND = _select_pdf_backend()
+
+# Optional JIT compiler for the image color reduction
+numba_available = False
+
+try:
+    import numba
+    numba_available = True
+except ImportError:
+    pass
+
+if numba_available:
+    @numba.njit(parallel=True, cache=True)
+    def _rgb_sums(pixels):
+        """Sum the R, G and B channels of an (N, 3) uint8 array in one pass."""
+        r_sum = 0.0
+        g_sum = 0.0
+        b_sum = 0.0
+        for i in numba.prange(pixels.shape[0]):
+            r_sum += pixels[i, 0]
+            g_sum += pixels[i, 1]
+            b_sum += pixels[i, 2]
+        return r_sum, g_sum, b_sum
+
+# Histogram bin values, used to turn a channel histogram into a sum with one dot product
+_BIN_IDX = np.arange(256, dtype=np.float64)
+
+def _rgb_means(img):
+    """Return the average (R, G, B) of an RGB image."""
+    total = img.width * img.height
+    if numba_available:
+        pixels = np.ascontiguousarray(img, dtype=np.uint8).reshape(-1, 3)
+        return tuple(channel_sum / total for channel_sum in _rgb_sums(pixels))
+
+    # PIL builds the histogram in C without copying the pixel buffer
+    hist = np.asarray(img.histogram(), dtype=np.float64).reshape(3, 256)
+    return tuple(float(v) for v in (hist @ _BIN_IDX) / total)
+
+# Images are downsampled to at most this size before color analysis
+COLOR_SAMPLE_SIZE = (512, 512)
+_RESAMPLE_BILINEAR = getattr(Image, "Resampling", Image).BILINEAR
+
+# Per-file metadata gathered once with a single stat call
+FileMeta = namedtuple("FileMeta", ["path", "basename", "ext", "size"])
+
+def get_file_meta(file_path):
+    """Return a FileMeta for a file, using one os.stat call."""
+    basename = os.path.basename(file_path)
+    return FileMeta(
+        path=file_path,
+        basename=basename,
+        ext=os.path.splitext(basename)[1].lower(),
+        size=os.stat(file_path).st_size,
+    )
+
+# On-disk cache for extracted PDF text, keyed by file content
+PDF_CACHE_DIR = Path(os.getenv("MULTIFILERAG_CACHE_DIR", Path.home() / ".cache" / "multifilerag"))
+
+_HASH_BLOCK_SIZE = 1024 * 1024
+
+def _pdf_cache_key(file_path, size):
+    """Return a content hash for a file, used as the PDF text cache key.
+
+    The file is read unbuffered into one reused buffer, and on Linux the
+    kernel is told the access is sequential so it reads ahead aggressively.
+    """
+    digest = hashlib.blake2b()
+    buf = bytearray(_HASH_BLOCK_SIZE)
+    view = memoryview(buf)
+    with open(file_path, "rb", buffering=0) as f:
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            digest.update(view[:n])
+    return f"{digest.hexdigest()}{size}"
+
+def _read_pdf_cache(key):
+    """Return cached PDF text for a key, or None on a cache miss."""
+    cache_file = PDF_CACHE_DIR / f"{key}.txt"
+    try:
+        return cache_file.read_text(encoding="utf-8")
+    except OSError:
+        return None
+
+def _open_pdf_cache(key):
+    """Open a uniquely named temporary cache file for writing, or return None if unavailable."""
+    try:
+        PDF_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # A unique name per writer, so threads of one process can cache the same PDF at once
+        return tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=PDF_CACHE_DIR, prefix=f"{key}.", suffix=".tmp", delete=False
+        )
+    except OSError as e:
+        print(f"Warning: could not write PDF cache entry: {e}")
+        return None
+
+def _iter_unstructured_elements(file_path):
+    """Yield the text of each element unstructured extracts from a PDF."""
+    # Use the PDF-specific partitioner for better results
+    try:
+        elements = partition_pdf(file_path)
+    except (ImportError, AttributeError):
+        # Fall back to generic partitioner if PDF-specific one is not available
+        elements = partition(file_path)
+
+    for element in elements:
+        yield str(element)
+
+@contextmanager
+def _pdfium_document(file_path):
+    """Open a PDF with PDFium and yield (page count, page text function)."""
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        yield len(pdf), partial(_pdfium_page_text, pdf)
+    finally:
+        pdf.close()
+
+def _pdfium_page_text(pdf, index):
+    """Return the text layer of one page of an open PDFium document."""
+    page = pdf[index]
+    textpage = page.get_textpage()
+    try:
+        return textpage.get_text_range()
+    finally:
+        textpage.close()
+        page.close()
+
+@contextmanager
+def _pypdf2_document(file_path):
+    """Open a PDF with PyPDF2 and yield (page count, page text function)."""
+    with open(file_path, "rb") as pdf_file:
+        reader = PyPDF2.PdfReader(pdf_file)
+        yield len(reader.pages), lambda index: reader.pages[index].extract_text() or ""
+
+# Document openers for the text-layer backends; each parses the file once
+PAGE_BACKENDS = {
+    "pypdfium2": _pdfium_document,
+    "pypdf2": _pypdf2_document,
+}
+
+# Extraction strategy by page count: small PDFs are read in-process, large
+# ones are split into page ranges handled by worker processes. Neither
+# backend benefits from threads (PDFium is not thread-safe and PyPDF2 holds
+# the GIL), so there is no thread tier.
+PDF_RULES = [
+    {"max_pages": 200, "method": "sequential"},
+    {"max_pages": None, "method": "processes", "chunk_size": 100},
+]
+
+def _choose_pdf_strategy(num_pages):
+    """Return the first PDF_RULES entry that covers num_pages."""
+    for rule in PDF_RULES:
+        if rule["max_pages"] is None or num_pages <= rule["max_pages"]:
+            return rule
+    return PDF_RULES[-1]
+
+# Set in the worker processes of the file-level pools, where large PDFs are
+# read sequentially instead of starting another pool inside each worker
+_in_file_worker = False
+
+def init_file_worker():
+    """Mark the current process as a file-level worker (a process pool initializer)."""
+    global _in_file_worker
+    _in_file_worker = True
+
+def _extract_page_range(backend, file_path, start, stop):
+    """Return the page texts for [start, stop); runs in worker processes."""
+    with PAGE_BACKENDS[backend](file_path) as (_, page_text):
+        return [page_text(index) for index in range(start, stop)]
+
+def _iter_text_layer_pages(backend, file_path):
+    """Yield page texts in order, using a process pool for large PDFs.
+
+    The page count and, for small PDFs, the page text come from the same
+    open document, so the file is only parsed once. Inside a file-level
+    worker every PDF is read sequentially, since the files already run in
+    parallel.
+    """
+    with PAGE_BACKENDS[backend](file_path) as (num_pages, page_text):
+        strategy = _choose_pdf_strategy(num_pages)
+        if strategy["method"] == "sequential" or _in_file_worker:
+            for index in range(num_pages):
+                yield page_text(index)
+            return
+
+    starts = list(range(0, num_pages, strategy["chunk_size"]))
+    stops = [min(start + strategy["chunk_size"], num_pages) for start in starts]
+    max_workers = min(get_max_workers(), len(starts))
+    # Spawn rather than fork: this runs in executor threads of the asyncio
+    # insert pipeline, and forking a multi-threaded process can deadlock
+    mp_context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context) as executor:
+        for texts in executor.map(_extract_page_range, [backend] * len(starts),
+                                  [file_path] * len(starts), starts, stops):
+            yield from texts
+
+def _iter_pdfium_pages(file_path):
+    """Yield the text layer of each page using the native PDFium library."""
+    return _iter_text_layer_pages("pypdfium2", file_path)
+
+def _iter_pypdf2_pages(file_path):
+    """Yield the text layer of each page using PyPDF2."""
+    return _iter_text_layer_pages("pypdf2", file_path)
+
+PDF_EXTRACTORS = {
+    "unstructured": _iter_unstructured_elements,
+    "pypdfium2": _iter_pdfium_pages,
+    "pypdf2": _iter_pypdf2_pages,
+}
+
+def iter_pdf_text(file_path, meta=None):
+    """Yield the text of a PDF element by element.
+
+    Cached text is yielded as a single chunk. On a cache miss the PDF is
+    read with the selected backend (unstructured elements or text-layer
+    pages) and each piece is written through to the cache as it is
+    yielded, so the full document is never joined into one string.
 
     Args:
         file_path: Path to the PDF file
+        meta: Optional FileMeta for the file, computed if not given
 
-    Returns:
-        str: Extracted text or None if extraction failed
+    Yields:
+        str: Chunks of extracted text, separated by blank lines
     """
-    if not unstructured_available:
-        print(f"Cannot process PDF {file_path}: unstructured library not installed")
+    meta = meta or get_file_meta(file_path)
+    cache_key = f"{PDF_BACKEND}-{_pdf_cache_key(file_path, meta.size)}"
+    cached_text = _read_pdf_cache(cache_key)
+
+    if cached_text is not None:
+        print(f"Using cached text for PDF: {file_path}")
+        yield cached_text
+        return
+
+    print(f"Processing PDF with {PDF_BACKEND}: {file_path}")
+
+    cache_fh = _open_pdf_cache(cache_key)
+    completed = False
+    try:
+        for index, text in enumerate(PDF_EXTRACTORS[PDF_BACKEND](file_path)):
+            chunk = text if index == 0 else f"\n\n{text}"
+            if cache_fh:
+                cache_fh.write(chunk)
+            yield chunk
+        completed = True
+    finally:
+        if cache_fh:
+            cache_fh.close()
+            if completed:
+                os.replace(cache_fh.name, PDF_CACHE_DIR / f"{cache_key}.txt")
+            else:
+                os.unlink(cache_fh.name)
+
+def _pdf_header(meta):
+    """Return the file information header written before PDF content."""
+    return "".join([
+        f"PDF File: {meta.basename}\n",
+        f"Size: {meta.size / 1024 / 1024:.2f} MB\n",
+        f"Path: {meta.path}\n\n",
+        "PDF Content:\n",
+    ])
+
+def _pdf_backend_missing(file_path):
+    """Report and return True when no PDF backend is installed."""
+    if PDF_BACKEND is None:
+        print(f"Cannot process PDF {file_path}: no PDF library installed")
         print("Please install with: pip install 'unstructured[pdf]'")
+        return True
+    return False
+
+# PDFs whose text layer yields fewer characters than this are OCRed instead
+OCR_MIN_CHARS = 100
+OCR_DPI = int(os.getenv("OCR_DPI", "200"))
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", "2"))
+
+_ocr_reader = None
+
+def _get_ocr_reader():
+    """Return the shared EasyOCR reader, creating it on first use."""
+    global _ocr_reader
+    if _ocr_reader is None:
+        # Loading the detection and recognition models dominates OCR start-up
+        _ocr_reader = easyocr.Reader(['en'])
+    return _ocr_reader
+
+def ocr_pdf_text(file_path):
+    """Rasterize a PDF and OCR its pages with EasyOCR.
+
+    Args:
+        file_path: Path to the PDF file
+
+    Returns:
+        str: OCR text of all pages, or None if OCR is unavailable or failed
+    """
+    if not ocr_available:
         return None
 
     try:
-        print(f"Processing PDF with unstructured: {file_path}")
+        print(f"Running OCR on PDF: {file_path}")
+        images = convert_from_path(file_path, dpi=OCR_DPI)
+        reader = _get_ocr_reader()
 
-        # Use the PDF-specific partitioner for better results
-        try:
-            elements = partition_pdf(file_path)
-        except (ImportError, AttributeError):
-            # Fall back to generic partitioner if PDF-specific one is not available
-            elements = partition(file_path)
+        def ocr_page(image):
+            return "\n".join(t[1] for t in reader.readtext(np.array(image), paragraph=True))
 
-        # Join all elements into a single text string
-        text_content = "\n\n".join([str(el) for el in elements])
+        with ThreadPoolExecutor(max_workers=OCR_WORKERS) as pool:
+            texts = list(pool.map(ocr_page, images))
+        return "\n\n".join(texts)
+    except Exception as e:
+        print(f"Error running OCR on PDF {file_path}: {e}")
+        return None
 
-        # Add basic file information
-        file_info = f"PDF File: {os.path.basename(file_path)}\n"
-        file_info += f"Size: {os.path.getsize(file_path) / 1024 / 1024:.2f} MB\n"
-        file_info += f"Path: {file_path}\n\n"
-        file_info += "PDF Content:\n"
+def _cached_ocr_pdf_text(file_path, meta):
+    """Return the OCR text of a PDF, reading and writing it through the PDF text cache.
 
-        # Combine file info with content
-        text_content = file_info + text_content
+    Only non-empty OCR results are cached, under an "ocr-" key next to the
+    text-layer entries, so scanned PDFs are not OCRed again on repeat runs.
+    """
+    if not ocr_available:
+        return None
+
+    cache_key = f"ocr-{_pdf_cache_key(file_path, meta.size)}"
+    cached_text = _read_pdf_cache(cache_key)
+    if cached_text is not None:
+        print(f"Using cached OCR text for PDF: {file_path}")
+        return cached_text
+
+    ocr_text = ocr_pdf_text(file_path)
+    if ocr_text and ocr_text.strip():
+        cache_fh = _open_pdf_cache(cache_key)
+        if cache_fh:
+            try:
+                with cache_fh:
+                    cache_fh.write(ocr_text)
+                os.replace(cache_fh.name, PDF_CACHE_DIR / f"{cache_key}.txt")
+            except OSError as e:
+                print(f"Warning: could not write PDF cache entry: {e}")
+    return ocr_text
+
+# Approximate size of the chunks yielded by extract_text_from_pdf_iter
+PDF_STREAM_CHUNK_CHARS = int(os.getenv("PDF_STREAM_CHUNK_CHARS", "8192"))
+
+def extract_text_from_pdf_iter(file_path, meta=None, chunk_chars=PDF_STREAM_CHUNK_CHARS):
+    """Yield the text of a PDF in chunks for streaming consumers.
+
+    The file information header comes first, followed by the extracted
+    text with small pages coalesced into chunks of about chunk_chars
+    characters. Joining the chunks gives the same text as
+    extract_text_from_pdf. If the text layer is nearly empty (a scanned
+    PDF) and pdf2image and easyocr are installed, OCR text is yielded
+    instead (cached like the text layer). Extraction errors are raised to
+    the caller.
+
+    Args:
+        file_path: Path to the PDF file
+        meta: Optional FileMeta for the file, computed if not given
+        chunk_chars: Minimum number of characters per yielded chunk
+
+    Yields:
+        str: Chunks of the PDF text
+    """
+    if _pdf_backend_missing(file_path):
+        return
+
+    meta = meta or get_file_meta(file_path)
+    batch = [_pdf_header(meta)]
+    batch_chars = len(batch[0])
+    text_chars = 0
+    yielded = False
+    for text in iter_pdf_text(file_path, meta):
+        batch.append(text)
+        batch_chars += len(text)
+        text_chars += len(text.strip())
+        if batch_chars >= chunk_chars:
+            yield "".join(batch)
+            batch, batch_chars = [], 0
+            yielded = True
+
+    # Nothing has been yielded yet for short documents, so the OCR text can replace it
+    if not yielded and text_chars < OCR_MIN_CHARS:
+        ocr_text = _cached_ocr_pdf_text(file_path, meta)
+        if ocr_text and ocr_text.strip():
+            batch = [batch[0], ocr_text]
+
+    if batch:
+        yield "".join(batch)
+
+def extract_text_from_pdf(file_path, meta=None):
+    """Extract text from PDF files using the selected PDF backend.
+
+    By default this uses the unstructured library, which provides robust
+    handling for a wide variety of PDF formats; pypdfium2 or PyPDF2 read
+    the text layer instead when selected or when unstructured is missing.
+    Extracted text is cached on disk by content hash, so unchanged files
+    are not partitioned again on repeat runs.
+
+    Args:
+        file_path: Path to the PDF file
+        meta: Optional FileMeta for the file, computed if not given
+
+    Returns:
+        str: Extracted text or None if extraction failed
+    """
+    if _pdf_backend_missing(file_path):
+        return None
+
+    try:
+        meta = meta or get_file_meta(file_path)
+
+        # Combine basic file information with content
+        text_content = "".join(extract_text_from_pdf_iter(file_path, meta))
 
         # If we have content, return it
         if len(text_content.strip()) > 0:
-            print(f"Successfully extracted text from {file_path} using unstructured")
+            print(f"Successfully extracted text from {file_path} using {PDF_BACKEND}")
             return text_content
 
-        print(f"Unstructured extracted empty content from {file_path}")
+        print(f"{PDF_BACKEND} extracted empty content from {file_path}")
+        return None
+
+    except Exception as e:
+        print(f"Error extracting text from PDF {file_path} with {PDF_BACKEND}: {e}")
+        return None
+
+def partition_to_file(file_path, out_fh, meta=None):
+    """Extract text from a PDF and stream it into an open text file.
+
+    Args:
+        file_path: Path to the PDF file
+        out_fh: Text file handle to write the header and content to
+        meta: Optional FileMeta for the file, computed if not given
+
+    Returns:
+        int: Number of characters written, or None if extraction failed
+    """
+    if _pdf_backend_missing(file_path):
         return None
 
+    try:
+        written = 0
+        for chunk in extract_text_from_pdf_iter(file_path, meta):
+            written += out_fh.write(chunk)
+
+        print(f"Successfully extracted text from {file_path} using {PDF_BACKEND}")
+        return written
+
     except Exception as e:
-        print(f"Error extracting text from PDF {file_path} with unstructured: {e}")
+        print(f"Error extracting text from PDF {file_path} with {PDF_BACKEND}: {e}")
         return None
 
-def extract_text_from_csv(file_path):
+# Maximum number of CSV rows rendered as text; statistics still cover all rows
+CSV_MAX_ROWS = int(os.getenv("CSV_MAX_ROWS", "1000"))
+
+def _correlation_strengths(corr_values):
+    """Label an array of correlation coefficients as strong/moderate positive/negative.
+
+    A value of exactly 0.7 is moderate positive, exactly 0 or -0.7 moderate negative.
+    """
+    return np.select(
+        [corr_values > 0.7, corr_values > 0, corr_values < -0.7],
+        ["strong positive", "moderate positive", "strong negative"],
+        "moderate negative",
+    )
+
+def read_csv(file_path):
+    """Read a CSV file, preferring pandas' multithreaded PyArrow engine.
+
+    Falls back to the default C engine when pyarrow is not installed or
+    cannot parse the file. The two engines can infer different dtypes:
+    pyarrow turns ISO date and timestamp columns into dates, which the C
+    engine leaves as strings, so column types in the generated description
+    depend on the engine used.
+    """
+    try:
+        return pd.read_csv(file_path, engine="pyarrow")
+    except (ImportError, ValueError):
+        return pd.read_csv(file_path)
+
+def extract_text_from_csv(file_path, meta=None):
     """Extract text from CSV files with enhanced analysis."""
     try:
         # Read the CSV file using pandas
-        df = pd.read_csv(file_path)
+        df = read_csv(file_path)
 
-        # Convert DataFrame to a string representation
-        csv_text = df.to_string(index=False)
+        # Convert DataFrame to a string representation, truncating very large frames
+        if len(df) > CSV_MAX_ROWS:
+            csv_text = df.head(CSV_MAX_ROWS).to_string(index=False)
+            csv_text += f"\n... (showing first {CSV_MAX_ROWS} of {len(df)} rows)"
+        else:
+            csv_text = df.to_string(index=False)
 
         # Add column descriptions
         column_descriptions = []
         for column in df.columns:
             column_descriptions.append(f"Column '{column}': Contains {df[column].dtype} values")
 
-        # Add basic statistics for numeric columns
+        # Select the numeric columns once for statistics and correlation
+        numeric_df = df.select_dtypes(include=[np.number])
+        numeric_cols = numeric_df.columns
+
+        # Add basic statistics for numeric columns; the float statistics are
+        # aggregated in one call, while min and max are taken per column because
+        # agg (and DataFrame.min on mixed frames) upcasts large ints to float
         stats = []
-        for column in df.select_dtypes(include=[np.number]).columns:
+        # agg raises on a frame without columns, so text-only CSVs skip it
+        stats_df = numeric_df.agg(["mean", "median", "std"]) if len(numeric_cols) else pd.DataFrame()
+        for column, col_stats in stats_df.items():
             stats.append(f"Statistics for '{column}':")
-            stats.append(f"  - Min: {df[column].min()}")
-            stats.append(f"  - Max: {df[column].max()}")
-            stats.append(f"  - Mean: {df[column].mean()}")
-            stats.append(f"  - Median: {df[column].median()}")
-            stats.append(f"  - Standard Deviation: {df[column].std()}")
+            stats.append(f"  - Min: {numeric_df[column].min()}")
+            stats.append(f"  - Max: {numeric_df[column].max()}")
+            stats.append(f"  - Mean: {col_stats['mean']}")
+            stats.append(f"  - Median: {col_stats['median']}")
+            stats.append(f"  - Standard Deviation: {col_stats['std']}")
 
         # Add correlation analysis for numeric columns
         corr_analysis = []
-        if len(df.select_dtypes(include=[np.number]).columns) > 1:
-            corr_matrix = df.select_dtypes(include=[np.number]).corr()
+        if len(numeric_cols) > 1:
+            values = numeric_df.to_numpy(dtype=np.float64)
+            if np.isnan(values).any():
+                # pandas handles missing values pairwise; np.corrcoef would propagate NaN
+                corr_matrix = numeric_df.corr().to_numpy()
+            else:
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    corr_matrix = np.corrcoef(values, rowvar=False)
             corr_analysis.append("Correlation Analysis:")
 
-            # Find strong correlations
-            for i in range(len(corr_matrix.columns)):
-                for j in range(i+1, len(corr_matrix.columns)):
-                    col1 = corr_matrix.columns[i]
-                    col2 = corr_matrix.columns[j]
-                    corr_value = corr_matrix.iloc[i, j]
-                    if abs(corr_value) > 0.5:  # Only report strong correlations
-                        strength = "strong positive" if corr_value > 0.7 else "moderate positive" if corr_value > 0 else "strong negative" if corr_value < -0.7 else "moderate negative"
-                        corr_analysis.append(f"  - {col1} and {col2} have a {strength} correlation ({corr_value:.2f})")
+            # Find strong correlations in the upper triangle
+            rows, cols = np.triu_indices_from(corr_matrix, k=1)
+            corr_values = corr_matrix[rows, cols]
+            strong = np.abs(corr_values) > 0.5  # Only report strong correlations
+            rows, cols, corr_values = rows[strong], cols[strong], corr_values[strong]
+            strengths = _correlation_strengths(corr_values)
+            corr_analysis.extend(
+                f"  - {numeric_cols[i]} and {numeric_cols[j]} have a {strength} correlation ({corr_value:.2f})"
+                for i, j, strength, corr_value in zip(rows, cols, strengths, corr_values)
+            )
 
         # Combine all information
-        full_text = f"CSV File Content:\n{csv_text}\n\nColumn Descriptions:\n"
-        full_text += "\n".join(column_descriptions)
+        sections = [
+            f"CSV File Content:\n{csv_text}",
+            "Column Descriptions:\n" + "\n".join(column_descriptions),
+        ]
 
         if stats:
-            full_text += "\n\nStatistical Information:\n" + "\n".join(stats)
+            sections.append("Statistical Information:\n" + "\n".join(stats))
 
         if corr_analysis:
-            full_text += "\n\n" + "\n".join(corr_analysis)
+            sections.append("\n".join(corr_analysis))
 
-        return full_text
+        return "\n\n".join(sections)
     except Exception as e:
         print(f"Error extracting text from CSV {file_path}: {e}")
         return None
 
-def extract_text_from_image(file_path):
+def extract_text_from_image(file_path, meta=None):
     """Create a detailed text description of an image."""
     try:
+        meta = meta or get_file_meta(file_path)
+
         # Open the image
         img = Image.open(file_path)
 
@@ -139,144 +653,257 @@ def extract_text_from_image(file_path):
         # Calculate aspect ratio
         aspect_ratio = width / height
 
+        # Create a text description
+        parts = [
+            "Image Information:\n",
+            f"Filename: {meta.basename}\n",
+            f"Format: {format_type}\n",
+            f"Mode: {mode}\n",
+            f"Dimensions: {width} x {height} pixels\n",
+            f"Aspect Ratio: {aspect_ratio:.2f}\n",
+            f"File Size: {meta.size / 1024:.1f} KB\n",
+        ]
+
         # Analyze color distribution
-        color_analysis = ""
         if mode == "RGB" or mode == "RGBA":
+            # Averages only need a sample; shrink large images before decoding all pixels
+            if width > COLOR_SAMPLE_SIZE[0] or height > COLOR_SAMPLE_SIZE[1]:
+                img.thumbnail(COLOR_SAMPLE_SIZE, _RESAMPLE_BILINEAR)
+
             # Convert image to RGB if it's RGBA
             if mode == "RGBA":
                 img = img.convert("RGB")
 
-            # Get color histogram
-            hist = img.histogram()
-            r_hist = hist[0:256]
-            g_hist = hist[256:512]
-            b_hist = hist[512:768]
-
             # Calculate average RGB values
-            total_pixels = width * height
-            r_avg = sum(i * count for i, count in enumerate(r_hist)) / total_pixels
-            g_avg = sum(i * count for i, count in enumerate(g_hist)) / total_pixels
-            b_avg = sum(i * count for i, count in enumerate(b_hist)) / total_pixels
+            r_avg, g_avg, b_avg = _rgb_means(img)
 
-            color_analysis = f"Color Analysis:\n"
-            color_analysis += f"  - Average RGB: ({r_avg:.1f}, {g_avg:.1f}, {b_avg:.1f})\n"
+            parts.append("\nColor Analysis:\n")
+            parts.append(f"  - Average RGB: ({r_avg:.1f}, {g_avg:.1f}, {b_avg:.1f})\n")
 
             # Determine dominant color range
             if r_avg > g_avg and r_avg > b_avg:
-                color_analysis += "  - Dominant color range: Red\n"
+                parts.append("  - Dominant color range: Red\n")
             elif g_avg > r_avg and g_avg > b_avg:
-                color_analysis += "  - Dominant color range: Green\n"
+                parts.append("  - Dominant color range: Green\n")
             elif b_avg > r_avg and b_avg > g_avg:
-                color_analysis += "  - Dominant color range: Blue\n"
+                parts.append("  - Dominant color range: Blue\n")
             else:
-                color_analysis += "  - No dominant color range\n"
+                parts.append("  - No dominant color range\n")
 
             # Determine if image is bright or dark
             brightness = (r_avg + g_avg + b_avg) / 3
             if brightness > 200:
-                color_analysis += "  - Image is very bright\n"
+                parts.append("  - Image is very bright\n")
             elif brightness > 150:
-                color_analysis += "  - Image is bright\n"
+                parts.append("  - Image is bright\n")
             elif brightness > 100:
-                color_analysis += "  - Image has moderate brightness\n"
+                parts.append("  - Image has moderate brightness\n")
             elif brightness > 50:
-                color_analysis += "  - Image is dark\n"
+                parts.append("  - Image is dark\n")
             else:
-                color_analysis += "  - Image is very dark\n"
+                parts.append("  - Image is very dark\n")
 
-        # Create a text description
-        image_description = f"Image Information:\n"
-        image_description += f"Filename: {os.path.basename(file_path)}\n"
-        image_description += f"Format: {format_type}\n"
-        image_description += f"Mode: {mode}\n"
-        image_description += f"Dimensions: {width} x {height} pixels\n"
-        image_description += f"Aspect Ratio: {aspect_ratio:.2f}\n"
-        image_description += f"File Size: {os.path.getsize(file_path) / 1024:.1f} KB\n"
-
-        if color_analysis:
-            image_description += f"\n{color_analysis}"
-
-        return image_description
+        return "".join(parts)
     except Exception as e:
         print(f"Error extracting information from image {file_path}: {e}")
         return None
 
-def process_file(file_path):
+def extract_text_from_text_file(file_path, meta=None):
+    """Read a plain text file."""
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except Exception as e:
+        print(f"Error reading text file {file_path}: {e}")
+        return None
+
+TEXT_EXTENSIONS = ('.txt', '.md', '.text')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.webp')
+
+# Extension -> (file kind, handler); every handler takes (file_path, meta)
+_EXT_HANDLERS = {
+    '.pdf': ("PDF", extract_text_from_pdf),
+    '.csv': ("CSV", extract_text_from_csv),
+    **{ext: ("image", extract_text_from_image) for ext in IMAGE_EXTENSIONS},
+    **{ext: ("text", extract_text_from_text_file) for ext in TEXT_EXTENSIONS},
+}
+
+def process_file(file_path, meta=None):
     """Process a file based on its extension."""
-    file_extension = os.path.splitext(file_path)[1].lower()
+    if meta is None:
+        try:
+            meta = get_file_meta(file_path)
+        except OSError as e:
+            print(f"Error reading file {file_path}: {e}")
+            return None
 
-    if file_extension in ['.pdf']:
-        print(f"Processing PDF file: {file_path}")
-        return extract_text_from_pdf(file_path)
-    elif file_extension in ['.csv']:
-        print(f"Processing CSV file: {file_path}")
-        return extract_text_from_csv(file_path)
-    elif file_extension in ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.webp']:
-        print(f"Processing image file: {file_path}")
-        return extract_text_from_image(file_path)
-    elif file_extension in ['.txt', '.md', '.text']:
-        print(f"Processing text file: {file_path}")
+    handler = _EXT_HANDLERS.get(meta.ext)
+    if handler is not None:
+        kind, extract = handler
+        print(f"Processing {kind} file: {file_path}")
+        return extract(file_path, meta)
+
+    # For other file types, try unstructured if available
+    if unstructured_available:
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return f.read()
+            print(f"Processing file with unstructured: {file_path}")
+            elements = partition(file_path)
+            return "\n\n".join([str(el) for el in elements])
         except Exception as e:
-            print(f"Error reading text file {file_path}: {e}")
+            print(f"Error processing file {file_path}: {e}")
             return None
     else:
-        # For other file types, try unstructured if available
-        if unstructured_available:
-            try:
-                print(f"Processing file with unstructured: {file_path}")
-                elements = partition(file_path)
-                return "\n\n".join([str(el) for el in elements])
-            except Exception as e:
-                print(f"Error processing file {file_path}: {e}")
-                return None
-        else:
-            print(f"Cannot process file {file_path}: unstructured not installed")
+        print(f"Cannot process file {file_path}: unstructured not installed")
+        return None
+
+def save_processed_file(file_path, output_file):
+    """Process a file and write its extracted text to output_file.
+
+    Text files are copied byte-for-byte, PDFs are streamed straight into
+    the output file, and other types go through process_file.
+
+    Returns:
+        int: Number of characters (bytes for copied text files) written,
+        or None if processing failed
+    """
+    try:
+        meta = get_file_meta(file_path)
+    except OSError as e:
+        print(f"Error reading file {file_path}: {e}")
+        return None
+
+    if meta.ext in TEXT_EXTENSIONS:
+        # Output format equals input format: let the kernel copy the bytes
+        print(f"Copying text file: {file_path}")
+        try:
+            shutil.copyfile(file_path, output_file)
+        except OSError as e:
+            print(f"Error copying text file {file_path}: {e}")
             return None
+        return meta.size
 
-def process_directory(directory_path, output_directory=None):
-    """Process all files in a directory."""
-    if output_directory is None:
-        output_directory = os.path.join(directory_path, "processed")
+    if meta.ext == '.pdf' and PDF_BACKEND is not None:
+        print(f"Processing PDF file: {file_path}")
+        with open(output_file, "w", encoding="utf-8") as f:
+            size = partition_to_file(file_path, f, meta)
+        if size is None:
+            os.remove(output_file)
+        return size
+
+    text_content = process_file(file_path, meta)
+    if not text_content:
+        return None
 
-    os.makedirs(output_directory, exist_ok=True)
+    Path(output_file).write_bytes(text_content.encode("utf-8"))
+    return len(text_content)
 
-    results = {}
+def iter_files(directory_path, skip_dir=None, skip_hidden=False):
+    """Yield os.DirEntry objects for all files under a directory.
 
-    for root, _, files in os.walk(directory_path):
-        for file in files:
-            file_path = os.path.join(root, file)
+    The tree is walked iteratively with os.scandir, whose DirEntry objects
+    reuse the type information returned by the directory listing, so no
+    extra stat call is needed per entry. The absolute path given as
+    skip_dir is pruned before descending into it, and with skip_hidden
+    any file or directory whose name starts with '.' is ignored.
+    Directories that cannot be listed are reported and skipped.
+    """
+    stack = [directory_path]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    if skip_hidden and entry.name.startswith('.'):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        if skip_dir and os.path.abspath(entry.path) == skip_dir:
+                            continue
+                        stack.append(entry.path)
+                    elif entry.is_file():
+                        yield entry
+        except OSError as e:
+            print(f"Error reading directory {current}: {e}")
+
+def get_max_workers():
+    """Return the number of worker processes to use for file processing.
+
+    Defaults to the CPU count and can be capped with MULTIFILERAG_WORKERS.
+    """
+    try:
+        return max(1, int(os.getenv("MULTIFILERAG_WORKERS", "")))
+    except ValueError:
+        return os.cpu_count() or 1
 
-            # Skip files in the output directory
-            if os.path.abspath(file_path).startswith(os.path.abspath(output_directory)):
-                continue
+def output_file_names(rel_paths):
+    """Return a distinct output file name for each relative input path.
 
-            # Process the file
-            text_content = process_file(file_path)
+    A file is saved as "<stem>.txt" unless another file maps to the same
+    name (a.pdf and a.csv, or report.pdf in two subdirectories); those are
+    named after their whole relative path instead, e.g. "sub__report.pdf.txt".
+    Names are compared case-insensitively for case-insensitive filesystems.
+    """
+    simple_names = [f"{os.path.splitext(os.path.basename(rel_path))[0]}.txt" for rel_path in rel_paths]
+    counts = Counter(name.lower() for name in simple_names)
+    names, taken = [], set()
+    for rel_path, name in zip(rel_paths, simple_names):
+        if counts[name.lower()] > 1:
+            name = rel_path.replace(os.sep, "__") + ".txt"
+        # A renamed file can still meet another file's name; number it then
+        base, suffix = name[:-len(".txt")], 1
+        while name.lower() in taken:
+            name = f"{base}.{suffix}.txt"
+            suffix += 1
+        taken.add(name.lower())
+        names.append(name)
+    return names
 
-            if text_content:
-                # Save the processed content
-                output_file = os.path.join(output_directory, f"{os.path.splitext(file)[0]}.txt")
-                with open(output_file, "w", encoding="utf-8") as f:
-                    f.write(text_content)
+def process_directory(directory_path, output_directory=None):
+    """Process all files in a directory.
 
-                results[file] = {
-                    "status": "success",
-                    "output_file": output_file,
-                    "size": len(text_content)
-                }
-            else:
-                results[file] = {
-                    "status": "error",
-                    "message": "Failed to process file"
-                }
+    Files are extracted and written in parallel worker processes; each
+    worker writes to its own output file (see output_file_names). Results
+    are keyed by the file's path relative to directory_path.
+    """
+    if output_directory is None:
+        output_directory = os.path.join(directory_path, "processed")
+
+    os.makedirs(output_directory, exist_ok=True)
+
+    results = {}
+    abs_output = os.path.abspath(output_directory)
+
+    entries = list(iter_files(directory_path, skip_dir=abs_output))
+    file_paths = [entry.path for entry in entries]
+    files = [os.path.relpath(file_path, directory_path) for file_path in file_paths]
+    output_files = [os.path.join(output_directory, name) for name in output_file_names(files)]
+
+    # Process the files and save the processed content
+    max_workers = min(get_max_workers(), len(file_paths))
+    if max_workers > 1:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=init_file_worker) as executor:
+            sizes = list(executor.map(save_processed_file, file_paths, output_files))
+    else:
+        sizes = [save_processed_file(p, o) for p, o in zip(file_paths, output_files)]
+
+    for file, output_file, size in zip(files, output_files, sizes):
+        if size:
+            results[file] = {
+                "status": "success",
+                "output_file": output_file,
+                "size": size
+            }
+        else:
+            results[file] = {
+                "status": "error",
+                "message": "Failed to process file"
+            }
 
     # Save the results
     results_file = os.path.join(output_directory, "processing_results.json")
-    with open(results_file, "w", encoding="utf-8") as f:
-        json.dump(results, f, indent=2)
+    if orjson is not None:
+        Path(results_file).write_bytes(orjson.dumps(results, option=orjson.OPT_INDENT_2))
+    else:
+        Path(results_file).write_bytes(json.dumps(results, indent=2).encode("utf-8"))
 
     return results
 
@@ -292,13 +919,9 @@ def main():
         output_dir = args.output or "./processed"
         os.makedirs(output_dir, exist_ok=True)
 
-        text_content = process_file(args.input)
-
-        if text_content:
-            output_file = os.path.join(output_dir, f"{os.path.splitext(os.path.basename(args.input))[0]}.txt")
-            with open(output_file, "w", encoding="utf-8") as f:
-                f.write(text_content)
+        output_file = os.path.join(output_dir, f"{os.path.splitext(os.path.basename(args.input))[0]}.txt")
 
+        if save_processed_file(args.input, output_file):
             print(f"Successfully processed {args.input}")
             print(f"Output saved to {output_file}")
         else:
@@ -9,8 +9,10 @@ from pathlib import Path
 import inspect
 from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv(dotenv_path=".env", override=False)
+# Load environment variables from .env file (once per process, even across modules)
+if not os.environ.get("_MFR_DOTENV_LOADED"):
+    load_dotenv(dotenv_path=".env", override=False)
+    os.environ["_MFR_DOTENV_LOADED"] = "1"
 
 # Import our MultiFileRAG core
 from multifilerag_core import MultiFileRAG, create_multifilerag, print_stream
@@ -24,26 +26,29 @@ async def process_files(args):
         llm_model_name=args.llm_model,
         embedding_model_name=args.embedding_model,
         ollama_host=args.ollama_host,
-        log_level=args.log_level
+        log_level=args.log_level,
+        insert_batch_size=args.insert_batch_size
     )
     
     # Process files
     if args.file:
         # Process a single file
-        success = mfrag.process_and_insert_file(args.file)
+        success = await mfrag.aprocess_and_insert_file(args.file)
         if success:
             print(f"✅ Successfully processed and inserted {args.file}")
         else:
             print(f"❌ Failed to process {args.file}")
     else:
         # Process all files in the input directory
-        results = mfrag.scan_and_process_directory()
+        results = await mfrag.ascan_and_process_directory()
         print(f"\n✅ Processed {len(results['success'])} files successfully")
         if results['failure']:
             print(f"❌ Failed to process {len(results['failure'])} files:")
             for file in results['failure']:
                 print(f"  - {file}")
 
+    await mfrag.aclose()
+
 async def query_rag(args):
     """Query the RAG system."""
     # Create and initialize MultiFileRAG
@@ -58,7 +63,7 @@ async def query_rag(args):
     
     # Execute the query
     print(f"Querying in {args.mode} mode: {args.query}")
-    response = mfrag.query(args.query, mode=args.mode, stream=args.stream)
+    response = await mfrag.aquery(args.query, mode=args.mode, stream=args.stream)
     
     # Handle streaming response
     if args.stream and (inspect.isasyncgen(response) or hasattr(response, '__aiter__')):
@@ -66,6 +71,8 @@ async def query_rag(args):
     else:
         print(response)
 
+    await mfrag.aclose()
+
 def main():
     parser = argparse.ArgumentParser(description="MultiFileRAG CLI")
     subparsers = parser.add_subparsers(dest="command", help="Command to run")
@@ -82,6 +89,7 @@ def main():
     # Process command
     process_parser = subparsers.add_parser("process", parents=[common_parser], help="Process files and add them to the RAG system")
     process_parser.add_argument("--file", help="Process a specific file (if not specified, processes all files in input-dir)")
+    process_parser.add_argument("--insert-batch-size", type=int, default=int(os.getenv("INSERT_BATCH_SIZE", "32")), help="Number of files inserted per RAG insert call")
     
     # Query command
     query_parser = subparsers.add_parser("query", parents=[common_parser], help="Query the RAG system")
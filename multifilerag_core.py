@@ -19,28 +19,44 @@ License: MIT
 import os
 import sys
 import asyncio
-import nest_asyncio
+import hashlib
+import mmap
+import multiprocessing
 import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Optional, List, Dict, Any, Union, AsyncGenerator
+from typing import Optional, List, Dict, Any, Union, AsyncGenerator, AsyncIterator, Iterator
 import json
+import httpx
+import numpy as np
 
-# Apply nest_asyncio to allow nested event loops (needed for Jupyter notebooks)
-nest_asyncio.apply()
+def enable_nested_loops():
+    """Allow nested event loops, as needed to call the sync API from Jupyter notebooks."""
+    import nest_asyncio
+    nest_asyncio.apply()
+
+# Only notebooks need nested event loops; patching the loop everywhere slows every await
+if "ipykernel" in sys.modules:
+    enable_nested_loops()
 
 # Import LightRAG components
 from lightrag import LightRAG, QueryParam
-from lightrag.llm.ollama import ollama_model_complete, ollama_embed
-from lightrag.utils import EmbeddingFunc, logger
+from lightrag.llm.ollama import ollama_model_complete
+from lightrag.utils import EmbeddingFunc, logger, always_get_an_event_loop
 from lightrag.kg.shared_storage import initialize_pipeline_status
 
 # Import our file processors
 try:
     from multifile_processor import (
         extract_text_from_pdf,
+        extract_text_from_pdf_iter,
         extract_text_from_csv,
         extract_text_from_image,
-        process_file
+        process_file,
+        get_max_workers,
+        init_file_worker,
+        iter_files
     )
 except ImportError as e:
     print(f"Warning: Could not import multifile_processor: {e}")
@@ -49,6 +65,10 @@ except ImportError as e:
         """Dummy function for PDF processing when multifile_processor is not available."""
         return f"PDF processing not available: {file_path}"
 
+    def extract_text_from_pdf_iter(file_path):
+        """Dummy function for streaming PDF processing when multifile_processor is not available."""
+        yield f"PDF processing not available: {file_path}"
+
     def extract_text_from_csv(file_path):
         """Dummy function for CSV processing when multifile_processor is not available."""
         return f"CSV processing not available: {file_path}"
@@ -61,6 +81,192 @@ except ImportError as e:
         """Dummy function for file processing when multifile_processor is not available."""
         return f"File processing not available: {file_path}"
 
+    def get_max_workers():
+        """Dummy worker count when multifile_processor is not available."""
+        return 1
+
+    def init_file_worker():
+        """Dummy worker initializer when multifile_processor is not available."""
+
+    def iter_files(directory_path, skip_dir=None, skip_hidden=False):
+        """Fallback os.scandir walker when multifile_processor is not available."""
+        stack = [directory_path]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        if skip_hidden and entry.name.startswith('.'):
+                            continue
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file():
+                            yield entry
+            except OSError as e:
+                print(f"Error reading directory {current}: {e}")
+
+# Output dimensions of common Ollama embedding models; EMBEDDING_DIM overrides these
+EMBEDDING_DIMS = {
+    "nomic-embed-text": 768,
+    "bge-m3": 1024,
+    "bge-large": 1024,
+    "mxbai-embed-large": 1024,
+    "snowflake-arctic-embed": 1024,
+    "all-minilm": 384,
+}
+DEFAULT_EMBEDDING_DIM = 768
+
+# Query modes supported by LightRAG
+VALID_QUERY_MODES = frozenset({"naive", "local", "global", "hybrid", "mix"})
+
+# Maximum number of files waiting between directory scan pipeline stages
+PIPELINE_QUEUE_SIZE = 32
+
+# Name of the manifest of already-inserted files, stored in the working directory
+MANIFEST_FILE = "processed_files_manifest.json"
+
+def _file_fingerprint(file_path: str, stat: Optional[os.stat_result] = None) -> List[Any]:
+    """
+    Build a content fingerprint for a file.
+
+    The fingerprint combines size, modification time and a BLAKE2 hash of the
+    whole file. The file is memory-mapped, so hashing needs no read loop and
+    runs without holding the GIL.
+
+    Args:
+        file_path: Path to the file
+        stat: Stat result for the file, if already known
+
+    Returns:
+        List[Any]: [size, mtime, hash] (a list so it round-trips through JSON)
+    """
+    stat = stat or os.stat(file_path)
+    digest = hashlib.blake2b(digest_size=16)
+    if stat.st_size:
+        with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            digest.update(mm)
+    return [stat.st_size, int(stat.st_mtime), digest.hexdigest()]
+
+def _check_file(file_path: str, stat: os.stat_result, previous: Optional[List[Any]]) -> tuple:
+    """
+    Compare a file against its manifest entry.
+
+    Files whose size and modification time match the entry are not read at
+    all; otherwise the file is hashed and counts as unchanged only if its
+    size and content hash match.
+
+    Args:
+        file_path: Path to the file
+        stat: Stat result for the file
+        previous: Manifest entry from the last successful insert, if any
+
+    Returns:
+        tuple: (fingerprint, changed)
+    """
+    if previous and previous[:2] == [stat.st_size, int(stat.st_mtime)]:
+        return previous, False
+
+    fingerprint = _file_fingerprint(file_path, stat)
+    changed = not (previous and previous[0] == fingerprint[0] and previous[2] == fingerprint[2])
+    return fingerprint, changed
+
+def _load_manifest(working_dir: str) -> Dict[str, List[Any]]:
+    """
+    Load the processed-files manifest from the working directory.
+
+    Args:
+        working_dir: Directory containing the manifest
+
+    Returns:
+        Dict[str, List[Any]]: Mapping of file path to fingerprint (empty if missing)
+    """
+    try:
+        with open(os.path.join(working_dir, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_manifest(working_dir: str, manifest: Dict[str, List[Any]]) -> None:
+    """
+    Atomically write the processed-files manifest to the working directory.
+
+    Args:
+        working_dir: Directory to store the manifest in
+        manifest: Mapping of file path to fingerprint
+    """
+    manifest_path = os.path.join(working_dir, MANIFEST_FILE)
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, manifest_path)
+
+# Digests of the paragraphs each file had when it was last inserted, stored in the working directory
+PARAGRAPH_INDEX_FILE = "inserted_paragraphs.json"
+_PARAGRAPH_DIGEST_SIZE = 8
+# Shorter paragraphs (headings, labels) are always kept for context
+PARAGRAPH_DEDUP_MIN_CHARS = 200
+
+def _paragraph_digest(paragraph: str) -> str:
+    """Return the 8-byte BLAKE2 digest (as hex) used to recognise an inserted paragraph."""
+    return hashlib.blake2b(paragraph.encode("utf-8"), digest_size=_PARAGRAPH_DIGEST_SIZE).hexdigest()
+
+def _load_paragraph_index(working_dir: str) -> Dict[str, set]:
+    """
+    Load the digests of the paragraphs each file had when it was last inserted.
+
+    Args:
+        working_dir: Directory the index is stored in
+
+    Returns:
+        Dict[str, set]: Mapping of file path to paragraph digests (empty if no index exists yet)
+    """
+    try:
+        with open(os.path.join(working_dir, PARAGRAPH_INDEX_FILE), "r", encoding="utf-8") as f:
+            return {file_path: set(digests) for file_path, digests in json.load(f).items()}
+    except (OSError, ValueError):
+        return {}
+
+def _save_paragraph_index(working_dir: str, index: Dict[str, set]) -> None:
+    """
+    Atomically write the paragraph index to the working directory.
+
+    Args:
+        working_dir: Directory to store the index in
+        index: Mapping of file path to paragraph digests
+    """
+    index_path = os.path.join(working_dir, PARAGRAPH_INDEX_FILE)
+    tmp_path = f"{index_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({file_path: sorted(digests) for file_path, digests in index.items()}, f)
+    os.replace(tmp_path, index_path)
+
+def _drop_known_paragraphs(text: str, known: set) -> tuple:
+    """
+    Remove paragraphs that an earlier version of the same file already inserted.
+
+    Args:
+        text: Extracted document text
+        known: Digests of the paragraphs the file had when it was last inserted
+
+    Returns:
+        tuple: (remaining text or None if nothing new is left, digests of all paragraphs in text)
+    """
+    kept, digests, new = [], set(), False
+    for paragraph in text.split("\n\n"):
+        if len(paragraph) < PARAGRAPH_DEDUP_MIN_CHARS:
+            kept.append(paragraph)
+            continue
+        digest = _paragraph_digest(paragraph)
+        digests.add(digest)
+        if digest in known:
+            continue
+        kept.append(paragraph)
+        new = True
+
+    if digests and not new:
+        return None, digests
+    return "\n\n".join(kept), digests
+
 class MultiFileRAG:
     """
     MultiFileRAG class that integrates LightRAG with PDF, CSV, and image processing.
@@ -76,6 +282,12 @@ class MultiFileRAG:
         llm_model_name (str): Name of the Ollama LLM model to use
         embedding_model_name (str): Name of the Ollama embedding model to use
         ollama_host (str): URL of the Ollama server
+        insert_batch_size (int): Number of files inserted per RAG insert call during directory scans
+        num_workers (int): Number of worker processes used to extract text during directory scans
+        max_parallel_insert (int): Maximum number of RAG insert calls running concurrently
+        llm_model_max_async (int): Maximum number of concurrent LLM requests made by LightRAG
+        embedding_batch_num (int): Number of texts sent to the embedding model per request
+        dedupe_paragraphs (bool): Whether directory scans skip paragraphs an earlier version of the same file inserted
         rag (LightRAG): The underlying LightRAG instance
     """
 
@@ -86,7 +298,13 @@ class MultiFileRAG:
         llm_model_name: str = "llama3",
         embedding_model_name: str = "nomic-embed-text",
         ollama_host: str = "http://localhost:11434",
-        log_level: str = "INFO"
+        log_level: str = "INFO",
+        insert_batch_size: int = 32,
+        num_workers: Optional[int] = None,
+        max_parallel_insert: int = 4,
+        llm_model_max_async: int = 4,
+        embedding_batch_num: int = 32,
+        dedupe_paragraphs: bool = True
     ):
         """
         Initialize the MultiFileRAG instance.
@@ -98,6 +316,19 @@ class MultiFileRAG:
             embedding_model_name (str): Name of the Ollama embedding model to use (e.g., "nomic-embed-text", "bge-m3")
             ollama_host (str): URL of the Ollama server (default: "http://localhost:11434")
             log_level (str): Logging level (e.g., "INFO", "DEBUG", "WARNING")
+            insert_batch_size (int): Number of files inserted per RAG insert call during
+                directory scans (default: 32)
+            num_workers (int): Number of worker processes used to extract text during
+                directory scans (default: MULTIFILERAG_WORKERS or the CPU count)
+            max_parallel_insert (int): Maximum number of RAG insert calls running
+                concurrently during directory scans (default: 4)
+            llm_model_max_async (int): Maximum number of concurrent LLM requests made
+                by LightRAG (default: 4)
+            embedding_batch_num (int): Number of texts sent to the embedding model per
+                request (default: 32)
+            dedupe_paragraphs (bool): Whether directory scans skip paragraphs an earlier
+                version of the same file inserted, so edited files only re-embed what
+                changed (default: True)
 
         Note:
             This method only sets up the instance attributes. You must call `initialize()`
@@ -108,6 +339,13 @@ class MultiFileRAG:
         self.llm_model_name = llm_model_name
         self.embedding_model_name = embedding_model_name
         self.ollama_host = ollama_host
+        self.insert_batch_size = max(1, insert_batch_size)
+        self.num_workers = max(1, num_workers or get_max_workers())
+        self.max_parallel_insert = max(1, max_parallel_insert)
+        self.llm_model_max_async = llm_model_max_async
+        self.embedding_batch_num = embedding_batch_num
+        self.dedupe_paragraphs = dedupe_paragraphs
+        self._paragraph_index = None
 
         # Set up logging
         logging.basicConfig(format="%(levelname)s:%(message)s", level=getattr(logging, log_level))
@@ -119,6 +357,10 @@ class MultiFileRAG:
         # Initialize the RAG instance
         self.rag = None
 
+        # Pooled HTTP client for embedding requests, created on first use
+        self._http = None
+        self._http_loop = None
+
     async def initialize(self):
         """
         Initialize the LightRAG instance.
@@ -134,29 +376,28 @@ class MultiFileRAG:
             Exception: If there's an error initializing the LightRAG instance or its storages
         """
         # Get embedding dimension from environment variable or determine based on model
-        embedding_dim = int(os.getenv("EMBEDDING_DIM", "768"))  # Default to 768 if not specified
-
-        # Override with model-specific dimension if not explicitly set in .env
-        if "EMBEDDING_DIM" not in os.environ and self.embedding_model_name == "bge-m3":
-            embedding_dim = 1024
+        embedding_dim = int(
+            os.getenv("EMBEDDING_DIM")
+            or EMBEDDING_DIMS.get(self.embedding_model_name, DEFAULT_EMBEDDING_DIM)
+        )
+        logger.info("Using embedding dimension %s for %s", embedding_dim, self.embedding_model_name)
 
         # Create the LightRAG instance
         self.rag = LightRAG(
             working_dir=self.working_dir,
             llm_model_func=ollama_model_complete,
             llm_model_name=self.llm_model_name,
-            llm_model_max_async=4,
+            llm_model_max_async=self.llm_model_max_async,
             llm_model_max_token_size=32768,
             llm_model_kwargs={
                 "host": self.ollama_host,
                 "options": {"num_ctx": 32768},
             },
+            embedding_batch_num=self.embedding_batch_num,
             embedding_func=EmbeddingFunc(
                 embedding_dim=embedding_dim,
                 max_token_size=8192,
-                func=lambda texts: ollama_embed(
-                    texts, embed_model=self.embedding_model_name, host=self.ollama_host
-                ),
+                func=self._ollama_embed,
             ),
         )
 
@@ -167,9 +408,60 @@ class MultiFileRAG:
         logger.info("MultiFileRAG initialized successfully")
         return self
 
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """Return the pooled HTTP client, creating it for the running event loop."""
+        loop = asyncio.get_running_loop()
+        # httpx connections belong to the loop that opened them
+        if self._http is None or self._http_loop is not loop:
+            # Only connecting is bounded: a batch can wait minutes for Ollama to
+            # load the model or for earlier batches on a busy CPU
+            self._http = httpx.AsyncClient(
+                limits=httpx.Limits(max_keepalive_connections=32),
+                timeout=httpx.Timeout(None, connect=5.0),
+            )
+            self._http_loop = loop
+        return self._http
+
+    async def _ollama_embed(self, texts: List[str]) -> np.ndarray:
+        """Embed texts with Ollama's /api/embed over the pooled HTTP client.
+
+        Reusing one keep-alive client avoids a new connection per embedding batch.
+        """
+        client = self._get_http_client()
+        response = await client.post(
+            f"{self.ollama_host.rstrip('/')}/api/embed",
+            json={"model": self.embedding_model_name, "input": texts},
+        )
+        response.raise_for_status()
+        return np.array(response.json()["embeddings"])
+
+    async def aclose(self):
+        """Close the pooled HTTP client used for embedding requests."""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+            self._http_loop = None
+
     def process_and_insert_file(self, file_path: str) -> bool:
         """Process a file and insert its content into the RAG system.
 
+        Synchronous wrapper around aprocess_and_insert_file.
+
+        Args:
+            file_path: Path to the file to process
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        loop = always_get_an_event_loop()
+        return loop.run_until_complete(self.aprocess_and_insert_file(file_path))
+
+    async def aprocess_and_insert_file(self, file_path: str) -> bool:
+        """Process a file and insert its content into the RAG system.
+
+        Extraction runs in the default executor so it does not block the
+        event loop while other inserts are awaiting the embedding server.
+
         Args:
             file_path: Path to the file to process
 
@@ -180,59 +472,339 @@ class MultiFileRAG:
             logger.error("RAG system not initialized. Call initialize() first.")
             return False
 
+        if os.path.splitext(file_path)[1].lower() == '.pdf':
+            return await self._insert_stream(file_path, extract_text_from_pdf_iter(file_path))
+
         try:
             # Process the file
-            logger.info(f"Processing file: {file_path}")
-            text_content = process_file(file_path)
+            logger.info("Processing file: %s", file_path)
+            loop = asyncio.get_running_loop()
+            text_content = await loop.run_in_executor(None, process_file, file_path)
+        except Exception as e:
+            logger.error("Error processing file %s: %s", file_path, e)
+            return False
+
+        return await self._insert_content(file_path, text_content)
+
+    async def _insert_content(self, file_path: str, text_content: Optional[str]) -> bool:
+        """Insert extracted file content into the RAG system.
+
+        Args:
+            file_path: Path of the file the content was extracted from
+            text_content: Extracted text, or None if extraction failed
 
-            if not text_content:
-                logger.error(f"Failed to extract content from {file_path}")
-                return False
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if not text_content:
+            logger.error("Failed to extract content from %s", file_path)
+            return False
 
+        try:
             # Insert the content into the RAG system
-            logger.info(f"Inserting content from {file_path} into RAG system")
-            self.rag.insert(text_content)
+            logger.info("Inserting content from %s into RAG system", file_path)
+            await self.rag.ainsert(text_content)
 
-            logger.info(f"Successfully processed and inserted {file_path}")
+            logger.info("Successfully processed and inserted %s", file_path)
             return True
 
         except Exception as e:
-            logger.error(f"Error processing file {file_path}: {e}")
+            logger.error("Error processing file %s: %s", file_path, e)
             return False
 
     def scan_and_process_directory(self, directory: Optional[str] = None) -> Dict[str, Any]:
         """Scan a directory and process all files.
 
+        Synchronous wrapper around ascan_and_process_directory.
+
         Args:
             directory: Directory to scan (defaults to input_dir)
 
         Returns:
             Dict with results of processing
         """
-        directory = directory or self.input_dir
-        results = {"success": [], "failure": []}
+        loop = always_get_an_event_loop()
+        return loop.run_until_complete(self.ascan_and_process_directory(directory))
+
+    async def ascan_and_process_directory(self, directory: Optional[str] = None) -> Dict[str, Any]:
+        """Scan a directory and process all files.
 
-        logger.info(f"Scanning directory: {directory}")
+        Files whose content matches the manifest in the working directory
+        were already inserted by a previous run and are skipped. The rest
+        flow through a pipeline connected by bounded queues:
 
-        for root, _, files in os.walk(directory):
-            for file in files:
-                file_path = os.path.join(root, file)
+        1. the directory is walked in a worker thread,
+        2. num_workers extraction workers run process_file in spawned processes,
+        3. max_parallel_insert insert workers take up to insert_batch_size
+           extracted files at a time and insert them into the RAG system.
 
-                # Skip hidden files and directories
-                if file.startswith('.') or any(part.startswith('.') for part in Path(file_path).parts):
-                    continue
+        Full queues make the earlier stages wait, so memory stays bounded
+        while all stages run concurrently.
+
+        Args:
+            directory: Directory to scan (defaults to input_dir)
 
-                # Process the file
-                success = self.process_and_insert_file(file_path)
+        Returns:
+            Dict with results of processing
+        """
+        directory = directory or self.input_dir
+        results = {"success": [], "failure": []}
+
+        if not self.rag:
+            logger.error("RAG system not initialized. Call initialize() first.")
+            return results
+
+        logger.info("Scanning directory: %s", directory)
+        manifest = _load_manifest(self.working_dir)
+        touched = False
+        seen = set()
+        loop = asyncio.get_running_loop()
+        extract_queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        insert_queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        stage_times = {"extract": 0.0, "insert": 0.0}
+
+        async def produce():
+            nonlocal touched
+            async for file_path, fingerprint, changed in self._walk_async(directory, dict(manifest)):
+                seen.add(file_path)
+                if isinstance(fingerprint, OSError):
+                    logger.error("Error reading file %s: %s", file_path, fingerprint)
+                    results["failure"].append(file_path)
+                    continue
 
-                if success:
+                # Skip files that are unchanged since they were last inserted
+                if not changed:
+                    logger.info("Skipping unchanged file: %s", file_path)
                     results["success"].append(file_path)
-                else:
+                    if manifest[file_path] != fingerprint:
+                        # Same content with a new mtime; record it so the next scan needs no hash
+                        manifest[file_path] = fingerprint
+                        touched = True
+                    continue
+
+                await extract_queue.put((file_path, fingerprint))
+
+        async def extract_worker(executor):
+            while True:
+                item = await extract_queue.get()
+                if item is None:
+                    return
+                file_path, fingerprint = item
+
+                start = time.perf_counter()
+                try:
+                    text_content = await loop.run_in_executor(executor, process_file, file_path)
+                except Exception as e:
+                    logger.error("Error processing file %s: %s", file_path, e)
+                    text_content = None
+                stage_times["extract"] += time.perf_counter() - start
+
+                if not text_content:
+                    logger.error("Failed to extract content from %s", file_path)
                     results["failure"].append(file_path)
+                    continue
 
-        logger.info(f"Processed {len(results['success'])} files successfully, {len(results['failure'])} failures")
+                await insert_queue.put((file_path, fingerprint, text_content))
+
+        async def insert_worker():
+            while True:
+                item = await insert_queue.get()
+                if item is None:
+                    return
+
+                # Take whatever else is already extracted, up to a full batch
+                batch = [item]
+                finished = False
+                while len(batch) < self.insert_batch_size:
+                    try:
+                        item = insert_queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        break
+                    if item is None:
+                        finished = True
+                        break
+                    batch.append(item)
+
+                start = time.perf_counter()
+                await self._insert_batch(batch, manifest, results)
+                stage_times["insert"] += time.perf_counter() - start
+                if finished:
+                    return
+
+        inserters = [asyncio.create_task(insert_worker()) for _ in range(self.max_parallel_insert)]
+        extractors = []
+        try:
+            # Spawned workers start clean instead of forking this process's event loop and RAG state
+            mp_context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(
+                max_workers=self.num_workers, mp_context=mp_context, initializer=init_file_worker
+            ) as executor:
+                extractors = [
+                    asyncio.create_task(extract_worker(executor)) for _ in range(self.num_workers)
+                ]
+                await produce()
+                for _ in extractors:
+                    await extract_queue.put(None)
+                await asyncio.gather(*extractors)
+
+            for _ in inserters:
+                await insert_queue.put(None)
+            await asyncio.gather(*inserters)
+        finally:
+            for task in extractors + inserters:
+                task.cancel()
+
+        if touched:
+            _save_manifest(self.working_dir, manifest)
+
+        if self.dedupe_paragraphs:
+            self._prune_paragraph_index(directory, seen)
+
+        logger.info("Processed %s files successfully, %s failures", len(results['success']), len(results['failure']))
+        logger.info(
+            "Pipeline busy time: extract %.1fs, insert %.1fs",
+            stage_times["extract"], stage_times["insert"]
+        )
         return results
 
+    def _prune_paragraph_index(self, directory: str, seen: set) -> None:
+        """Forget the paragraphs of files under directory that the last scan no longer found."""
+        if self._paragraph_index is None:
+            self._paragraph_index = _load_paragraph_index(self.working_dir)
+        prefix = os.path.join(directory, "")
+        removed = [
+            file_path for file_path in self._paragraph_index
+            if file_path.startswith(prefix) and file_path not in seen
+        ]
+        if removed:
+            for file_path in removed:
+                del self._paragraph_index[file_path]
+            _save_paragraph_index(self.working_dir, self._paragraph_index)
+
+    async def _walk_async(self, directory: str, previous: Dict[str, List[Any]]) -> AsyncIterator[tuple]:
+        """Walk a directory in a worker thread and yield files as they are found.
+
+        Hidden files and directories are skipped. Listing, stat and hashing
+        run off the event loop, so slow or network filesystems do not stall
+        inserts that are already in flight.
+
+        Args:
+            directory: Directory to walk
+            previous: Snapshot of the manifest to compare files against
+
+        Yields:
+            (file_path, fingerprint, changed) tuples; fingerprint is the
+            OSError raised if the file could not be read
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        done = object()
+
+        def walk():
+            try:
+                for entry in iter_files(directory, skip_hidden=True):
+                    try:
+                        fingerprint, changed = _check_file(entry.path, entry.stat(), previous.get(entry.path))
+                    except OSError as e:
+                        fingerprint, changed = e, True
+                    loop.call_soon_threadsafe(queue.put_nowait, (entry.path, fingerprint, changed))
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+
+        walker = loop.run_in_executor(None, walk)
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            yield item
+
+        # Re-raise any error from the walk itself
+        await walker
+
+    async def _insert_stream(self, file_path: str, chunks: Iterator[str]) -> bool:
+        """Insert file content into the RAG system chunk by chunk.
+
+        Each chunk is inserted as soon as it is produced, so only one chunk
+        of a large document is held in memory at a time. The chunk iterator
+        is advanced in the default executor to keep the event loop free.
+
+        Args:
+            file_path: Path of the file the chunks are extracted from
+            chunks: Iterator of extracted text chunks
+
+        Returns:
+            bool: True if at least one chunk was inserted without errors, False otherwise
+        """
+        loop = asyncio.get_running_loop()
+        inserted = 0
+        try:
+            logger.info("Streaming content from %s into RAG system", file_path)
+            while True:
+                chunk = await loop.run_in_executor(None, next, chunks, None)
+                if chunk is None:
+                    break
+                await self.rag.ainsert(chunk)
+                inserted += 1
+        except Exception as e:
+            logger.error("Error processing file %s after %s chunks: %s", file_path, inserted, e)
+            return False
+
+        if not inserted:
+            logger.error("Failed to extract content from %s", file_path)
+            return False
+
+        logger.info("Successfully processed and inserted %s (%s chunks)", file_path, inserted)
+        return True
+
+    async def _insert_batch(
+        self,
+        batch: List[tuple],
+        manifest: Dict[str, List[Any]],
+        results: Dict[str, Any]
+    ) -> None:
+        """Insert the content of several files with a single RAG insert call.
+
+        With dedupe_paragraphs, paragraphs that an earlier version of the same
+        file already inserted are removed first, and files with nothing new
+        left are not sent.
+        Successful files are recorded in results and the manifest; if the
+        batch insert fails, every file in it is recorded as a failure.
+
+        Args:
+            batch: List of (file_path, fingerprint, text_content) tuples
+            manifest: Processed-files manifest to update
+            results: Scan results to update
+        """
+        texts = [text_content for _, _, text_content in batch]
+        if self.dedupe_paragraphs:
+            if self._paragraph_index is None:
+                self._paragraph_index = _load_paragraph_index(self.working_dir)
+            deduped = [
+                _drop_known_paragraphs(text_content, self._paragraph_index.get(file_path, ()))
+                for file_path, _, text_content in batch
+            ]
+            texts = [text for text, _ in deduped if text is not None]
+
+        try:
+            if texts:
+                logger.info("Inserting content from %s files into RAG system", len(texts))
+                await self.rag.ainsert(texts)
+        except Exception as e:
+            logger.error("Error inserting batch of %s files: %s", len(batch), e)
+            results["failure"].extend(file_path for file_path, _, _ in batch)
+            return
+
+        if self.dedupe_paragraphs:
+            for (file_path, _, _), (_, digests) in zip(batch, deduped):
+                self._paragraph_index[file_path] = digests
+            _save_paragraph_index(self.working_dir, self._paragraph_index)
+
+        for file_path, fingerprint, _ in batch:
+            logger.info("Successfully processed and inserted %s", file_path)
+            results["success"].append(file_path)
+            manifest[file_path] = fingerprint
+        _save_manifest(self.working_dir, manifest)
+
     def query(
         self,
         query_text: str,
@@ -269,19 +841,42 @@ class MultiFileRAG:
             logger.error("RAG system not initialized. Call initialize() first.")
             return "Error: RAG system not initialized"
 
-        # Validate mode
-        valid_modes = ["naive", "local", "global", "hybrid", "mix"]
-        if mode not in valid_modes:
-            logger.warning(f"Invalid mode: {mode}. Using 'hybrid' instead.")
-            mode = "hybrid"
-
         # Execute the query
-        logger.info(f"Executing query in {mode} mode: {query_text}")
         return self.rag.query(
             query_text,
-            param=QueryParam(mode=mode, stream=stream)
+            param=self._query_param(query_text, mode, stream)
+        )
+
+    async def aquery(
+        self,
+        query_text: str,
+        mode: str = "hybrid",
+        stream: bool = False
+    ) -> Union[str, AsyncGenerator]:
+        """
+        Query the RAG system from a running event loop.
+
+        Async counterpart of query; see query for the arguments and return value.
+        """
+        if not self.rag:
+            logger.error("RAG system not initialized. Call initialize() first.")
+            return "Error: RAG system not initialized"
+
+        # Execute the query
+        return await self.rag.aquery(
+            query_text,
+            param=self._query_param(query_text, mode, stream)
         )
 
+    def _query_param(self, query_text: str, mode: str, stream: bool) -> QueryParam:
+        """Validate the query mode and build the LightRAG query parameters."""
+        if mode not in VALID_QUERY_MODES:
+            logger.warning("Invalid mode: %s. Using 'hybrid' instead.", mode)
+            mode = "hybrid"
+
+        logger.info("Executing query in %s mode: %s", mode, query_text)
+        return QueryParam(mode=mode, stream=stream)
+
 async def print_stream(stream):
     """
     Print a streaming response from an async generator.
@@ -295,7 +890,7 @@ async def print_stream(stream):
 
     Example:
         ```python
-        stream = mfrag.query("Tell me about...", stream=True)
+        stream = await mfrag.aquery("Tell me about...", stream=True)
         await print_stream(stream)
         ```
     """
@@ -308,7 +903,13 @@ async def create_multifilerag(
     llm_model_name: str = "llama3",
     embedding_model_name: str = "nomic-embed-text",
     ollama_host: str = "http://localhost:11434",
-    log_level: str = "INFO"
+    log_level: str = "INFO",
+    insert_batch_size: int = 32,
+    num_workers: Optional[int] = None,
+    max_parallel_insert: int = 4,
+    llm_model_max_async: int = 4,
+    embedding_batch_num: int = 32,
+    dedupe_paragraphs: bool = True
 ) -> MultiFileRAG:
     """
     Create and initialize a MultiFileRAG instance in a single function call.
@@ -324,6 +925,12 @@ async def create_multifilerag(
         embedding_model_name: Name of the Ollama embedding model
         ollama_host: URL of the Ollama server
         log_level: Logging level
+        insert_batch_size: Number of files inserted per RAG insert call during directory scans
+        num_workers: Number of worker processes used to extract text during directory scans
+        max_parallel_insert: Maximum number of RAG insert calls running concurrently
+        llm_model_max_async: Maximum number of concurrent LLM requests made by LightRAG
+        embedding_batch_num: Number of texts sent to the embedding model per request
+        dedupe_paragraphs: Whether directory scans skip paragraphs an earlier version of the same file inserted
 
     Returns:
         MultiFileRAG: An initialized MultiFileRAG instance ready to use
@@ -334,7 +941,10 @@ async def create_multifilerag(
             llm_model_name="deepseek-r1:32b",
             embedding_model_name="bge-m3"
         )
-        response = mfrag.query("What's in my documents?")
+        try:
+            response = await mfrag.aquery("What's in my documents?")
+        finally:
+            await mfrag.aclose()
         ```
     """
     mfrag = MultiFileRAG(
@@ -343,7 +953,13 @@ async def create_multifilerag(
         llm_model_name=llm_model_name,
         embedding_model_name=embedding_model_name,
         ollama_host=ollama_host,
-        log_level=log_level
+        log_level=log_level,
+        insert_batch_size=insert_batch_size,
+        num_workers=num_workers,
+        max_parallel_insert=max_parallel_insert,
+        llm_model_max_async=llm_model_max_async,
+        embedding_batch_num=embedding_batch_num,
+        dedupe_paragraphs=dedupe_paragraphs
     )
     await mfrag.initialize()
     return mfrag
@@ -376,38 +992,46 @@ def main():
     print(f"Using LLM model: {llm_model_name}")
     print(f"Using embedding model: {embedding_model_name}")
 
+    # Everything runs on one event loop, so the pooled HTTP client can be closed on it
+    asyncio.run(_run_demo(working_dir, input_dir, llm_model_name, embedding_model_name, ollama_host))
+
+async def _run_demo(working_dir, input_dir, llm_model_name, embedding_model_name, ollama_host):
+    """Process the input directory and run the demo queries for main()."""
     # Create and initialize MultiFileRAG
-    mfrag = asyncio.run(create_multifilerag(
+    mfrag = await create_multifilerag(
         working_dir=working_dir,
         input_dir=input_dir,
         llm_model_name=llm_model_name,
         embedding_model_name=embedding_model_name,
         ollama_host=ollama_host
-    ))
-
-    # Scan and process the input directory
-    results = mfrag.scan_and_process_directory()
-
-    # Print results
-    print(f"\nProcessed {len(results['success'])} files successfully")
-    print(f"Failed to process {len(results['failure'])} files")
-
-    if results['success']:
-        # Test query in different modes
-        print("\nTesting queries in different modes:")
-
-        for mode in ["naive", "local", "global", "hybrid", "mix"]:
-            print(f"\n{mode.capitalize()} mode query:")
-            response = mfrag.query("What are the main topics in these documents?", mode=mode)
-            print(response)
-
-        # Test streaming
-        print("\nStreaming response:")
-        stream = mfrag.query("Summarize the key points from all documents.", mode="mix", stream=True)
-        if asyncio.iscoroutine(stream) or hasattr(stream, '__aiter__'):
-            asyncio.run(print_stream(stream))
-        else:
-            print(stream)
+    )
+
+    try:
+        # Scan and process the input directory
+        results = await mfrag.ascan_and_process_directory()
+
+        # Print results
+        print(f"\nProcessed {len(results['success'])} files successfully")
+        print(f"Failed to process {len(results['failure'])} files")
+
+        if results['success']:
+            # Test query in different modes
+            print("\nTesting queries in different modes:")
+
+            for mode in ["naive", "local", "global", "hybrid", "mix"]:
+                print(f"\n{mode.capitalize()} mode query:")
+                response = await mfrag.aquery("What are the main topics in these documents?", mode=mode)
+                print(response)
+
+            # Test streaming
+            print("\nStreaming response:")
+            stream = await mfrag.aquery("Summarize the key points from all documents.", mode="mix", stream=True)
+            if hasattr(stream, '__aiter__'):
+                await print_stream(stream)
+            else:
+                print(stream)
+    finally:
+        await mfrag.aclose()
 
 if __name__ == "__main__":
     main()
@@ -9,28 +9,52 @@ It starts a web server that provides a REST API for interacting with the system.
 
 import os
 import sys
+import json
+import asyncio
 import argparse
 import logging
+import signal
+import threading
+import functools
+import time
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv(dotenv_path=".env", override=False)
+# Load environment variables from .env file (once per process, even across modules)
+if not os.environ.get("_MFR_DOTENV_LOADED"):
+    load_dotenv(dotenv_path=".env", override=False)
+    os.environ["_MFR_DOTENV_LOADED"] = "1"
 
-# Configure logging
-logging.basicConfig(level=logging.INFO,
-                   format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-logger = logging.getLogger(__name__)
+# Server settings read once from the environment (after .env is loaded)
+ENV_DEFAULTS = {
+    "HOST": "0.0.0.0",
+    "PORT": "9621",
+    "WORKING_DIR": "./rag_storage",
+    "INPUT_DIR": "./inputs",
+    "LOG_LEVEL": "INFO",
+}
+_ENV = {key: os.environ.get(key, default) for key, default in ENV_DEFAULTS.items()}
 
+logger = logging.getLogger("multifilerag.server")
+
+# Seconds between Ollama checks while the server waits for it at startup
+OLLAMA_RETRY_DELAY = 5.0
+
+# Seconds the server waits for Ollama at startup before giving up
+OLLAMA_STARTUP_TIMEOUT = 300.0
+
+@functools.lru_cache(maxsize=1)
 def check_ollama_running():
-    """Check if Ollama server is running."""
+    """Check if Ollama server is running (cached for the process lifetime)."""
     from multifilerag_utils import check_ollama_status
 
     ollama_running, ollama_version = check_ollama_status()
     if ollama_running:
-        print(f"✅ Ollama server is running. Version: {ollama_version}")
+        logger.info("✅ Ollama server is running. Version: %s", ollama_version)
         return True
 
-    print(f"❌ Ollama server is not running: {ollama_version}")
+    logger.error("❌ Ollama server is not running: %s", ollama_version)
     return False
 
 def check_lightrag_installed():
@@ -38,10 +62,10 @@ def check_lightrag_installed():
     try:
         # Try to import lightrag
         import lightrag
-        print(f"✅ LightRAG is installed. Version: {lightrag.__version__}")
+        logger.info("✅ LightRAG is installed. Version: %s", lightrag.__version__)
         return True
     except ImportError:
-        print("❌ LightRAG is not installed.")
+        logger.error("❌ LightRAG is not installed.")
         return False
 
 def ensure_directories():
@@ -69,7 +93,7 @@ def check_and_start_databases(auto_start=True):
         # Log which services are not running
         for service, running in status.items():
             if not running:
-                logger.info(f"Database service {service} is not running.")
+                logger.info("Database service %s is not running.", service)
 
         # Start databases if auto_start is enabled
         if auto_start:
@@ -88,9 +112,262 @@ def check_and_start_databases(auto_start=True):
         logger.warning("Database manager not found. Skipping database check.")
         return True
     except Exception as e:
-        logger.error(f"Error checking/starting databases: {e}")
+        logger.error("Error checking/starting databases: %s", e)
         return False
 
+def wait_for_ollama(timeout=OLLAMA_STARTUP_TIMEOUT, stop=None):
+    """Block until the Ollama server responds; raises RuntimeError after timeout seconds.
+
+    Returns early, without error, once the optional threading.Event stop is set.
+    """
+    from multifilerag_utils import is_ollama_up
+
+    if stop is None:
+        stop = threading.Event()
+
+    if check_ollama_running():
+        return
+
+    # Retry with the lighter liveness probe, then report the version once
+    logger.warning("Please start Ollama; retrying every %.0f seconds for up to %.0f seconds.",
+                   OLLAMA_RETRY_DELAY, timeout)
+    deadline = time.monotonic() + timeout
+    while not is_ollama_up():
+        if time.monotonic() >= deadline:
+            raise RuntimeError(f"Ollama did not respond within {timeout:.0f} seconds")
+        if stop.wait(OLLAMA_RETRY_DELAY):
+            return
+    check_ollama_running.cache_clear()
+    check_ollama_running()
+
+def start_databases(auto_start=True):
+    """Check the database services and start them if auto_start is enabled."""
+    if auto_start:
+        logger.info("Checking database services...")
+        if not check_and_start_databases(auto_start=True):
+            logger.warning("Some database services could not be started. Continuing anyway...")
+    else:
+        logger.info("Database auto-start is disabled. Skipping database check.")
+
+def run_startup_checks(args, stop=None):
+    """Wait for Ollama and start the databases.
+
+    Runs in a background thread once the server is listening, so the port is
+    bound immediately and /readyz reports 503 until this returns. LightRAG's
+    own startup (which opens the storages) only runs afterwards, so the
+    databases are up by then. The two checks are independent and run
+    concurrently. Setting the threading.Event stop ends the wait for Ollama,
+    so a shutdown during startup is not held up by it.
+    """
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [
+            executor.submit(wait_for_ollama, stop=stop),
+            executor.submit(start_databases, not args.no_db_autostart),
+        ]
+        # Re-raise the first failure
+        for future in futures:
+            future.result()
+
+def _json_headers(body):
+    return [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+
+class FastPathInterceptor:
+    """ASGI wrapper that answers health probes and pipeline status polls without the full FastAPI stack.
+
+    /healthz (liveness) and /readyz (readiness) are answered directly. When a
+    startup function is given, the server's lifespan startup is acknowledged at
+    once (so the port is bound) and the function runs in a thread, called with
+    a threading.Event that is set when the server shuts down; the app's
+    own lifespan starts only after it succeeds, and until then /readyz and all
+    other requests get a 503. If startup fails, the server is shut down and
+    startup_failed is set. GET
+    /documents/pipeline_status is forwarded to the app at most once per TTL for
+    each set of credentials, and the encoded response is replayed to every
+    other poll in between. GET /documents/events streams document status
+    changes as Server-Sent Events, so clients can wait without polling.
+    """
+
+    LIVE_PATH = "/healthz"
+    READY_PATH = "/readyz"
+    STATUS_PATH = "/documents/pipeline_status"
+    EVENTS_PATH = "/documents/events"
+    EVENT_HEADERS = [(b"content-type", b"text/event-stream"), (b"cache-control", b"no-cache")]
+    KEEPALIVE = b": keepalive\n\n"
+    OK_BODY = b'{"status":"ok"}'
+    STARTING_BODY = b'{"status":"starting"}'
+    OK_HEADERS = _json_headers(OK_BODY)
+    STARTING_HEADERS = _json_headers(STARTING_BODY)
+    # Cached responses are only replayed to requests carrying the same credentials
+    AUTH_HEADERS = frozenset((b"authorization", b"x-api-key", b"cookie"))
+
+    def __init__(self, app, status_ttl=0.5, startup=None, events_interval=2.0):
+        self.app = app
+        self.status_ttl = status_ttl
+        self.startup = startup
+        self.ready = startup is None
+        self.startup_failed = False
+        self.stop_event = threading.Event()
+        self.events_interval = events_interval
+        # (path, credentials, query string) -> (expires_at, status, headers, body)
+        self._response_cache = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan" and self.startup is not None:
+            await self._lifespan(scope, receive, send)
+            return
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        if path == self.LIVE_PATH:
+            await self._send(send, 200, self.OK_HEADERS, self.OK_BODY)
+        elif not self.ready:
+            await self._send(send, 503, self.STARTING_HEADERS, self.STARTING_BODY)
+        elif path == self.READY_PATH:
+            await self._send(send, 200, self.OK_HEADERS, self.OK_BODY)
+        elif path == self.STATUS_PATH and scope["method"] == "GET":
+            await self._send(send, *await self._cached_response(scope, receive, self.status_ttl))
+        elif path == self.EVENTS_PATH and scope["method"] == "GET":
+            await self._document_events(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
+
+    async def _lifespan(self, scope, receive, send):
+        """Complete the server's lifespan startup at once and start the app's lifespan once the startup function is done."""
+        app_messages, app_replies = asyncio.Queue(), asyncio.Queue()
+
+        async def app_lifespan():
+            try:
+                await self.app(scope, app_messages.get, app_replies.put)
+            except Exception as e:
+                await app_replies.put({"type": "lifespan.startup.failed", "message": str(e)})
+
+        await receive()  # lifespan.startup
+        app_task = asyncio.create_task(app_lifespan())
+        startup_task = asyncio.create_task(self._run_startup(app_messages, app_replies))
+        await send({"type": "lifespan.startup.complete"})
+
+        await receive()  # lifespan.shutdown
+        # The startup thread cannot be cancelled; ask it to stop so exiting doesn't wait for it
+        self.stop_event.set()
+        startup_task.cancel()
+        try:
+            await startup_task
+        except asyncio.CancelledError:
+            pass
+        if self.ready:
+            await app_messages.put({"type": "lifespan.shutdown"})
+            await app_replies.get()
+        app_task.cancel()
+        await send({"type": "lifespan.shutdown.complete"})
+
+    async def _run_startup(self, app_messages, app_replies):
+        """Run the startup function in a thread, then the app's lifespan startup, and mark the server ready."""
+        try:
+            await asyncio.to_thread(self.startup, self.stop_event)
+            await app_messages.put({"type": "lifespan.startup"})
+            reply = await app_replies.get()
+            if reply["type"] != "lifespan.startup.complete":
+                raise RuntimeError(reply.get("message") or "application startup failed")
+        except Exception:
+            logger.exception("Startup failed; shutting down.")
+            self.startup_failed = True
+            # Ask the server for a graceful shutdown, as Ctrl+C would
+            signal.raise_signal(signal.SIGTERM)
+            return
+        self.ready = True
+        logger.info("Server is ready.")
+
+    async def _cached_response(self, scope, receive, ttl):
+        """Return the cached response for a GET request, refreshing it from the app when expired."""
+        key = (
+            scope["path"],
+            tuple(value for name, value in scope["headers"] if name in self.AUTH_HEADERS),
+            scope.get("query_string", b""),
+        )
+        now = time.monotonic()
+        cached = self._response_cache.get(key)
+        if cached is not None and cached[0] > now:
+            return cached[1:]
+
+        response = await self._capture(scope, receive)
+        if response[0] == 200:
+            self._response_cache[key] = (now + ttl,) + response
+        else:
+            self._response_cache.pop(key, None)
+        return response
+
+    async def _document_events(self, scope, receive, send):
+        """Stream document status changes as Server-Sent Events until the client disconnects.
+
+        The document list is read from the app once per interval (shared by all
+        subscribers with the same credentials). Each change is sent as one event
+        holding the id, file path, status and update time of every document;
+        otherwise a keepalive comment is sent.
+        """
+        docs_scope = dict(scope, path="/documents", raw_path=b"/documents", query_string=b"")
+
+        async def empty_receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        disconnected = asyncio.Event()
+
+        async def watch_disconnect():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            disconnected.set()
+
+        watcher = asyncio.create_task(watch_disconnect())
+        last_body = None
+        try:
+            status, headers, body = await self._cached_response(docs_scope, empty_receive, self.events_interval)
+            if status != 200:
+                await self._send(send, status, headers, body)
+                return
+
+            await send({"type": "http.response.start", "status": 200, "headers": self.EVENT_HEADERS})
+            while not disconnected.is_set():
+                if status == 200 and body != last_body:
+                    last_body = body
+                    docs = [
+                        {key: doc.get(key) for key in ("id", "file_path", "status", "updated_at")}
+                        for docs in json.loads(body).get("statuses", {}).values()
+                        for doc in docs
+                    ]
+                    message = b"data: " + json.dumps(docs, separators=(",", ":")).encode() + b"\n\n"
+                else:
+                    message = self.KEEPALIVE
+                await send({"type": "http.response.body", "body": message, "more_body": True})
+
+                try:
+                    await asyncio.wait_for(disconnected.wait(), self.events_interval)
+                except asyncio.TimeoutError:
+                    pass
+                status, headers, body = await self._cached_response(docs_scope, empty_receive, self.events_interval)
+        finally:
+            watcher.cancel()
+
+    async def _capture(self, scope, receive):
+        """Run the request through the app and collect its response."""
+        status, headers, chunks = 500, [], []
+
+        async def capture_send(message):
+            nonlocal status, headers
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = message.get("headers", [])
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, capture_send)
+        return status, headers, b"".join(chunks)
+
+    @staticmethod
+    async def _send(send, status, headers, body):
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
 def start_server(args):
     """Start the LightRAG server."""
     try:
@@ -99,12 +376,18 @@ def start_server(args):
         from lightrag.api.config import parse_args
         import uvicorn
 
-        # Set environment variables
-        os.environ["HOST"] = args.host
-        os.environ["PORT"] = str(args.port)
-        os.environ["WORKING_DIR"] = args.working_dir
-        os.environ["INPUT_DIR"] = args.input_dir
-        os.environ["LOG_LEVEL"] = args.log_level
+        # LightRAG's parse_args reads its defaults from the environment, so
+        # export only the settings that command-line flags changed
+        settings = {
+            "HOST": args.host,
+            "PORT": str(args.port),
+            "WORKING_DIR": args.working_dir,
+            "INPUT_DIR": args.input_dir,
+            "LOG_LEVEL": args.log_level,
+        }
+        for key, value in settings.items():
+            if _ENV[key] != value:
+                os.environ[key] = value
 
         # Parse arguments for LightRAG
         lightrag_args = parse_args()
@@ -114,7 +397,14 @@ def start_server(args):
             lightrag_args.auto_scan_at_startup = True
 
         # Create the app
-        app = create_app(lightrag_args)
+        app = FastPathInterceptor(
+            create_app(lightrag_args),
+            startup=functools.partial(run_startup_checks, args)
+        )
+
+        # Prefer uvloop and httptools (installed by uvicorn[standard])
+        loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+        http = "httptools" if importlib.util.find_spec("httptools") else "h11"
 
         # Run the app
         print(f"Starting MultiFileRAG server on {args.host}:{args.port}...")
@@ -122,10 +412,13 @@ def start_server(args):
             app,
             host=args.host,
             port=args.port,
-            log_level=args.log_level.lower()
+            log_level=args.log_level.lower(),
+            loop=loop,
+            http=http,
+            access_log=args.access_log
         )
 
-        return True
+        return not app.startup_failed
     except ImportError as e:
         print(f"❌ Error importing LightRAG modules: {e}")
         print("Please make sure LightRAG is installed with API support.")
@@ -137,27 +430,25 @@ def start_server(args):
 def main():
     """Main entry point for the MultiFileRAG server.
 
-    This function parses command-line arguments, checks if Ollama and LightRAG
-    are properly installed, ensures required directories exist, and starts the server.
+    This function parses command-line arguments, checks that LightRAG is
+    installed, ensures required directories exist, and starts the server.
+    Ollama and database checks run in the background after the port is bound.
     """
     parser = argparse.ArgumentParser(description="Start the MultiFileRAG server")
-    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"), help="Server host")
-    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "9621")), help="Server port")
-    parser.add_argument("--working-dir", default=os.getenv("WORKING_DIR", "./rag_storage"), help="Working directory for RAG storage")
-    parser.add_argument("--input-dir", default=os.getenv("INPUT_DIR", "./inputs"), help="Directory containing input documents")
-    parser.add_argument("--log-level", default=os.getenv("LOG_LEVEL", "INFO"), help="Logging level")
+    parser.add_argument("--host", default=_ENV["HOST"], help="Server host")
+    parser.add_argument("--port", type=int, default=int(_ENV["PORT"]), help="Server port")
+    parser.add_argument("--working-dir", default=_ENV["WORKING_DIR"], help="Working directory for RAG storage")
+    parser.add_argument("--input-dir", default=_ENV["INPUT_DIR"], help="Directory containing input documents")
+    parser.add_argument("--log-level", default=_ENV["LOG_LEVEL"], help="Logging level")
     parser.add_argument("--auto-scan", action="store_true", help="Automatically scan input directory at startup")
+    parser.add_argument("--access-log", action="store_true", help="Log every HTTP request")
     parser.add_argument("--no-db-autostart", action="store_true", help="Disable automatic database startup")
 
     args = parser.parse_args()
 
-    # Configure logging level
-    logging.getLogger().setLevel(getattr(logging, args.log_level.upper()))
-
-    # Check if Ollama is running
-    if not check_ollama_running():
-        print("Please start Ollama before running the server.")
-        sys.exit(1)
+    # Configure logging
+    logging.basicConfig(level=getattr(logging, args.log_level.upper()),
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
     # Check if LightRAG is installed
     if not check_lightrag_installed():
@@ -168,15 +459,7 @@ def main():
     # Ensure directories exist
     ensure_directories()
 
-    # Check and start databases if needed
-    if not args.no_db_autostart:
-        logger.info("Checking database services...")
-        if not check_and_start_databases(auto_start=True):
-            logger.warning("Some database services could not be started. Continuing anyway...")
-    else:
-        logger.info("Database auto-start is disabled. Skipping database check.")
-
-    # Start the server
+    # Start the server (Ollama and database checks run once it is listening)
     if not start_server(args):
         print("Failed to start the server.")
         sys.exit(1)
@@ -12,37 +12,177 @@ These utilities are used by both the main application and utility scripts.
 import os
 import sys
 import json
+import shutil
+import asyncio
+import functools
+import httpx
 import requests
 import subprocess
 import platform
 import time
+import random
+import threading
+from collections import Counter
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional, Any, Union
+from typing import Dict, Iterator, List, Tuple, Optional, Any, Union
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# NVML bindings are optional; check_nvidia_gpu falls back to nvidia-smi
+try:
+    import pynvml
+    pynvml_available = True
+except ImportError:
+    pynvml_available = False
+
+# psutil is optional; restart_server falls back to pkill/taskkill
+try:
+    import psutil
+    psutil_available = True
+except ImportError:
+    psutil_available = False
+
+# requests_toolbelt is optional; without it uploads are buffered by requests
+try:
+    from requests_toolbelt import MultipartEncoder
+    multipart_encoder_available = True
+except ImportError:
+    multipart_encoder_available = False
+
+# orjson parses large API responses several times faster than the json module
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# Streaming JSON parser is optional; iter_documents falls back to _json_body()
+try:
+    import ijson
+    ijson_available = True
+except ImportError:
+    ijson_available = False
+
+# Load environment variables from .env file (once per process, even across modules)
+if not os.environ.get("_MFR_DOTENV_LOADED"):
+    load_dotenv()
+    os.environ["_MFR_DOTENV_LOADED"] = "1"
+
+@dataclass(frozen=True)
+class Config:
+    """Environment settings used by the helpers, read once at import."""
+    host: str
+    port: str
+    ollama_host: str
+    working_dir: str
+    input_dir: str
+
+    @classmethod
+    def from_env(cls) -> "Config":
+        """Read the settings from the environment, with the usual defaults."""
+        return cls(
+            host=os.getenv("HOST", "localhost"),
+            port=os.getenv("PORT", "9621"),
+            ollama_host=os.getenv("LLM_BINDING_HOST", "http://localhost:11434"),
+            working_dir=os.getenv("WORKING_DIR", "./rag_storage"),
+            input_dir=os.getenv("INPUT_DIR", "./inputs"),
+        )
+
+CONFIG = Config.from_env()
 
-# Load environment variables
-load_dotenv()
+def reload_config() -> Config:
+    """
+    Re-read CONFIG from the environment, e.g. after changing environment variables.
+
+    Returns:
+        Config: The new configuration
+    """
+    global CONFIG
+    CONFIG = Config.from_env()
+    return CONFIG
 
 # ===== API Interaction Functions =====
 
+def _json_body(response: Any) -> Any:
+    """Decode the JSON body of a requests or httpx response."""
+    return _json_loads(response.content)
+
+def _create_session(retry: bool = True, pool_maxsize: int = 32) -> requests.Session:
+    """Create a requests session with pooled keep-alive connections and, if retry is set, retries on gateway errors."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_maxsize=pool_maxsize,
+        max_retries=Retry(total=2, backoff_factor=0.1, status_forcelist=(502, 503, 504)) if retry else 0,
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+# Shared by all helpers so repeated calls reuse open connections
+_SESSION = _create_session()
+# Health and status probes report the first answer instead of retrying, so a
+# down or starting service is reported within the probe's timeout
+_PROBE_SESSION = _create_session(retry=False, pool_maxsize=4)
+
+def close_session() -> None:
+    """Close the pooled connections of the shared HTTP sessions."""
+    _SESSION.close()
+    _PROBE_SESSION.close()
+
 def get_server_url() -> str:
     """
-    Get the server URL from environment variables or use default.
+    Get the server URL from the configured host and port.
 
     Returns:
         str: The server URL (e.g., "http://localhost:9621")
     """
-    # Always use localhost for client connections, even if server binds to 0.0.0.0
-    host = "localhost"
-    port = os.getenv("PORT", "9621")
-    return f"http://{host}:{port}"
-
-def get_documents(server_url: Optional[str] = None) -> Optional[Dict]:
+    host = CONFIG.host
+    # A wildcard bind address (0.0.0.0 or ::) is not something to connect to;
+    # clients reach such a server through localhost
+    if host in ("", "0.0.0.0", "::", "[::]"):
+        host = "localhost"
+    elif ":" in host and not host.startswith("["):
+        host = f"[{host}]"
+    return f"http://{host}:{CONFIG.port}"
+
+# get_documents results are reused for this many seconds so bursts of status
+# reads (counts, per-status lists, failed documents) share one request
+DOCUMENTS_CACHE_TTL = 0.5
+_documents_cache: Dict[str, Tuple[float, Dict]] = {}
+# Guards the cache dicts; never held during a request
+_documents_cache_lock = threading.Lock()
+# One lock per server, held while its document list is fetched
+_documents_fetch_locks: Dict[str, threading.Lock] = {}
+# Bumped on every invalidation, so a fetch that overlapped a change is not cached
+_documents_generation: Dict[str, int] = {}
+
+def _invalidate_documents_cache(server_url: str) -> None:
+    """Drop the cached document list for a server after a change."""
+    with _documents_cache_lock:
+        _documents_cache.pop(server_url, None)
+        _documents_generation[server_url] = _documents_generation.get(server_url, 0) + 1
+
+def _cached_documents(server_url: str) -> Optional[Dict]:
+    """Return the cached document list for a server if it has not expired."""
+    with _documents_cache_lock:
+        cached = _documents_cache.get(server_url)
+    if cached is not None and cached[0] > time.monotonic():
+        return cached[1]
+    return None
+
+def get_documents(server_url: Optional[str] = None, timeout: Union[float, Tuple[float, float]] = 30, fresh: bool = False) -> Optional[Dict]:
     """
     Get all documents from the server API.
 
+    Successful results are cached for DOCUMENTS_CACHE_TTL seconds per server,
+    and concurrent callers for the same server wait for a single request.
+
     Args:
         server_url: The server URL (default: from environment variables)
+        timeout: Request timeout in seconds, or a (connect, read) tuple
+        fresh: Bypass the cache and always query the server
 
     Returns:
         Optional[Dict]: Document data or None if there was an error
@@ -50,24 +190,104 @@ def get_documents(server_url: Optional[str] = None) -> Optional[Dict]:
     if server_url is None:
         server_url = get_server_url()
 
+    if not fresh:
+        data = _cached_documents(server_url)
+        if data is not None:
+            return data
+
+    with _documents_cache_lock:
+        fetch_lock = _documents_fetch_locks.setdefault(server_url, threading.Lock())
+    with fetch_lock:
+        # Another caller may have fetched the list while this one waited
+        if not fresh:
+            data = _cached_documents(server_url)
+            if data is not None:
+                return data
+
+        with _documents_cache_lock:
+            generation = _documents_generation.get(server_url, 0)
+        data = _fetch_documents(server_url, timeout)
+        if data is not None:
+            with _documents_cache_lock:
+                if _documents_generation.get(server_url, 0) == generation:
+                    _documents_cache[server_url] = (time.monotonic() + DOCUMENTS_CACHE_TTL, data)
+        return data
+
+def _fetch_documents(server_url: str, timeout: Union[float, Tuple[float, float]]) -> Optional[Dict]:
+    """Request the document list from the server, printing any error."""
     try:
-        response = requests.get(f"{server_url}/documents", timeout=30)
+        response = _SESSION.get(f"{server_url}/documents", timeout=timeout)
         if response.status_code != 200:
             print(f"Error: Failed to get documents. Status code: {response.status_code}")
             print(f"Response: {response.text}")
             return None
 
-        return response.json()
+        return _json_body(response)
     except Exception as e:
         print(f"Error: {str(e)}")
         return None
 
-def get_document_counts(server_url: Optional[str] = None) -> Dict:
+def iter_documents(name_substr: str = "", server_url: Optional[str] = None, timeout: Union[float, Tuple[float, float]] = 30) -> Iterator[Tuple[str, Dict]]:
+    """
+    Stream documents from the server API, one at a time.
+
+    With ijson installed the response is parsed incrementally, so only one
+    document is held in memory at a time instead of the whole catalog.
+
+    Args:
+        name_substr: Only yield documents whose file path contains this (case-insensitive)
+        server_url: The server URL (default: from environment variables)
+        timeout: Request timeout in seconds, or a (connect, read) tuple
+
+    Yields:
+        Tuple[str, Dict]: (status, document) pairs
+
+    Raises:
+        RuntimeError: If the server does not return the documents
+    """
+    if server_url is None:
+        server_url = get_server_url()
+    needle = name_substr.lower()
+
+    response = _SESSION.get(f"{server_url}/documents", timeout=timeout, stream=True)
+    try:
+        if response.status_code != 200:
+            raise RuntimeError(f"Failed to get documents. Status code: {response.status_code}")
+
+        if not ijson_available:
+            for status, docs in _json_body(response).get("statuses", {}).items():
+                for doc in docs:
+                    if needle in doc.get("file_path", "").lower():
+                        yield status, doc
+            return
+
+        # Build one "statuses.<status>.item" object at a time from the parse events
+        response.raw.decode_content = True
+        builder = item_prefix = None
+        for prefix, event, value in ijson.parse(response.raw):
+            if builder is None:
+                if event == "start_map" and prefix.startswith("statuses.") and prefix.endswith(".item") and prefix.count(".") == 2:
+                    builder = ijson.ObjectBuilder()
+                    item_prefix = prefix
+                else:
+                    continue
+
+            builder.event(event, value)
+            if event == "end_map" and prefix == item_prefix:
+                doc = builder.value
+                builder = None
+                if needle in doc.get("file_path", "").lower():
+                    yield item_prefix.split(".")[1], doc
+    finally:
+        response.close()
+
+def get_document_counts(server_url: Optional[str] = None, timeout: Union[float, Tuple[float, float]] = 30) -> Dict:
     """
     Get document counts by status.
 
     Args:
         server_url: The server URL (default: from environment variables)
+        timeout: Request timeout in seconds, or a (connect, read) tuple
 
     Returns:
         Dict: Document counts by status or error information
@@ -76,21 +296,24 @@ def get_document_counts(server_url: Optional[str] = None) -> Dict:
         server_url = get_server_url()
 
     try:
-        data = get_documents(server_url)
-        if not data:
-            return {"error": "Failed to get documents"}
-
-        counts = {
-            "PENDING": len(data.get("statuses", {}).get("PENDING", [])),
-            "PROCESSING": len(data.get("statuses", {}).get("PROCESSING", [])),
-            "PROCESSED": len(data.get("statuses", {}).get("PROCESSED", [])),
-            "FAILED": len(data.get("statuses", {}).get("FAILED", []))
-        }
-        counts["TOTAL"] = sum(counts.values())
-        return counts
+        return _count_documents(get_documents(server_url, timeout=timeout))
     except Exception as e:
         return {"error": str(e)}
 
+# Statuses reported by get_document_counts, in display order
+DOCUMENT_STATUSES = ("PENDING", "PROCESSING", "PROCESSED", "FAILED")
+
+def _count_documents(data: Optional[Dict]) -> Dict:
+    """Count the documents in a /documents response by status."""
+    if not data:
+        return {"error": "Failed to get documents"}
+
+    # One pass over the statuses, looking each one up once
+    statuses = data.get("statuses", {})
+    counts = {status: len(statuses.get(status, ())) for status in DOCUMENT_STATUSES}
+    counts["TOTAL"] = sum(counts.values())
+    return counts
+
 def get_documents_by_status(status: str, server_url: Optional[str] = None) -> List[Dict]:
     """
     Get documents with a specific status.
@@ -123,12 +346,13 @@ def get_failed_documents(server_url: Optional[str] = None) -> List[Dict]:
     """
     return get_documents_by_status("FAILED", server_url)
 
-def get_pipeline_status(server_url: Optional[str] = None) -> Dict:
+def get_pipeline_status(server_url: Optional[str] = None, timeout: Union[float, Tuple[float, float]] = 30) -> Dict:
     """
     Get the current pipeline status from the server.
 
     Args:
         server_url: The server URL (default: from environment variables)
+        timeout: Request timeout in seconds, or a (connect, read) tuple
 
     Returns:
         Dict: Pipeline status information or error details
@@ -137,9 +361,9 @@ def get_pipeline_status(server_url: Optional[str] = None) -> Dict:
         server_url = get_server_url()
 
     try:
-        response = requests.get(f"{server_url}/documents/pipeline_status", timeout=30)
+        response = _PROBE_SESSION.get(f"{server_url}/documents/pipeline_status", timeout=timeout)
         if response.status_code == 200:
-            return response.json()
+            return _json_body(response)
         else:
             return {"error": f"Status code: {response.status_code}", "details": response.text}
     except Exception as e:
@@ -160,7 +384,8 @@ def delete_document(doc_id: str, server_url: Optional[str] = None) -> bool:
         server_url = get_server_url()
 
     try:
-        response = requests.delete(f"{server_url}/documents/{doc_id}", timeout=30)
+        response = _SESSION.delete(f"{server_url}/documents/{doc_id}", timeout=30)
+        _invalidate_documents_cache(server_url)
         if response.status_code != 200:
             print(f"Error: Failed to delete document {doc_id}. Status code: {response.status_code}")
             print(f"Response: {response.text}")
@@ -194,8 +419,15 @@ def upload_document(file_path: str, server_url: Optional[str] = None) -> bool:
 
         # Upload document
         with open(file_path, "rb") as f:
-            files = {"file": (os.path.basename(file_path), f)}
-            response = requests.post(f"{server_url}/documents/upload", files=files, timeout=60)
+            if multipart_encoder_available:
+                # Stream the multipart body from disk instead of building it in memory
+                encoder = MultipartEncoder(fields={"file": (os.path.basename(file_path), f, "application/octet-stream")})
+                response = _SESSION.post(f"{server_url}/documents/upload", data=encoder,
+                                         headers={"Content-Type": encoder.content_type}, timeout=60)
+            else:
+                files = {"file": (os.path.basename(file_path), f)}
+                response = _SESSION.post(f"{server_url}/documents/upload", files=files, timeout=60)
+            _invalidate_documents_cache(server_url)
 
             if response.status_code != 200:
                 print(f"Error: Failed to upload file {file_path}. Status code: {response.status_code}")
@@ -222,7 +454,8 @@ def scan_for_documents(server_url: Optional[str] = None) -> bool:
         server_url = get_server_url()
 
     try:
-        response = requests.post(f"{server_url}/documents/scan", timeout=30)
+        response = _SESSION.post(f"{server_url}/documents/scan", timeout=30)
+        _invalidate_documents_cache(server_url)
         if response.status_code != 200:
             print(f"Error: Failed to trigger scan. Status code: {response.status_code}")
             print(f"Response: {response.text}")
@@ -249,13 +482,13 @@ def get_graph(label: str = "*", server_url: Optional[str] = None) -> Optional[Di
         server_url = get_server_url()
 
     try:
-        response = requests.get(f"{server_url}/graphs?label={label}", timeout=30)
+        response = _SESSION.get(f"{server_url}/graphs?label={label}", timeout=30)
         if response.status_code != 200:
             print(f"Error: Failed to get knowledge graph. Status code: {response.status_code}")
             print(f"Response: {response.text}")
             return None
 
-        return response.json()
+        return _json_body(response)
     except Exception as e:
         print(f"Error: {str(e)}")
         return None
@@ -276,7 +509,7 @@ def query(query_text: str, mode: str = "hybrid", server_url: Optional[str] = Non
         server_url = get_server_url()
 
     try:
-        response = requests.post(
+        response = _SESSION.post(
             f"{server_url}/query",
             json={"query": query_text, "mode": mode},
             timeout=60
@@ -285,84 +518,229 @@ def query(query_text: str, mode: str = "hybrid", server_url: Optional[str] = Non
         if response.status_code != 200:
             return f"Error: Failed to query. Status code: {response.status_code}, Response: {response.text}"
 
-        result = response.json()
+        result = _json_body(response)
         return result.get("response", "No response received")
     except Exception as e:
         return f"Error querying: {str(e)}"
 
 # ===== Ollama Interaction Functions =====
 
-def check_ollama_status(ollama_host: Optional[str] = None) -> Tuple[bool, str]:
+# Health checks should fail fast instead of hanging on an unreachable host
+OLLAMA_STATUS_TIMEOUT = 2.0
+
+# Parsed /api/tags results, cached per Ollama host and version for a short time
+TAGS_CACHE_FILE = Path.home() / ".multifilerag" / "cache" / "ollama_tags.json"
+TAGS_CACHE_TTL = 30.0
+
+# Last version reported by check_ollama_status for each host
+_ollama_versions: Dict[str, str] = {}
+
+def _load_tags_cache(ollama_host: str) -> Optional[List[Dict]]:
+    """
+    Load the cached model list for an Ollama host.
+
+    Args:
+        ollama_host: The Ollama host URL
+
+    Returns:
+        Optional[List[Dict]]: The cached models, or None if missing, stale or for another version
+    """
+    try:
+        with open(TAGS_CACHE_FILE, "r", encoding="utf-8") as f:
+            entry = json.load(f).get(ollama_host)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+    if not entry or time.time() - entry.get("ts", 0) > TAGS_CACHE_TTL:
+        return None
+    if entry.get("version") != _ollama_versions.get(ollama_host):
+        return None
+    return entry.get("models")
+
+def _save_tags_cache(ollama_host: str, models: List[Dict]) -> None:
+    """
+    Atomically store the model list for an Ollama host in the tags cache.
+
+    Args:
+        ollama_host: The Ollama host URL
+        models: The models returned by /api/tags
+    """
+    try:
+        with open(TAGS_CACHE_FILE, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+        if not isinstance(cache, dict):
+            cache = {}
+    except (OSError, ValueError):
+        cache = {}
+
+    cache[ollama_host] = {
+        "version": _ollama_versions.get(ollama_host),
+        "ts": time.time(),
+        "models": models,
+    }
+    try:
+        TAGS_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = TAGS_CACHE_FILE.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, TAGS_CACHE_FILE)
+    except OSError:
+        # The cache is only an optimization
+        pass
+
+def is_ollama_up(ollama_host: Optional[str] = None, timeout: Union[float, Tuple[float, float]] = OLLAMA_STATUS_TIMEOUT) -> bool:
+    """
+    Check if Ollama is running with a bodiless HEAD request.
+
+    Args:
+        ollama_host: The Ollama host URL (default: from environment variables)
+        timeout: Request timeout in seconds, or a (connect, read) tuple
+
+    Returns:
+        bool: True if Ollama answered, False otherwise
+    """
+    if ollama_host is None:
+        ollama_host = CONFIG.ollama_host
+
+    try:
+        return _PROBE_SESSION.head(f"{ollama_host}/", timeout=timeout).status_code == 200
+    except Exception:
+        return False
+
+def get_ollama_version(ollama_host: Optional[str] = None, refresh: bool = False) -> Optional[str]:
+    """
+    Get the Ollama version, reusing the last version seen for the host.
+
+    Args:
+        ollama_host: The Ollama host URL (default: from environment variables)
+        refresh: Always ask the server instead of using the remembered version
+
+    Returns:
+        Optional[str]: The version, or None if Ollama is not reachable
+    """
+    if ollama_host is None:
+        ollama_host = CONFIG.ollama_host
+
+    if not refresh and ollama_host in _ollama_versions:
+        return _ollama_versions[ollama_host]
+
+    running, version = check_ollama_status(ollama_host)
+    return version if running else None
+
+def check_ollama_status(ollama_host: Optional[str] = None, timeout: Union[float, Tuple[float, float]] = OLLAMA_STATUS_TIMEOUT) -> Tuple[bool, str]:
     """
     Check if Ollama is running and get its version.
 
     Args:
         ollama_host: The Ollama host URL (default: from environment variables)
+        timeout: Request timeout in seconds, or a (connect, read) tuple
 
     Returns:
         Tuple[bool, str]: (is_running, version_or_error_message)
     """
     if ollama_host is None:
-        ollama_host = os.getenv("LLM_BINDING_HOST", "http://localhost:11434")
+        ollama_host = CONFIG.ollama_host
 
     try:
-        response = requests.get(f"{ollama_host}/api/version")
+        response = _PROBE_SESSION.get(f"{ollama_host}/api/version", timeout=timeout)
         if response.status_code == 200:
-            data = response.json()
-            return True, data.get("version", "Unknown")
+            data = _json_body(response)
+            version = data.get("version", "Unknown")
+            _ollama_versions[ollama_host] = version
+            return True, version
         else:
             return False, f"Status code: {response.status_code}"
     except Exception as e:
         return False, str(e)
 
-def check_model_status(model_name: str, ollama_host: Optional[str] = None) -> Tuple[bool, Union[Dict, str]]:
+def check_model_status(model_name: str, ollama_host: Optional[str] = None, timeout: Union[float, Tuple[float, float]] = OLLAMA_STATUS_TIMEOUT) -> Tuple[bool, Union[Dict, str]]:
     """
     Check if a model is available in Ollama.
 
     Args:
         model_name: The model name to check
         ollama_host: The Ollama host URL (default: from environment variables)
+        timeout: Request timeout in seconds, or a (connect, read) tuple
 
     Returns:
         Tuple[bool, Union[Dict, str]]: (is_available, model_info_or_error_message)
     """
     if ollama_host is None:
-        ollama_host = os.getenv("LLM_BINDING_HOST", "http://localhost:11434")
+        ollama_host = CONFIG.ollama_host
 
-    try:
-        response = requests.get(f"{ollama_host}/api/tags")
-        if response.status_code == 200:
-            data = response.json()
-            models = data.get("models", [])
+    models = _load_tags_cache(ollama_host)
+    if models is None:
+        try:
+            response = _PROBE_SESSION.get(f"{ollama_host}/api/tags", timeout=timeout)
+            if response.status_code != 200:
+                return False, f"Status code: {response.status_code}"
+            models = _json_body(response).get("models", [])
+        except Exception as e:
+            return False, str(e)
+        _save_tags_cache(ollama_host, models)
 
-            # Check if the model exists
-            for model in models:
-                if model.get("name") == model_name:
-                    return True, model
+    # Check if the model exists
+    for model in models:
+        if model.get("name") == model_name:
+            return True, model
 
-            return False, "Model not found"
-        else:
-            return False, f"Status code: {response.status_code}"
-    except Exception as e:
-        return False, str(e)
+    return False, "Model not found"
 
+def _nvml_gpu_info() -> Optional[Dict]:
+    """
+    Read the first GPU's information through NVML.
+
+    Returns:
+        Optional[Dict]: The GPU information, or None if NVML is unavailable
+    """
+    try:
+        pynvml.nvmlInit()
+    except pynvml.NVMLError:
+        return None
+
+    try:
+        handle = pynvml.nvmlDeviceGetHandleByIndex(0)
+        name = pynvml.nvmlDeviceGetName(handle)
+        driver_version = pynvml.nvmlSystemGetDriverVersion()
+        cuda_version = pynvml.nvmlSystemGetCudaDriverVersion()
+        memory = pynvml.nvmlDeviceGetMemoryInfo(handle)
+    finally:
+        pynvml.nvmlShutdown()
+
+    # Older bindings return bytes
+    if isinstance(name, bytes):
+        name = name.decode()
+    if isinstance(driver_version, bytes):
+        driver_version = driver_version.decode()
+
+    # Match the fields reported by nvidia-smi
+    return {
+        "name": name,
+        "memory": f"{memory.total // (1024 * 1024)} MiB",
+        "driver_version": driver_version,
+        "cuda_version": f"{cuda_version // 1000}.{cuda_version % 1000 // 10}"
+    }
+
+@functools.lru_cache(maxsize=1)
 def check_nvidia_gpu() -> Tuple[bool, Union[Dict, str]]:
     """
     Check if NVIDIA GPU is available and get its information.
 
+    Uses NVML when pynvml is installed and falls back to nvidia-smi otherwise.
+    The result is cached, since the GPUs do not change while the process runs.
+
     Returns:
         Tuple[bool, Union[Dict, str]]: (is_available, gpu_info_or_error_message)
     """
     try:
+        if pynvml_available:
+            gpu_info = _nvml_gpu_info()
+            if gpu_info is not None:
+                return True, gpu_info
+
         # Check if nvidia-smi is available
-        if platform.system() == "Windows":
-            result = subprocess.run(["where", "nvidia-smi"], capture_output=True, text=True)
-            if result.returncode != 0:
-                return False, "NVIDIA System Management Interface (nvidia-smi) not found."
-        else:
-            result = subprocess.run(["which", "nvidia-smi"], capture_output=True, text=True)
-            if result.returncode != 0:
-                return False, "NVIDIA System Management Interface (nvidia-smi) not found."
+        if shutil.which("nvidia-smi") is None:
+            return False, "NVIDIA System Management Interface (nvidia-smi) not found."
 
         # Run nvidia-smi to get GPU information
         result = subprocess.run(["nvidia-smi", "--query-gpu=name,memory.total,driver_version,cuda_version", "--format=csv,noheader"], capture_output=True, text=True)
@@ -384,6 +762,193 @@ def check_nvidia_gpu() -> Tuple[bool, Union[Dict, str]]:
     except Exception as e:
         return False, str(e)
 
+# ===== Async API Functions =====
+
+# Shared async client, recreated when used from a different event loop
+_ASYNC_CLIENT: Optional[httpx.AsyncClient] = None
+_ASYNC_CLIENT_LOOP: Optional[asyncio.AbstractEventLoop] = None
+
+def _get_async_client() -> httpx.AsyncClient:
+    """Return the shared keep-alive async HTTP client for the running event loop."""
+    global _ASYNC_CLIENT, _ASYNC_CLIENT_LOOP
+    loop = asyncio.get_running_loop()
+    if _ASYNC_CLIENT is None or _ASYNC_CLIENT.is_closed or _ASYNC_CLIENT_LOOP is not loop:
+        _ASYNC_CLIENT = httpx.AsyncClient(
+            timeout=30,
+            limits=httpx.Limits(max_keepalive_connections=16),
+        )
+        _ASYNC_CLIENT_LOOP = loop
+    return _ASYNC_CLIENT
+
+async def aclose_async_client() -> None:
+    """Close the shared async HTTP client."""
+    global _ASYNC_CLIENT
+    if _ASYNC_CLIENT is not None:
+        await _ASYNC_CLIENT.aclose()
+        _ASYNC_CLIENT = None
+
+async def aget_documents(server_url: Optional[str] = None, timeout: float = 30) -> Optional[Dict]:
+    """
+    Async version of get_documents.
+
+    Args:
+        server_url: The server URL (default: from environment variables)
+        timeout: Request timeout in seconds
+
+    Returns:
+        Optional[Dict]: Document data or None if there was an error
+    """
+    if server_url is None:
+        server_url = get_server_url()
+
+    try:
+        response = await _get_async_client().get(f"{server_url}/documents", timeout=timeout)
+        if response.status_code != 200:
+            print(f"Error: Failed to get documents. Status code: {response.status_code}")
+            print(f"Response: {response.text}")
+            return None
+
+        return _json_body(response)
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        return None
+
+async def aget_pipeline_status(server_url: Optional[str] = None, timeout: float = 30) -> Dict:
+    """
+    Async version of get_pipeline_status.
+
+    Args:
+        server_url: The server URL (default: from environment variables)
+        timeout: Request timeout in seconds
+
+    Returns:
+        Dict: Pipeline status information or error details
+    """
+    if server_url is None:
+        server_url = get_server_url()
+
+    try:
+        response = await _get_async_client().get(f"{server_url}/documents/pipeline_status", timeout=timeout)
+        if response.status_code == 200:
+            return _json_body(response)
+        else:
+            return {"error": f"Status code: {response.status_code}", "details": response.text}
+    except Exception as e:
+        return {"error": str(e)}
+
+async def adelete_document(doc_id: str, server_url: Optional[str] = None) -> bool:
+    """
+    Async version of delete_document.
+
+    Args:
+        doc_id: The document ID to delete
+        server_url: The server URL (default: from environment variables)
+
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    if server_url is None:
+        server_url = get_server_url()
+
+    try:
+        response = await _get_async_client().delete(f"{server_url}/documents/{doc_id}", timeout=30)
+        _invalidate_documents_cache(server_url)
+        if response.status_code != 200:
+            print(f"Error: Failed to delete document {doc_id}. Status code: {response.status_code}")
+            print(f"Response: {response.text}")
+            return False
+
+        print(f"Document {doc_id} deleted successfully.")
+        return True
+    except Exception as e:
+        print(f"Error deleting document {doc_id}: {str(e)}")
+        return False
+
+async def aupload_document(file_path: str, server_url: Optional[str] = None) -> bool:
+    """
+    Async version of upload_document. The file is streamed, not read into memory.
+
+    Args:
+        file_path: Path to the file to upload
+        server_url: The server URL (default: from environment variables)
+
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    if server_url is None:
+        server_url = get_server_url()
+
+    try:
+        # Check if file exists
+        if not os.path.exists(file_path):
+            print(f"Error: File {file_path} does not exist.")
+            return False
+
+        # Upload document
+        with open(file_path, "rb") as f:
+            files = {"file": (os.path.basename(file_path), f)}
+            response = await _get_async_client().post(f"{server_url}/documents/upload", files=files, timeout=60)
+            _invalidate_documents_cache(server_url)
+
+        if response.status_code != 200:
+            print(f"Error: Failed to upload file {file_path}. Status code: {response.status_code}")
+            print(f"Response: {response.text}")
+            return False
+
+        print(f"File {file_path} uploaded successfully.")
+        return True
+    except Exception as e:
+        print(f"Error uploading file {file_path}: {str(e)}")
+        return False
+
+async def acheck_ollama_status(ollama_host: Optional[str] = None, timeout: float = OLLAMA_STATUS_TIMEOUT) -> Tuple[bool, str]:
+    """
+    Async version of check_ollama_status.
+
+    Args:
+        ollama_host: The Ollama host URL (default: from environment variables)
+        timeout: Request timeout in seconds
+
+    Returns:
+        Tuple[bool, str]: (is_running, version_or_error_message)
+    """
+    if ollama_host is None:
+        ollama_host = CONFIG.ollama_host
+
+    try:
+        response = await _get_async_client().get(f"{ollama_host}/api/version", timeout=timeout)
+        if response.status_code == 200:
+            version = _json_body(response).get("version", "Unknown")
+            _ollama_versions[ollama_host] = version
+            return True, version
+        else:
+            return False, f"Status code: {response.status_code}"
+    except Exception as e:
+        return False, str(e)
+
+async def gather_status(server_url: Optional[str] = None, ollama_host: Optional[str] = None) -> Dict:
+    """
+    Fetch the Ollama status, pipeline status and document counts concurrently.
+
+    Args:
+        server_url: The server URL (default: from environment variables)
+        ollama_host: The Ollama host URL (default: from environment variables)
+
+    Returns:
+        Dict: "ollama" (is_running, version_or_error_message), "pipeline_status"
+        and "document_counts" as returned by the synchronous helpers
+    """
+    ollama, pipeline_status, documents = await asyncio.gather(
+        acheck_ollama_status(ollama_host),
+        aget_pipeline_status(server_url),
+        aget_documents(server_url),
+    )
+    return {
+        "ollama": ollama,
+        "pipeline_status": pipeline_status,
+        "document_counts": _count_documents(documents),
+    }
+
 # ===== File and Directory Management =====
 
 def ensure_directories() -> None:
@@ -392,45 +957,88 @@ def ensure_directories() -> None:
 
     Creates the input and working directories if they don't exist.
     """
-    # Create inputs directory if it doesn't exist
-    input_dir = os.getenv("INPUT_DIR", "./inputs")
-    Path(input_dir).mkdir(parents=True, exist_ok=True)
+    input_dir = CONFIG.input_dir
+    working_dir = CONFIG.working_dir
 
-    # Create working directory if it doesn't exist
-    working_dir = os.getenv("WORKING_DIR", "./rag_storage")
-    Path(working_dir).mkdir(parents=True, exist_ok=True)
+    # Create the directories if they don't exist (one stat when they already do)
+    for directory in (input_dir, working_dir):
+        if not os.path.isdir(directory):
+            Path(directory).mkdir(parents=True, exist_ok=True)
 
     print(f"✅ Directories created/verified: {input_dir}, {working_dir}")
 
-def check_graph_file() -> bool:
+# Graph file sizes are reused for this many seconds so polling loops stat the
+# file at most once per interval; None records a missing file
+GRAPH_CHECK_TTL = 0.5
+_graph_check_cache: Dict[str, Tuple[float, Optional[int]]] = {}
+
+def check_graph_file(force: bool = False) -> bool:
     """
     Check if the knowledge graph file exists and has content.
 
+    Args:
+        force: Stat the file even if it was checked within GRAPH_CHECK_TTL
+
     Returns:
         bool: True if the file exists and has content, False otherwise
     """
-    working_dir = os.getenv("WORKING_DIR", "./rag_storage")
+    working_dir = CONFIG.working_dir
     graph_file = os.path.join(working_dir, "graph_chunk_entity_relation.graphml")
 
-    if os.path.exists(graph_file):
-        file_size = os.path.getsize(graph_file)
-        print(f"Graph file exists: {graph_file}")
-        print(f"File size: {file_size} bytes")
-
-        if file_size == 0:
-            print("WARNING: Graph file is empty. No entities or relationships were extracted.")
-            return False
-        elif file_size < 1000:
-            print("WARNING: Graph file is very small. Few entities or relationships were extracted.")
-            return True
-        else:
-            print("Graph file has sufficient content.")
-            return True
+    cached = _graph_check_cache.get(graph_file)
+    if not force and cached is not None and cached[0] > time.monotonic():
+        file_size = cached[1]
     else:
+        # A single stat both checks existence and gives the size
+        try:
+            file_size = os.stat(graph_file).st_size
+        except FileNotFoundError:
+            file_size = None
+        _graph_check_cache[graph_file] = (time.monotonic() + GRAPH_CHECK_TTL, file_size)
+
+    if file_size is None:
         print(f"WARNING: Graph file does not exist: {graph_file}")
         print("This indicates that no entities or relationships were extracted.")
         return False
 
+    print(f"Graph file exists: {graph_file}")
+    print(f"File size: {file_size} bytes")
+
+    if file_size == 0:
+        print("WARNING: Graph file is empty. No entities or relationships were extracted.")
+        return False
+    elif file_size < 1000:
+        print("WARNING: Graph file is very small. Few entities or relationships were extracted.")
+        return True
+    else:
+        print("Graph file has sufficient content.")
+        return True
+
+def _stop_server_processes(timeout: float = 5) -> None:
+    """
+    Terminate running multifilerag_server.py processes and wait for them to exit.
+
+    Args:
+        timeout: Seconds to wait before killing processes that have not exited
+    """
+    procs = []
+    for proc in psutil.process_iter(['pid', 'cmdline']):
+        try:
+            cmdline = proc.info['cmdline']
+            if proc.pid != os.getpid() and cmdline and 'multifilerag_server.py' in ' '.join(cmdline):
+                proc.terminate()
+                procs.append(proc)
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            pass
+
+    psutil.wait_procs(procs, timeout=timeout, callback=None)
+    for proc in procs:
+        if proc.is_running():
+            try:
+                proc.kill()
+            except psutil.NoSuchProcess:
+                pass
+
 def restart_server() -> bool:
     """
     Restart the MultiFileRAG server.
@@ -445,18 +1053,22 @@ def restart_server() -> bool:
             subprocess.run(["restart_server.bat"], shell=True)
             return True
         else:
-            # Try to find the server process and kill it
-            if platform.system() == 'Windows':  # Windows
-                subprocess.run(["taskkill", "/f", "/im", "python.exe", "/fi", "WINDOWTITLE eq MultiFileRAG Server"], shell=True)
-            else:  # Linux/Mac
-                subprocess.run(["pkill", "-f", "multifilerag_server.py"], shell=True)
+            # Find the server process and stop it
+            if psutil_available:
+                # Returns as soon as the process has exited
+                _stop_server_processes()
+            else:
+                if platform.system() == 'Windows':  # Windows
+                    subprocess.run(["taskkill", "/f", "/im", "python.exe", "/fi", "WINDOWTITLE eq MultiFileRAG Server"])
+                else:  # Linux/Mac
+                    subprocess.run(["pkill", "-f", "multifilerag_server.py"])
 
-            # Wait for the process to terminate
-            time.sleep(5)
+                # Wait for the process to terminate
+                time.sleep(5)
 
             # Start the server again
             if os.path.exists("multifilerag_server.py"):
-                subprocess.Popen(["python", "multifilerag_server.py"], shell=True)
+                subprocess.Popen([sys.executable, "multifilerag_server.py"], start_new_session=True)
                 print("Server restarted.")
                 return True
             else:
@@ -526,10 +1138,113 @@ def print_document_status(data: Optional[Dict]) -> None:
                     print(f"  Error: {error}")
                 print()
 
+# Polling starts fast and backs off to POLL_MAX_DELAY while documents are still processing
+POLL_INITIAL_DELAY = 1.0
+POLL_MAX_DELAY = 10.0
+
+def _backoff_sleep(delay: float) -> float:
+    """
+    Sleep for about delay seconds (with +/-20% jitter) and return the next delay.
+
+    Args:
+        delay: Current delay in seconds
+
+    Returns:
+        float: Doubled delay, capped at POLL_MAX_DELAY
+    """
+    time.sleep(delay * random.uniform(0.8, 1.2))
+    return min(POLL_MAX_DELAY, delay * 2)
+
+def _report_progress(doc_name: str, matching_docs: List[Dict], last_seen: Optional[Dict]) -> Tuple[bool, Optional[Dict]]:
+    """
+    Print the processing progress of the matching documents.
+
+    Args:
+        doc_name: Document name pattern being waited for
+        matching_docs: Documents whose file path matches the pattern
+        last_seen: Status snapshot returned by the previous call
+
+    Returns:
+        Tuple[bool, Optional[Dict]]: (all_processed, status_snapshot)
+    """
+    if not matching_docs:
+        print(f"No documents matching '{doc_name}' found.")
+        return False, last_seen
+
+    # Count statuses in one pass, ignoring case
+    counts = Counter((doc.get("status") or "").upper() for doc in matching_docs)
+
+    # Check if all documents are processed
+    if counts["PROCESSED"] == len(matching_docs):
+        print(f"All documents matching '{doc_name}' have been processed.")
+        return True, last_seen
+
+    # Only report when a document's status or update time changed
+    seen = {
+        doc.get("id", doc.get("file_path")): (doc.get("status"), doc.get("updated_at"))
+        for doc in matching_docs
+    }
+    if seen != last_seen:
+        print(f"Status: {counts['PROCESSED']} processed, {counts['PROCESSING']} processing, {counts['PENDING']} pending, {counts['FAILED']} failed")
+    return False, seen
+
+# Read timeout for the status event stream; the server sends keepalives every few seconds
+EVENTS_READ_TIMEOUT = 30.0
+
+def _wait_via_events(doc_name: str, deadline: float, server_url: Optional[str] = None) -> Optional[bool]:
+    """
+    Wait for documents to be processed using the server's status event stream.
+
+    Args:
+        doc_name: Document name pattern to match
+        deadline: time.time() value at which to give up
+        server_url: The server URL (default: from environment variables)
+
+    Returns:
+        Optional[bool]: True if processed, False on timeout, None if the stream is
+        unavailable or broke off (the caller should poll instead)
+    """
+    if server_url is None:
+        server_url = get_server_url()
+    needle = doc_name.lower()
+    last_seen = None
+
+    try:
+        response = _SESSION.get(f"{server_url}/documents/events", stream=True, timeout=(5, EVENTS_READ_TIMEOUT))
+    except Exception:
+        return None
+
+    try:
+        if response.status_code != 200:
+            return None
+
+        # chunk_size=None yields each event as soon as it arrives
+        for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+            if time.time() >= deadline:
+                return False
+            if not line or not line.startswith("data:"):
+                continue
+
+            matching_docs = [
+                doc for doc in _json_loads(line[5:])
+                if needle in (doc.get("file_path") or "").lower()
+            ]
+            done, last_seen = _report_progress(doc_name, matching_docs, last_seen)
+            if done:
+                return True
+    except Exception as e:
+        print(f"Status event stream interrupted: {str(e)}")
+    finally:
+        response.close()
+    return None
+
 def wait_for_processing(doc_name: str, timeout: int = 300, server_url: Optional[str] = None) -> bool:
     """
     Wait for documents to be processed.
 
+    Subscribes to the server's status event stream when available and
+    otherwise polls the document list with backoff.
+
     Args:
         doc_name: Document name pattern to match
         timeout: Maximum time to wait in seconds
@@ -541,66 +1256,30 @@ def wait_for_processing(doc_name: str, timeout: int = 300, server_url: Optional[
     print(f"Waiting for documents matching '{doc_name}' to be processed...")
     start_time = time.time()
 
-    while time.time() - start_time < timeout:
-        try:
-            # Get document statuses
-            data = get_documents(server_url)
-            if not data:
-                print("Error checking document status.")
-                time.sleep(10)
-                continue
+    result = _wait_via_events(doc_name, start_time + timeout, server_url)
+    if result is not None:
+        if not result:
+            print(f"Timeout waiting for documents to be processed after {timeout} seconds.")
+        return result
 
-            statuses = data.get("statuses", {})
+    delay = POLL_INITIAL_DELAY
+    last_seen = None
 
+    while time.time() - start_time < timeout:
+        try:
             # Find matching documents
-            matching_docs = []
-            for status_type, docs in statuses.items():
-                matching_docs.extend([
-                    doc for doc in docs
-                    if doc_name.lower() in doc.get("file_path", "").lower()
-                ])
-
-            if not matching_docs:
-                print(f"No documents matching '{doc_name}' found.")
-                time.sleep(10)
-                continue
-
-            # Check if all documents are processed
-            all_processed = all(
-                doc.get("status") == "PROCESSED" or doc.get("status") == "processed"
-                for doc in matching_docs
-            )
+            matching_docs = [doc for _, doc in iter_documents(doc_name, server_url)]
 
-            if all_processed:
-                print(f"All documents matching '{doc_name}' have been processed.")
+            done, last_seen = _report_progress(doc_name, matching_docs, last_seen)
+            if done:
                 return True
 
-            # Print status
-            processing_count = sum(
-                1 for doc in matching_docs
-                if doc.get("status") == "PROCESSING" or doc.get("status") == "processing"
-            )
-            pending_count = sum(
-                1 for doc in matching_docs
-                if doc.get("status") == "PENDING" or doc.get("status") == "pending"
-            )
-            processed_count = sum(
-                1 for doc in matching_docs
-                if doc.get("status") == "PROCESSED" or doc.get("status") == "processed"
-            )
-            failed_count = sum(
-                1 for doc in matching_docs
-                if doc.get("status") == "FAILED" or doc.get("status") == "failed"
-            )
-
-            print(f"Status: {processed_count} processed, {processing_count} processing, {pending_count} pending, {failed_count} failed")
-
             # Wait before checking again
-            time.sleep(10)
+            delay = _backoff_sleep(delay)
 
         except Exception as e:
             print(f"Error checking document status: {str(e)}")
-            time.sleep(10)
+            delay = _backoff_sleep(delay)
 
     print(f"Timeout waiting for documents to be processed after {timeout} seconds.")
     return False
@@ -615,9 +1294,18 @@ def main():
     print("This module provides common utility functions for the MultiFileRAG system.")
     print("It is not intended to be run directly, but can be imported by other scripts.")
 
+    async def fetch_status():
+        try:
+            return await gather_status()
+        finally:
+            await aclose_async_client()
+
+    # Fetch all statuses in one round trip
+    status = asyncio.run(fetch_status())
+
     # Test Ollama status
     print("\nChecking Ollama status...")
-    ollama_running, ollama_version = check_ollama_status()
+    ollama_running, ollama_version = status["ollama"]
     if ollama_running:
         print(f"✅ Ollama is running. Version: {ollama_version}")
     else:
@@ -628,7 +1316,7 @@ def main():
     server_url = get_server_url()
     print(f"Server URL: {server_url}")
 
-    pipeline_status = get_pipeline_status()
+    pipeline_status = status["pipeline_status"]
     if "error" in pipeline_status:
         print(f"❌ Server is not running. Error: {pipeline_status['error']}")
     else:
@@ -636,7 +1324,7 @@ def main():
 
     # Test document counts
     print("\nChecking document counts...")
-    counts = get_document_counts()
+    counts = status["document_counts"]
     if "error" in counts:
         print(f"❌ Failed to get document counts. Error: {counts['error']}")
     else:
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ollama Setup Utilities Module
+
+This module provides the Ollama checks shared by the setup scripts: whether
+the server is running, which models are pulled, and pulling missing models.
+
+It only needs requests, which is imported on first use so the setup scripts
+can load this module before their environment is installed.
+"""
+
+import sys
+import time
+import functools
+import threading
+import subprocess
+import collections
+from concurrent.futures import ThreadPoolExecutor
+
+OLLAMA_URL = "http://localhost:11434"
+
+# Seconds a fetched model list is reused
+MODELS_TTL = 5
+
+# One keep-alive connection shared by all Ollama probes, created on first use
+_session = None
+
+def get_session():
+    """Return the shared requests session for Ollama probes."""
+    global _session
+    if _session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        _session = requests.Session()
+        _session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+    return _session
+
+def check_ollama_running():
+    """Check if Ollama server is running."""
+    try:
+        import requests
+    except ImportError:
+        print("❌ The requests package is required to check the Ollama server.")
+        return False
+
+    try:
+        response = get_session().get(f"{OLLAMA_URL}/api/version", timeout=2)
+        if response.status_code == 200:
+            print(f"✅ Ollama server is running. Version: {response.json().get('version', 'unknown')}")
+            return True
+        else:
+            print(f"❌ Ollama server returned unexpected status code: {response.status_code}")
+            return False
+    except requests.exceptions.ConnectionError:
+        print("❌ Ollama server is not running. Please start it with 'ollama serve'.")
+        return False
+    except Exception as e:
+        print(f"❌ Error checking Ollama server: {e}")
+        return False
+
+@functools.lru_cache(maxsize=1)
+def _get_model_names(bucket):
+    """Fetch the names of the pulled models; bucket ties the cached result to a MODELS_TTL window."""
+    response = get_session().get(f"{OLLAMA_URL}/api/tags", timeout=2)
+    if response.status_code != 200:
+        raise RuntimeError(f"Failed to get model list. Status code: {response.status_code}")
+    return frozenset(model.get('name') for model in response.json().get('models', []))
+
+def get_model_names():
+    """Return the names of the pulled models, reusing a list fetched in the last few seconds."""
+    return _get_model_names(int(time.monotonic() // MODELS_TTL))
+
+def check_model_exists(model_name):
+    """Check if a model exists in Ollama."""
+    try:
+        if model_name in get_model_names():
+            print(f"✅ Model '{model_name}' is already pulled.")
+            return True
+        print(f"❌ Model '{model_name}' is not pulled.")
+        return False
+    except Exception as e:
+        print(f"❌ Error checking model existence: {e}")
+        return False
+
+def run_ollama_pull(model_name, stream=True):
+    """Run `ollama pull`, streaming its progress live; returns (returncode, tail of stderr)."""
+    # ollama draws its progress bar on stderr; pass it through (unless several
+    # pulls share the terminal) and keep only the last few chunks for errors
+    process = subprocess.Popen(["ollama", "pull", model_name], stderr=subprocess.PIPE)
+    stderr_tail = collections.deque(maxlen=64)
+
+    def relay_stderr():
+        for chunk in iter(lambda: process.stderr.read1(4096), b""):
+            if stream:
+                sys.stderr.buffer.write(chunk)
+                sys.stderr.flush()
+            stderr_tail.append(chunk)
+
+    relay = threading.Thread(target=relay_stderr, daemon=True)
+    relay.start()
+    returncode = process.wait()
+    relay.join()
+    return returncode, b"".join(stderr_tail)[-4096:].decode(errors="replace")
+
+def pull_model(model_name, stream=True):
+    """Pull a model from Ollama."""
+    try:
+        print(f"📥 Pulling model '{model_name}'... This may take a while.")
+        returncode, stderr = run_ollama_pull(model_name, stream)
+        if returncode == 0:
+            print(f"✅ Successfully pulled model '{model_name}'.")
+            _get_model_names.cache_clear()
+            return True
+        else:
+            print(f"❌ Failed to pull model '{model_name}'. Error: {stderr}")
+            return False
+    except Exception as e:
+        print(f"❌ Error pulling model: {e}")
+        return False
+
+def ensure_models(model_names):
+    """Pull the models that are not available yet, concurrently; returns whether all are usable."""
+    missing = [name for name in model_names if not check_model_exists(name)]
+    if not missing:
+        return True
+
+    for name in missing:
+        print(f"\n📋 Need to pull model '{name}'")
+
+    # Pulls are network-bound and independent, so download them side by side;
+    # interleaved progress bars would be unreadable, so only a lone pull streams
+    with ThreadPoolExecutor(max_workers=len(missing)) as executor:
+        results = list(executor.map(lambda name: pull_model(name, stream=len(missing) == 1), missing))
+
+    for name, pulled in zip(missing, results):
+        if not pulled:
+            print(f"❌ Failed to pull model '{name}'. Please try manually: ollama pull {name}")
+    return all(results)
@@ -6,66 +6,65 @@ This script updates the .env file with more appropriate settings for CPU-only op
 
 import os
 import sys
-import subprocess
 import platform
+from pathlib import Path
 from dotenv import load_dotenv
 
 # Load current environment variables
 load_dotenv()
 
 def update_env_file(updates):
-    """Update the .env file with new settings."""
+    """Update the .env file with new settings.
+
+    The original file is saved to .env.backup and the new contents are
+    written to a temporary file that atomically replaces .env.
+    """
     try:
         # Read the current .env file
-        with open(".env", "r", encoding="utf-8") as f:
-            lines = f.readlines()
-        
-        # Create a dictionary of current settings
-        current_settings = {}
-        for line in lines:
-            line = line.strip()
-            if line and not line.startswith("#") and "=" in line:
-                key, value = line.split("=", 1)
-                current_settings[key] = value
-        
-        # Update with new settings
-        for key, value in updates.items():
-            current_settings[key] = value
-        
+        env_path = Path(".env")
+        original = env_path.read_text(encoding="utf-8")
+
+        # Keep every line except the settings being replaced
+        preserved = []
+        for line in original.splitlines(keepends=True):
+            line_strip = line.strip()
+            if line_strip and not line_strip.startswith("#") and "=" in line_strip:
+                if line_strip.split("=", 1)[0] in updates:
+                    continue
+            preserved.append(line)
+
+        # Then append our updated settings
+        new_contents = "".join(preserved) + "\n# Updated settings for CPU-only operation\n"
+        new_contents += "".join(f"{key}={value}\n" for key, value in updates.items())
+
         # Create a backup of the original .env file
-        with open(".env.backup", "w", encoding="utf-8") as f:
-            f.writelines(lines)
-        
+        Path(".env.backup").write_text(original, encoding="utf-8")
+
         # Write the updated .env file
-        with open(".env", "w", encoding="utf-8") as f:
-            # First write all the lines that don't match our keys
-            for line in lines:
-                line_strip = line.strip()
-                if not line_strip or line_strip.startswith("#") or "=" not in line_strip:
-                    f.write(line)
-                    continue
-                
-                key = line_strip.split("=", 1)[0]
-                if key not in updates:
-                    f.write(line)
-            
-            # Then write our updated settings
-            f.write("\n# Updated settings for CPU-only operation\n")
-            for key, value in updates.items():
-                f.write(f"{key}={value}\n")
-        
+        tmp_path = Path(".env.tmp")
+        tmp_path.write_text(new_contents, encoding="utf-8")
+        os.replace(tmp_path, env_path)
+
         return True, "Settings updated successfully."
     except Exception as e:
         return False, str(e)
 
 def pull_ollama_model(model_name):
-    """Pull a model from Ollama."""
+    """Pull a model from Ollama, unless it is already installed."""
     try:
+        from multifilerag_utils import check_model_status
+        from ollama_utils import run_ollama_pull
+
+        # Skip the registry round trips and layer verification for installed models
+        available, _ = check_model_status(model_name)
+        if available:
+            return True, f"Model {model_name} is already installed."
+
         print(f"Pulling model {model_name} from Ollama...")
-        result = subprocess.run(["ollama", "pull", model_name], capture_output=True, text=True)
-        
-        if result.returncode != 0:
-            return False, f"Failed to pull model: {result.stderr}"
+        returncode, stderr = run_ollama_pull(model_name)
+
+        if returncode != 0:
+            return False, f"Failed to pull model: {stderr}"
         
         return True, "Model pulled successfully."
     except Exception as e:
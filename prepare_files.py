@@ -1,28 +1,131 @@
 import os
 import sys
+import json
 import shutil
 import argparse
+from collections import Counter
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 from multifile_processor import process_file
 
-def copy_to_inputs(file_path, input_dir="./inputs"):
-    """Copy a file to the inputs directory."""
+# Maps source path -> [size, mtime_ns, output path] for files already prepared.
+# Stored in the working directory, since LightRAG would ingest a JSON file in the inputs.
+MANIFEST_FILE = "prepared_files_manifest.json"
+
+# File types LightRAG reads directly; they are copied instead of processed
+COPY_EXTENSIONS = ('.pdf', '.csv', '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.webp')
+
+def load_manifest(working_dir):
+    """Load the prepared-files manifest (empty if missing or unreadable)."""
+    try:
+        with open(os.path.join(working_dir, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_manifest(working_dir, manifest):
+    """Atomically write the prepared-files manifest."""
+    Path(working_dir).mkdir(parents=True, exist_ok=True)
+    manifest_path = os.path.join(working_dir, MANIFEST_FILE)
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, manifest_path)
+
+def file_key(file_path):
+    """Return the manifest key and [size, mtime_ns] signature of a file from one stat."""
+    st = os.stat(file_path)
+    return os.path.abspath(file_path), [st.st_size, st.st_mtime_ns]
+
+def cached_output(manifest, file_path):
+    """Return the recorded output for a file if it is unchanged and the output still exists."""
+    key, signature = file_key(file_path)
+    entry = manifest.get(key)
+    if entry and entry[:2] == signature and os.path.exists(entry[2]):
+        return entry[2]
+    return None
+
+def record_output(manifest, file_path, output_path):
+    """Record the output produced for a file."""
+    key, signature = file_key(file_path)
+    manifest[key] = signature + [output_path]
+
+def fast_copy(src, dst):
+    """Copy a file with its metadata, letting the kernel copy the data when it can.
+
+    os.copy_file_range copies inside the kernel (and shares extents on
+    reflink-capable filesystems such as btrfs and XFS). Where it is not
+    available or fails, shutil.copy2 is used instead.
+    """
+    if hasattr(os, "copy_file_range"):
+        try:
+            with open(src, "rb") as sf, open(dst, "wb") as df:
+                remaining = os.fstat(sf.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(sf.fileno(), df.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            if remaining == 0:
+                shutil.copystat(src, dst)
+                return
+        except OSError:
+            pass
+
+    shutil.copy2(src, dst)
+
+def destination_name(file_path):
+    """Return the name a file gets in the inputs directory: its own for copied types, "<stem>.txt" otherwise."""
+    name = os.path.basename(file_path)
+    stem, ext = os.path.splitext(name)
+    return name if ext.lower() in COPY_EXTENSIONS else f"{stem}.txt"
+
+def destination_names(file_paths, root):
+    """Return a distinct inputs-directory name for each file under root.
+
+    Files keep destination_name unless another file would get the same name
+    (report.pdf in two subdirectories, or a.docx next to a.txt); those are
+    named after their whole relative path instead, e.g. "sub__report.pdf" or
+    "a.docx.txt". Names are compared case-insensitively.
+    """
+    simple_names = [destination_name(file_path) for file_path in file_paths]
+    counts = Counter(name.lower() for name in simple_names)
+    names, taken = [], set()
+    for file_path, name in zip(file_paths, simple_names):
+        if counts[name.lower()] > 1:
+            name = os.path.relpath(file_path, root).replace(os.sep, "__")
+            if name.lower().endswith(COPY_EXTENSIONS):
+                stem, ext = os.path.splitext(name)
+            else:
+                stem, ext = name, ".txt"
+            name = stem + ext
+            # A renamed file can still meet another file's name; number it then
+            suffix = 1
+            while name.lower() in taken:
+                name = f"{stem}.{suffix}{ext}"
+                suffix += 1
+        taken.add(name.lower())
+        names.append(name)
+    return names
+
+def copy_to_inputs(file_path, input_dir="./inputs", dest_name=None):
+    """Copy a file to the inputs directory (as dest_name, by default its own name)."""
     # Create inputs directory if it doesn't exist
     Path(input_dir).mkdir(parents=True, exist_ok=True)
     
     # Copy the file
-    dest_path = os.path.join(input_dir, os.path.basename(file_path))
-    shutil.copy2(file_path, dest_path)
+    dest_path = os.path.join(input_dir, dest_name or os.path.basename(file_path))
+    fast_copy(file_path, dest_path)
     
     return dest_path
 
-def process_and_copy(file_path, input_dir="./inputs"):
-    """Process a file and copy it to the inputs directory."""
+def process_and_copy(file_path, input_dir="./inputs", dest_name=None):
+    """Process a file and copy it to the inputs directory (as dest_name, by default destination_name)."""
     file_extension = os.path.splitext(file_path)[1].lower()
     
     # If it's a PDF, CSV, or image, copy it directly
-    if file_extension in ['.pdf', '.csv', '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.webp']:
-        dest_path = copy_to_inputs(file_path, input_dir)
+    if file_extension in COPY_EXTENSIONS:
+        dest_path = copy_to_inputs(file_path, input_dir, dest_name)
         print(f"Copied {file_path} to {dest_path}")
         return dest_path
     
@@ -31,7 +134,7 @@ def process_and_copy(file_path, input_dir="./inputs"):
     
     if text_content:
         # Create a text file with the processed content
-        output_file = os.path.join(input_dir, f"{os.path.splitext(os.path.basename(file_path))[0]}.txt")
+        output_file = os.path.join(input_dir, dest_name or destination_name(file_path))
         with open(output_file, "w", encoding="utf-8") as f:
             f.write(text_content)
         
@@ -45,28 +148,48 @@ def main():
     parser = argparse.ArgumentParser(description="Prepare files for LightRAG")
     parser.add_argument("--input", required=True, help="Input file or directory")
     parser.add_argument("--input-dir", default="./inputs", help="LightRAG input directory (default: ./inputs)")
+    parser.add_argument("--working-dir", default=os.getenv("WORKING_DIR", "./rag_storage"), help="Directory for the prepared-files manifest")
+    parser.add_argument("--force", action="store_true", help="Reprocess files even if they are unchanged")
     
     args = parser.parse_args()
+    manifest = load_manifest(args.working_dir)
     
     if os.path.isfile(args.input):
         # Process a single file
-        process_and_copy(args.input, args.input_dir)
+        cached = None if args.force else cached_output(manifest, args.input)
+        if cached:
+            print(f"Skipping unchanged {args.input} (already at {cached})")
+        else:
+            result = process_and_copy(args.input, args.input_dir)
+            if result:
+                record_output(manifest, args.input, result)
+                save_manifest(args.working_dir, manifest)
     
     elif os.path.isdir(args.input):
-        # Process a directory
-        processed_files = []
-        failed_files = []
-        
-        for root, _, files in os.walk(args.input):
-            for file in files:
-                file_path = os.path.join(root, file)
-                
-                result = process_and_copy(file_path, args.input_dir)
-                
-                if result:
-                    processed_files.append(file_path)
-                else:
-                    failed_files.append(file_path)
+        # Process a directory, spreading the changed files over worker processes
+        all_paths = [os.path.join(root, file) for root, _, files in os.walk(args.input) for file in files]
+        todo_paths = all_paths if args.force else [path for path in all_paths if not cached_output(manifest, path)]
+        skipped = len(all_paths) - len(todo_paths)
+        if skipped:
+            print(f"Skipping {skipped} unchanged files.")
+        Path(args.input_dir).mkdir(parents=True, exist_ok=True)
+
+        # Names are assigned over all files, so parallel workers never share a
+        # destination and unchanged files keep theirs between runs
+        dest_names = dict(zip(all_paths, destination_names(all_paths, args.input)))
+        with ProcessPoolExecutor() as executor:
+            results = list(executor.map(process_and_copy, todo_paths, [args.input_dir] * len(todo_paths),
+                                        [dest_names[path] for path in todo_paths], chunksize=8))
+
+        processed_files = [path for path, result in zip(todo_paths, results) if result]
+        failed_files = [path for path, result in zip(todo_paths, results) if not result]
+
+        # Remember what was produced so unchanged files are skipped next time
+        for path, result in zip(todo_paths, results):
+            if result:
+                record_output(manifest, path, result)
+        if processed_files:
+            save_manifest(args.working_dir, manifest)
         
         # Print summary
         print(f"\nProcessing complete!")
@@ -6,23 +6,46 @@ Process all account statement PDFs using unstructured.
 import os
 import sys
 import glob
+import argparse
+import functools
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+# Born-digital statements with less text than this are retried with OCR
+MIN_TEXT_CHARS = 100
+
+def process_pdf_with_unstructured(pdf_file, force=False, hi_res=False):
+    """Process a PDF file using unstructured, unless its extracted text is up to date.
+
+    The text layer is read with the "fast" strategy; scanned PDFs that yield
+    almost no text (or all PDFs with hi_res=True) go through "hi_res" layout
+    detection and OCR.
+    """
+    output_file = f"{os.path.splitext(pdf_file)[0]}_unstructured.txt"
+    if not force:
+        try:
+            if os.stat(output_file).st_mtime >= os.stat(pdf_file).st_mtime:
+                print(f"Skipping (already extracted): {pdf_file}")
+                return True
+        except FileNotFoundError:
+            pass
 
-def process_pdf_with_unstructured(pdf_file):
-    """Process a PDF file using unstructured."""
     try:
         from unstructured.partition.pdf import partition_pdf
 
         print(f"Processing: {pdf_file}")
 
         # Process the PDF
-        elements = partition_pdf(pdf_file)
+        text_content = ""
+        if not hi_res:
+            elements = partition_pdf(filename=pdf_file, strategy="fast", infer_table_structure=False)
+            text_content = "\n\n".join([str(el) for el in elements])
 
-        # Join all elements into a single text string
-        text_content = "\n\n".join([str(el) for el in elements])
+        if len(text_content.strip()) < MIN_TEXT_CHARS:
+            elements = partition_pdf(filename=pdf_file, strategy="hi_res")
+            text_content = "\n\n".join([str(el) for el in elements])
 
         # Save the extracted text to a file
-        output_file = f"{os.path.splitext(pdf_file)[0]}_unstructured.txt"
         with open(output_file, "w", encoding="utf-8") as f:
             f.write(text_content)
 
@@ -38,14 +61,20 @@ def process_pdf_with_unstructured(pdf_file):
 
 def main():
     """Main entry point."""
+    parser = argparse.ArgumentParser(description="Extract text from account statement PDFs")
+    parser.add_argument("--force", action="store_true", help="Re-extract PDFs whose text file is up to date")
+    parser.add_argument("--force-hi-res", action="store_true", help="Always use hi_res layout detection and OCR")
+    args = parser.parse_args()
+
     # Get the inputs directory
     inputs_dir = "E:/Code/MultiFileRAG/inputs"
 
     # Find all account statement PDFs
-    account_statements = []
-    for file in os.listdir(inputs_dir):
-        if file.endswith(".pdf") and ("Account Statements" in file or "1978897 Account Statements" in file):
-            account_statements.append(os.path.join(inputs_dir, file))
+    with os.scandir(inputs_dir) as entries:
+        account_statements = [
+            entry.path for entry in entries
+            if entry.name.endswith(".pdf") and "Account Statements" in entry.name and entry.is_file()
+        ]
 
     if not account_statements:
         print("No account statement PDFs found in the inputs directory.")
@@ -53,15 +82,14 @@ def main():
 
     print(f"Found {len(account_statements)} account statement PDFs.")
 
-    # Process each PDF
-    success_count = 0
-    error_count = 0
+    # Partition the PDFs in parallel, one worker process per core
+    max_workers = min(len(account_statements), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        process_fn = functools.partial(process_pdf_with_unstructured, force=args.force, hi_res=args.force_hi_res)
+        results = list(executor.map(process_fn, account_statements))
 
-    for pdf_file in account_statements:
-        if process_pdf_with_unstructured(pdf_file):
-            success_count += 1
-        else:
-            error_count += 1
+    success_count = sum(results)
+    error_count = len(results) - success_count
 
     print("\nProcessing complete!")
     print(f"Successfully processed: {success_count} files")
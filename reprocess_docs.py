@@ -5,15 +5,64 @@ This script uses the multifilerag_utils module for API interaction.
 """
 
 import os
-from multifilerag_utils import (
-    get_failed_documents, delete_document,
-    upload_document, get_server_url
-)
+import asyncio
+import argparse
 
-def main():
-    """Main entry point for reprocessing failed documents."""
-    # Get server URL from environment or use default
-    server_url = get_server_url()
+# multifilerag_utils (requests, httpx, dotenv) is imported where it is used,
+# so importing this module or running --help stays cheap
+
+# Default number of documents re-uploaded concurrently when OLLAMA_NUM_PARALLEL is unset
+MAX_IN_FLIGHT = 8
+
+def resolve_file_path(file_path, input_dir):
+    """Return the local path of a document, looking in the input directory for relative paths."""
+    if os.path.isabs(file_path) or os.path.exists(file_path):
+        return file_path
+    return os.path.join(input_dir, file_path)
+
+async def reprocess_documents(failed_docs, server_url, input_dir=None, parallel=None):
+    """Delete and re-upload the failed documents, several at a time."""
+    from multifilerag_utils import CONFIG, adelete_document, aupload_document, aclose_async_client
+
+    if input_dir is None:
+        input_dir = CONFIG.input_dir
+    if parallel is None:
+        # Match the parallelism the Ollama server actually offers
+        parallel = int(os.getenv("OLLAMA_NUM_PARALLEL", MAX_IN_FLIGHT))
+    semaphore = asyncio.Semaphore(parallel)
+
+    async def reprocess_one(doc):
+        doc_id = doc.get("id")
+        file_path = resolve_file_path(doc.get("file_path", ""), input_dir)
+        error = doc.get("error", "Unknown error")
+
+        # Check if file exists
+        if not os.path.exists(file_path):
+            print(f"Error: File {file_path} does not exist. Skipping {doc_id}.")
+            return
+
+        print(f"\nReprocessing document: {file_path} (error: {error})")
+
+        # Deleting is cheap, so only the upload that queues new work is rate-limited
+        if not await adelete_document(doc_id, server_url):
+            return
+        async with semaphore:
+            await aupload_document(file_path, server_url)
+
+    try:
+        tasks = [asyncio.ensure_future(reprocess_one(doc)) for doc in failed_docs]
+        for done, task in enumerate(asyncio.as_completed(tasks), 1):
+            await task
+            print(f"Progress: {done}/{len(tasks)} documents handled")
+    finally:
+        await aclose_async_client()
+
+def reprocess_failed(server_url=None, input_dir=None, parallel=None):
+    """Find the failed documents on the server and reprocess them."""
+    from multifilerag_utils import get_failed_documents, get_server_url
+
+    if server_url is None:
+        server_url = get_server_url()
 
     print(f"Checking for failed documents on {server_url}...")
 
@@ -26,26 +75,19 @@ def main():
 
     print(f"Found {len(failed_docs)} failed documents.")
 
-    # Process each failed document
-    for doc in failed_docs:
-        doc_id = doc.get("id")
-        file_path = doc.get("file_path")
-        error = doc.get("error", "Unknown error")
-
-        print(f"\nReprocessing document: {file_path}")
-        print(f"Error: {error}")
+    # Reprocess the failed documents concurrently
+    asyncio.run(reprocess_documents(failed_docs, server_url, input_dir, parallel))
 
-        # Check if file exists
-        if not os.path.exists(file_path):
-            print(f"Error: File {file_path} does not exist. Skipping.")
-            continue
+    print("Reprocessing complete.")
 
-        # Delete the document
-        if delete_document(doc_id, server_url):
-            # Reprocess the document
-            upload_document(file_path, server_url)
+def main():
+    """Main entry point for reprocessing failed documents."""
+    parser = argparse.ArgumentParser(description="Reprocess failed documents")
+    parser.add_argument("--input-dir", help="Directory holding documents stored with relative paths (default: INPUT_DIR)")
+    parser.add_argument("--parallel", type=int, help=f"Documents re-uploaded concurrently (default: OLLAMA_NUM_PARALLEL or {MAX_IN_FLIGHT})")
+    args = parser.parse_args()
 
-    print("Reprocessing complete.")
+    reprocess_failed(input_dir=args.input_dir, parallel=args.parallel)
 
 if __name__ == "__main__":
     main()
@@ -8,6 +8,7 @@ This script restarts the web UI by restarting the MultiFileRAG server.
 import os
 import sys
 import time
+import random
 import logging
 import subprocess
 import requests
@@ -19,6 +20,12 @@ logging.basicConfig(level=logging.INFO,
                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Server output is written here, so the server keeps running after this script exits
+SERVER_LOG = "multifilerag_server.log"
+
+# Logged (at INFO) by multifilerag_server once its startup checks have finished
+READY_MARKER = b"Server is ready."
+
 def get_server_url():
     """Get the server URL."""
     return "http://localhost:9621"
@@ -26,45 +33,100 @@ def get_server_url():
 def check_server_running():
     """Check if the server is running."""
     try:
-        response = requests.get(f"{get_server_url()}/health", timeout=5)
+        # A starting server either accepts or refuses quickly
+        response = requests.get(f"{get_server_url()}/health", timeout=1)
         return response.status_code == 200
     except:
         return False
 
+def check_server_ready():
+    """Check if the server reports itself ready (its startup checks have finished)."""
+    try:
+        response = requests.get(f"{get_server_url()}/readyz", timeout=1)
+        return response.status_code == 200
+    except requests.RequestException:
+        return False
+
 def find_server_process():
     """Find the server process."""
-    for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
+    # Only fetch the command line, and match arguments without joining them
+    for proc in psutil.process_iter(['cmdline']):
         try:
             cmdline = proc.info['cmdline']
-            if cmdline and 'multifilerag_server.py' in ' '.join(cmdline):
+            if cmdline and any(arg.endswith('multifilerag_server.py') for arg in cmdline):
                 return proc
         except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
             pass
     return None
 
 def kill_server_process():
-    """Kill the server process."""
+    """Kill the server process and any processes it started."""
     proc = find_server_process()
-    if proc:
-        logger.info(f"Killing server process (PID: {proc.pid})...")
-        try:
-            proc.terminate()
-            proc.wait(timeout=10)
-            logger.info("Server process terminated.")
-            return True
-        except:
-            try:
-                proc.kill()
-                proc.wait(timeout=10)
-                logger.info("Server process killed.")
-                return True
-            except:
-                logger.error("Failed to kill server process.")
-                return False
-    else:
+    if not proc:
         logger.info("No server process found.")
         return True
 
+    logger.info(f"Killing server process (PID: {proc.pid})...")
+    try:
+        procs = proc.children(recursive=True) + [proc]
+    except psutil.NoSuchProcess:
+        logger.info("Server process already exited.")
+        return True
+
+    # Ask the whole tree to exit, then kill whatever is left
+    for p in procs:
+        try:
+            p.terminate()
+        except psutil.NoSuchProcess:
+            pass
+    _, alive = psutil.wait_procs(procs, timeout=5)
+    for p in alive:
+        try:
+            p.kill()
+        except psutil.NoSuchProcess:
+            pass
+    _, alive = psutil.wait_procs(alive, timeout=5)
+
+    if alive:
+        logger.error("Failed to kill server process.")
+        return False
+    logger.info("Server process terminated.")
+    return True
+
+def wait_for_ready(log_path, offset, proc, timeout=60):
+    """Wait until the server is ready.
+
+    Readiness is taken from whichever comes first: the readiness line
+    appearing after offset in the server's log, or /readyz answering 200.
+    The endpoint is polled too because the line is not logged when
+    LOG_LEVEL is above INFO. Returns False if the server exits or the
+    timeout passes first.
+    """
+    deadline = time.monotonic() + timeout
+    tail = b""
+    # Poll the endpoint quickly at first, backing off to once a second
+    delay = 0.1
+    next_probe = time.monotonic() + delay
+    with open(log_path, "rb") as log:
+        log.seek(offset)
+        while time.monotonic() < deadline:
+            chunk = log.read()
+            if chunk:
+                # Keep a little of the previous chunk in case the marker was split
+                tail = tail[-len(READY_MARKER):] + chunk
+                if READY_MARKER in tail:
+                    return True
+                continue
+            if proc.poll() is not None:
+                return False
+            if time.monotonic() >= next_probe:
+                if check_server_ready():
+                    return True
+                delay = min(delay * 1.5, 1.0)
+                next_probe = time.monotonic() + delay * random.uniform(0.8, 1.2)
+            time.sleep(0.05)
+    return False
+
 def restart_server():
     """Restart the server."""
     # Kill the server process
@@ -75,17 +137,22 @@ def restart_server():
     # Start the server
     logger.info("Starting server...")
     try:
-        subprocess.Popen(["python", "multifilerag_server.py"], 
-                         cwd=os.path.dirname(os.path.abspath(__file__)),
-                         stdout=subprocess.PIPE,
-                         stderr=subprocess.PIPE)
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        log_path = os.path.join(script_dir, SERVER_LOG)
+        with open(log_path, "ab") as log:
+            offset = log.tell()
+            proc = subprocess.Popen([sys.executable, "multifilerag_server.py"],
+                                    cwd=script_dir,
+                                    stdout=log,
+                                    stderr=subprocess.STDOUT)
         
-        # Wait for the server to start
-        for _ in range(30):
-            if check_server_running():
-                logger.info("Server started successfully.")
-                return True
-            time.sleep(1)
+        # The server announces readiness in its log and on /readyz
+        if wait_for_ready(log_path, offset, proc):
+            logger.info("Server started successfully.")
+            return True
+        if proc.poll() is not None:
+            logger.error(f"Server exited with code {proc.returncode}. See {log_path}.")
+            return False
         
         logger.error("Server failed to start within the timeout period.")
         return False
@@ -1,72 +1,127 @@
 #!/usr/bin/env python3
 import os
+import re
 import sys
+import functools
 import subprocess
-import platform
+import shutil
+import hashlib
+import importlib.util
+import tempfile
 from pathlib import Path
 import argparse
+from ollama_utils import check_ollama_running, ensure_models
+
+@functools.lru_cache(maxsize=1)
+def get_conda_command():
+    """Return the fastest available conda-compatible driver: micromamba, mamba or conda."""
+    # Resolved once per run; shutil.which already honours PATHEXT on Windows
+    for command in ("micromamba", "mamba", "conda"):
+        if shutil.which(command):
+            return command
+    return None
+
+@functools.lru_cache(maxsize=1)
+def libmamba_solver_available():
+    """Check if conda can use the libmamba solver: bundled since conda 23.10, a plugin before that."""
+    if importlib.util.find_spec("conda_libmamba_solver") is not None:
+        return True
+    try:
+        output = subprocess.run(["conda", "--version"], capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return False
+    match = re.search(r"(\d+)\.(\d+)", output)
+    return match is not None and (int(match[1]), int(match[2])) >= (23, 10)
+
+def run_conda(args, **kwargs):
+    """Run a conda subcommand through the fastest available driver."""
+    command = get_conda_command() or "conda"
+    env = kwargs.pop("env", None) or os.environ.copy()
+    # Plain conda only uses the much faster libmamba solver when asked to on
+    # older releases, and fails on the setting if the plugin is missing
+    if command == "conda" and "CONDA_SOLVER" not in env and libmamba_solver_available():
+        env["CONDA_SOLVER"] = "libmamba"
+    return subprocess.run([command] + args, env=env, **kwargs)
 
 def check_conda_installed():
-    """Check if conda is installed."""
+    """Check if conda (or mamba/micromamba) is installed."""
+    command = get_conda_command()
+    if command:
+        print(f"✅ Conda is installed (using {command}).")
+        return True
+    print("❌ Conda is not installed or not in PATH.")
+    return False
+
+def environment_hash_file():
+    """Return the file recording the environment.yml the environment was last synced with."""
+    return Path(os.getenv("WORKING_DIR", "./rag_storage")) / ".env_hash"
+
+def environment_spec_hash():
+    """Return the SHA-256 of environment.yml, or None if it does not exist."""
     try:
-        if platform.system() == "Windows":
-            result = subprocess.run(["where", "conda"], capture_output=True, text=True)
-        else:
-            result = subprocess.run(["which", "conda"], capture_output=True, text=True)
+        return hashlib.sha256(Path("environment.yml").read_bytes()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+def record_environment_hash(spec_hash):
+    """Remember the environment.yml the environment was synced with."""
+    if spec_hash is None:
+        return
+    hash_file = environment_hash_file()
+    hash_file.parent.mkdir(parents=True, exist_ok=True)
+    hash_file.write_text(spec_hash)
+
+def update_conda_environment(spec_hash):
+    """Reconcile an existing environment with environment.yml, skipping it when nothing changed."""
+    if spec_hash is None:
+        print("Using existing environment.")
+        return True
 
-        if result.returncode == 0:
-            print("✅ Conda is installed.")
-            return True
-        else:
-            print("❌ Conda is not installed or not in PATH.")
-            return False
-    except Exception as e:
-        print(f"❌ Error checking conda installation: {e}")
-        return False
+    hash_file = environment_hash_file()
+    if hash_file.exists() and hash_file.read_text().strip() == spec_hash:
+        print("✅ Conda environment 'multifilerag' is up to date with environment.yml.")
+        return True
 
-def create_conda_environment():
-    """Create a conda environment for MultiFileRAG."""
+    # Only installs or removes what differs, reusing the package cache
+    print("Updating conda environment 'multifilerag' from environment.yml...")
+    run_conda(["env", "update", "-n", "multifilerag", "-f", "environment.yml", "--prune"], check=True)
+    record_environment_hash(spec_hash)
+    return True
+
+def create_conda_environment(recreate=False):
+    """Create a conda environment for MultiFileRAG, or update the existing one."""
     print("Creating conda environment for MultiFileRAG...")
 
     try:
+        spec_hash = environment_spec_hash()
+
         # Check if environment already exists
-        result = subprocess.run(["conda", "env", "list"], capture_output=True, text=True)
+        result = run_conda(["env", "list"], capture_output=True, text=True)
         if "multifilerag" in result.stdout:
             print("⚠️ Conda environment 'multifilerag' already exists.")
-            response = input("Do you want to recreate it? (y/n): ")
-            if response.lower() != 'y':
-                print("Using existing environment.")
-                return True
-            else:
-                # Remove existing environment
-                subprocess.run(["conda", "env", "remove", "-n", "multifilerag", "-y"], check=True)
+            if not recreate:
+                return update_conda_environment(spec_hash)
+
+            # Remove existing environment
+            run_conda(["env", "remove", "-n", "multifilerag", "-y"], check=True)
 
         # Create environment from environment.yml
         if os.path.exists("environment.yml"):
-            subprocess.run(["conda", "env", "create", "-f", "environment.yml"], check=True)
+            run_conda(["env", "create", "-f", "environment.yml"], check=True)
+            record_environment_hash(spec_hash)
         else:
-            # Create environment manually
-            subprocess.run(["conda", "create", "-n", "multifilerag", "python=3.10", "-y"], check=True)
-
-            # Install conda packages
-            subprocess.run([
-                "conda", "install", "-n", "multifilerag",
-                "pandas", "numpy", "matplotlib", "seaborn", "pillow", "requests", "python-dotenv",
-                "-y"
-            ], check=True)
-
-            # Install pip packages
-            if platform.system() == "Windows":
-                pip_cmd = ["conda", "run", "-n", "multifilerag", "pip", "install"]
-            else:
-                pip_cmd = ["conda", "run", "-n", "multifilerag", "pip", "install"]
+            # Describe the whole environment in one spec so the solver runs once
+            conda_packages = [
+                "python=3.10", "pip", "pandas", "numpy", "matplotlib", "seaborn",
+                "pillow", "requests", "python-dotenv"
+            ]
 
             pip_packages = [
                 "lightrag-hku[api]",
                 "unstructured[all-docs]>=0.17.0",
                 "PyPDF2>=3.0.0",
                 "fastapi>=0.104.0",
-                "uvicorn>=0.23.2",
+                "uvicorn[standard]>=0.23.2",
                 "python-multipart>=0.0.6",
                 "pydantic>=2.4.2",
                 "httpx>=0.25.0",
@@ -74,7 +129,17 @@ def create_conda_environment():
                 "aiofiles>=23.2.1"
             ]
 
-            subprocess.run(pip_cmd + pip_packages, check=True)
+            lines = ["name: multifilerag", "channels:", "  - conda-forge", "  - defaults", "dependencies:"]
+            lines += [f"  - {package}" for package in conda_packages]
+            lines += ["  - pip:"] + [f'    - "{package}"' for package in pip_packages]
+
+            # delete=False so conda can open the file on Windows too
+            with tempfile.NamedTemporaryFile("w", suffix=".yml", delete=False) as env_file:
+                env_file.write("\n".join(lines) + "\n")
+            try:
+                run_conda(["env", "create", "-f", env_file.name], check=True)
+            finally:
+                os.unlink(env_file.name)
 
         print("✅ Conda environment 'multifilerag' created successfully.")
         return True
@@ -85,74 +150,22 @@ def create_conda_environment():
         print(f"❌ Unexpected error: {e}")
         return False
 
-def check_ollama_running():
-    """Check if Ollama server is running."""
-    try:
-        import requests
-        response = requests.get("http://localhost:11434/api/version")
-        if response.status_code == 200:
-            print(f"✅ Ollama server is running. Version: {response.json().get('version', 'unknown')}")
-            return True
-        else:
-            print(f"❌ Ollama server returned unexpected status code: {response.status_code}")
-            return False
-    except requests.exceptions.ConnectionError:
-        print("❌ Ollama server is not running. Please start it with 'ollama serve'.")
-        return False
-    except Exception as e:
-        print(f"❌ Error checking Ollama server: {e}")
-        return False
-
-def check_model_exists(model_name):
-    """Check if a model exists in Ollama."""
-    try:
-        import requests
-        response = requests.get(f"http://localhost:11434/api/tags")
-        if response.status_code == 200:
-            models = response.json().get('models', [])
-            for model in models:
-                if model.get('name') == model_name:
-                    print(f"✅ Model '{model_name}' is already pulled.")
-                    return True
-            print(f"❌ Model '{model_name}' is not pulled.")
-            return False
-        else:
-            print(f"❌ Failed to get model list. Status code: {response.status_code}")
-            return False
-    except Exception as e:
-        print(f"❌ Error checking model existence: {e}")
-        return False
-
-def pull_model(model_name):
-    """Pull a model from Ollama."""
-    try:
-        print(f"📥 Pulling model '{model_name}'... This may take a while.")
-        result = subprocess.run(["ollama", "pull", model_name], capture_output=True, text=True)
-        if result.returncode == 0:
-            print(f"✅ Successfully pulled model '{model_name}'.")
-            return True
-        else:
-            print(f"❌ Failed to pull model '{model_name}'. Error: {result.stderr}")
-            return False
-    except Exception as e:
-        print(f"❌ Error pulling model: {e}")
-        return False
-
 def ensure_directories():
     """Ensure the required directories exist."""
-    # Create inputs directory if it doesn't exist
     input_dir = os.getenv("INPUT_DIR", "./inputs")
-    Path(input_dir).mkdir(parents=True, exist_ok=True)
-
-    # Create working directory if it doesn't exist
     working_dir = os.getenv("WORKING_DIR", "./rag_storage")
-    Path(working_dir).mkdir(parents=True, exist_ok=True)
+
+    # Create the directories if they don't exist (one stat when they already do)
+    for directory in (input_dir, working_dir):
+        if not os.path.isdir(directory):
+            Path(directory).mkdir(parents=True, exist_ok=True)
 
     print(f"✅ Directories created/verified: {input_dir}, {working_dir}")
 
 def main():
     parser = argparse.ArgumentParser(description="Set up conda environment for MultiFileRAG")
     parser.add_argument("--skip-ollama-check", action="store_true", help="Skip checking Ollama installation")
+    parser.add_argument("--recreate", action="store_true", help="Remove and recreate an existing conda environment")
 
     args = parser.parse_args()
 
@@ -165,7 +178,7 @@ def main():
         sys.exit(1)
 
     # Create conda environment
-    if not create_conda_environment():
+    if not create_conda_environment(recreate=args.recreate):
         print("Failed to create conda environment.")
         sys.exit(1)
 
@@ -177,22 +190,17 @@ def main():
 
         # Check and pull required models
         required_models = ["llama3", "nomic-embed-text"]
-        for model in required_models:
-            if not check_model_exists(model):
-                print(f"\n📋 Need to pull model '{model}'")
-                if not pull_model(model):
-                    print(f"❌ Failed to pull model '{model}'. Please try manually: ollama pull {model}")
-                    sys.exit(1)
+        if not ensure_models(required_models):
+            sys.exit(1)
 
     # Ensure directories exist
     ensure_directories()
 
     print("\n✅ Setup complete!")
     print("\nTo activate the conda environment, run:")
-    if platform.system() == "Windows":
-        print("  conda activate multifilerag")
-    else:
-        print("  conda activate multifilerag")
+    # micromamba creates the environment under MAMBA_ROOT_PREFIX, where conda does not look
+    activate_command = "micromamba" if get_conda_command() == "micromamba" else "conda"
+    print(f"  {activate_command} activate multifilerag")
 
     print("\nTo start the MultiFileRAG server, run:")
     print("  python start_server.py")
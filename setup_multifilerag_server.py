@@ -3,7 +3,7 @@ import sys
 import subprocess
 import platform
 from pathlib import Path
-import requests
+from ollama_utils import check_ollama_running, ensure_models
 
 def check_python_version():
     """Check if Python version is 3.10 or higher."""
@@ -12,56 +12,20 @@ def check_python_version():
         sys.exit(1)
     print(f"✅ Python version: {platform.python_version()}")
 
-def check_ollama_running():
-    """Check if Ollama server is running."""
+def write_if_changed(path, content):
+    """Atomically write content to path unless it already holds exactly that; returns whether it wrote."""
+    path = Path(path)
     try:
-        response = requests.get("http://localhost:11434/api/version")
-        if response.status_code == 200:
-            print(f"✅ Ollama server is running. Version: {response.json().get('version', 'unknown')}")
-            return True
-        else:
-            print(f"❌ Ollama server returned unexpected status code: {response.status_code}")
+        if path.read_text() == content:
             return False
-    except requests.exceptions.ConnectionError:
-        print("❌ Ollama server is not running. Please start it with 'ollama serve'.")
-        return False
-    except Exception as e:
-        print(f"❌ Error checking Ollama server: {e}")
-        return False
-
-def check_model_exists(model_name):
-    """Check if a model exists in Ollama."""
-    try:
-        response = requests.get(f"http://localhost:11434/api/tags")
-        if response.status_code == 200:
-            models = response.json().get('models', [])
-            for model in models:
-                if model.get('name') == model_name:
-                    print(f"✅ Model '{model_name}' is already pulled.")
-                    return True
-            print(f"❌ Model '{model_name}' is not pulled.")
-            return False
-        else:
-            print(f"❌ Failed to get model list. Status code: {response.status_code}")
-            return False
-    except Exception as e:
-        print(f"❌ Error checking model existence: {e}")
-        return False
+    except (OSError, UnicodeDecodeError):
+        pass
 
-def pull_model(model_name):
-    """Pull a model from Ollama."""
-    try:
-        print(f"📥 Pulling model '{model_name}'... This may take a while.")
-        result = subprocess.run(["ollama", "pull", model_name], capture_output=True, text=True)
-        if result.returncode == 0:
-            print(f"✅ Successfully pulled model '{model_name}'.")
-            return True
-        else:
-            print(f"❌ Failed to pull model '{model_name}'. Error: {result.stderr}")
-            return False
-    except Exception as e:
-        print(f"❌ Error pulling model: {e}")
-        return False
+    # Write beside the target and swap it in, so an interrupted setup never leaves a torn file
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(content)
+    os.replace(tmp_path, path)
+    return True
 
 def install_dependencies():
     """Install required dependencies."""
@@ -78,33 +42,39 @@ def install_dependencies():
         "python-dotenv>=1.0.0" # For environment variables
     ]
 
-    # Install dependencies
-    for dependency in dependencies:
-        try:
-            print(f"Installing {dependency}...")
-            subprocess.run([sys.executable, "-m", "pip", "install", dependency], check=True)
-        except subprocess.CalledProcessError as e:
-            print(f"❌ Error installing {dependency}: {e}")
-            sys.exit(1)
+    # Install dependencies in one pip run so they are resolved and downloaded together
+    try:
+        print(f"Installing {', '.join(dependencies)}...")
+        subprocess.run([sys.executable, "-m", "pip", "install", "--no-input",
+                        "--disable-pip-version-check", "--prefer-binary", *dependencies], check=True)
+    except subprocess.CalledProcessError as e:
+        print(f"❌ Error installing dependencies: {e}")
+        sys.exit(1)
 
     print("✅ Dependencies installed successfully!")
 
 def create_env_file():
     """Create .env file for LightRAG server configuration."""
-    env_content = """### Server Configuration
+    # Scale the concurrency defaults with the machine instead of pinning them
+    cpu_count = os.cpu_count() or 4
+    workers = max(2, cpu_count // 2)
+    max_async = max(4, cpu_count)
+    max_parallel_insert = max(2, cpu_count // 4)
+
+    env_content = f"""### Server Configuration
 HOST=0.0.0.0
 PORT=9621
-WORKERS=2
+WORKERS={workers}
 
 ### Settings for document indexing
 ENABLE_LLM_CACHE_FOR_EXTRACT=true
 SUMMARY_LANGUAGE=English
-MAX_PARALLEL_INSERT=2
+MAX_PARALLEL_INSERT={max_parallel_insert}
 
 ### LLM Configuration
 TIMEOUT=200
 TEMPERATURE=0.0
-MAX_ASYNC=4
+MAX_ASYNC={max_async}
 MAX_TOKENS=32768
 
 ### Ollama LLM Configuration
@@ -134,15 +104,16 @@ INPUT_DIR=./inputs
 """
 
     # Write .env file
-    with open(".env", "w") as f:
-        f.write(env_content)
-
-    print("✅ Created .env file with configuration for Ollama integration.")
+    if write_if_changed(".env", env_content):
+        print("✅ Created .env file with configuration for Ollama integration.")
+    else:
+        print("✅ .env file is already up to date.")
 
 def create_sample_files():
     """Create sample files for demonstration."""
     samples_dir = Path("./samples")
-    samples_dir.mkdir(exist_ok=True)
+    if not os.path.isdir(samples_dir):
+        samples_dir.mkdir(exist_ok=True)
 
     # Create a sample CSV file
     csv_path = samples_dir / "employee_data.csv"
@@ -158,8 +129,7 @@ Grace Lee,29,Data Science,95000,5,4.6
 Henry Taylor,38,Sales,82000,12,3.5
 Ivy Martinez,31,Customer Support,75000,6,4.0"""
 
-    with open(csv_path, "w") as f:
-        f.write(csv_content)
+    changed = write_if_changed(csv_path, csv_content)
 
     # Create a sample text file that will be used as a PDF
     txt_path = samples_dir / "sample_document.txt"
@@ -187,10 +157,12 @@ It then builds a knowledge graph that can be queried using natural language.
 ## Conclusion
 MultiFileRAG provides a powerful way to extract insights from your documents."""
 
-    with open(txt_path, "w") as f:
-        f.write(txt_content)
+    changed = write_if_changed(txt_path, txt_content) or changed
 
-    print("✅ Created sample files in the 'samples' directory.")
+    if changed:
+        print("✅ Created sample files in the 'samples' directory.")
+    else:
+        print("✅ Sample files in the 'samples' directory are already up to date.")
 
 def create_start_script():
     """Create a script to start the LightRAG server."""
@@ -200,34 +172,17 @@ import sys
 import subprocess
 import argparse
 from pathlib import Path
-
-def check_ollama_running():
-    \"\"\"Check if Ollama server is running.\"\"\"
-    try:
-        import requests
-        response = requests.get("http://localhost:11434/api/version")
-        if response.status_code == 200:
-            print(f"✅ Ollama server is running. Version: {response.json().get('version', 'unknown')}")
-            return True
-        else:
-            print(f"❌ Ollama server returned unexpected status code: {response.status_code}")
-            return False
-    except requests.exceptions.ConnectionError:
-        print("❌ Ollama server is not running. Please start it with 'ollama serve'.")
-        return False
-    except Exception as e:
-        print(f"❌ Error checking Ollama server: {e}")
-        return False
+from ollama_utils import check_ollama_running
 
 def ensure_directories():
     \"\"\"Ensure the required directories exist.\"\"\"
-    # Create inputs directory if it doesn't exist
     input_dir = os.getenv("INPUT_DIR", "./inputs")
-    Path(input_dir).mkdir(parents=True, exist_ok=True)
-
-    # Create working directory if it doesn't exist
     working_dir = os.getenv("WORKING_DIR", "./rag_storage")
-    Path(working_dir).mkdir(parents=True, exist_ok=True)
+
+    # Create the directories if they don't exist (one stat when they already do)
+    for directory in (input_dir, working_dir):
+        if not os.path.isdir(directory):
+            Path(directory).mkdir(parents=True, exist_ok=True)
 
     print(f"✅ Directories created/verified: {input_dir}, {working_dir}")
 
@@ -259,11 +214,16 @@ def main():
 
     # Start the server
     print(f"Starting MultiFileRAG server on {args.host}:{args.port}...")
+    sys.stdout.flush()
     try:
-        subprocess.run(cmd)
+        if os.name == "nt":
+            # Windows has no real exec; wait on the server and pass on its exit code
+            sys.exit(subprocess.call(cmd))
+        # Become the server, so signals reach it directly and no wrapper process lingers
+        os.execvp(cmd[0], cmd)
     except KeyboardInterrupt:
-        print("\nServer stopped.")
-    except Exception as e:
+        print("\\nServer stopped.")
+    except OSError as e:
         print(f"Error starting server: {e}")
         sys.exit(1)
 
@@ -272,8 +232,9 @@ if __name__ == "__main__":
 """
 
     # Write start script
-    with open("start_server.py", "w") as f:
-        f.write(script_content)
+    if not write_if_changed("start_server.py", script_content):
+        print("✅ start_server.py script is already up to date.")
+        return
 
     # Make it executable on Unix-like systems
     if platform.system() != "Windows":
@@ -361,10 +322,10 @@ This project is licensed under the MIT License.
 """
 
     # Write README file
-    with open("README_server.md", "w") as f:
-        f.write(readme_content)
-
-    print("✅ Created README_server.md file.")
+    if write_if_changed("README_server.md", readme_content):
+        print("✅ Created README_server.md file.")
+    else:
+        print("✅ README_server.md file is already up to date.")
 
 def main():
     print("🔍 Setting up MultiFileRAG server...")
@@ -379,12 +340,8 @@ def main():
 
     # Check and pull required models
     required_models = ["llama3", "nomic-embed-text"]
-    for model in required_models:
-        if not check_model_exists(model):
-            print(f"\n📋 Need to pull model '{model}'")
-            if not pull_model(model):
-                print(f"❌ Failed to pull model '{model}'. Please try manually: ollama pull {model}")
-                sys.exit(1)
+    if not ensure_models(required_models):
+        sys.exit(1)
 
     # Install dependencies
     install_dependencies()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the multi-file processor module.
+
+This module contains tests for the functions in multifile_processor.py.
+"""
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from multifile_processor import _correlation_strengths, extract_text_from_csv, process_directory
+
+
+class TestCorrelationStrengths(unittest.TestCase):
+    """Test the correlation strength labels."""
+
+    def test_boundaries(self):
+        """Test that values on the thresholds get the same labels as the scalar comparisons."""
+        values = np.array([-0.9, -0.7, -0.6, 0.0, 0.6, 0.7, 0.9])
+        self.assertEqual(
+            _correlation_strengths(values).tolist(),
+            [
+                "strong negative", "moderate negative", "moderate negative", "moderate negative",
+                "moderate positive", "moderate positive", "strong positive",
+            ],
+        )
+
+
+
+class TestExtractTextFromCsv(unittest.TestCase):
+    """Test the CSV text extraction."""
+
+    def setUp(self):
+        """Create a temporary directory for the CSV files."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.temp_dir.cleanup()
+
+    def write_csv(self, content):
+        """Write a CSV file into the temporary directory and return its path."""
+        path = os.path.join(self.temp_dir.name, "data.csv")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return path
+
+    def test_no_numeric_columns(self):
+        """Test a CSV without numeric columns is described without statistics."""
+        result = extract_text_from_csv(self.write_csv("a,b\nx,y\n"))
+
+        self.assertIsNotNone(result)
+        self.assertIn("Column 'a'", result)
+        self.assertNotIn("Statistical Information", result)
+
+    def test_large_integer_extremes(self):
+        """Test integer min and max are reported exactly, without a float round trip."""
+        result = extract_text_from_csv(self.write_csv("n,f\n9007199254740993,1.5\n1,2.5\n"))
+
+        self.assertIn("  - Min: 1\n", result)
+        self.assertIn("  - Max: 9007199254740993\n", result)
+
+
+
+class TestProcessDirectory(unittest.TestCase):
+    """Test processing a whole directory."""
+
+    def test_same_stem_files_get_distinct_outputs(self):
+        """Test files that share a stem are written to separate output files."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            os.makedirs(os.path.join(temp_dir, "sub"))
+            sources = {"a.txt": "top text", "a.md": "markdown", os.path.join("sub", "a.txt"): "nested text"}
+            for rel_path, content in sources.items():
+                with open(os.path.join(temp_dir, rel_path), "w", encoding="utf-8") as f:
+                    f.write(content)
+
+            results = process_directory(temp_dir)
+
+            self.assertEqual(sorted(results), sorted(sources))
+            output_files = [result["output_file"] for result in results.values()]
+            self.assertEqual(len(set(output_files)), len(sources))
+            for rel_path, content in sources.items():
+                self.assertEqual(results[rel_path]["status"], "success")
+                with open(results[rel_path]["output_file"], encoding="utf-8") as f:
+                    self.assertEqual(f.read(), content)
+
+
+if __name__ == "__main__":
+    unittest.main()
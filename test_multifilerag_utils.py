@@ -6,7 +6,9 @@ Unit tests for the MultiFileRAG utilities module.
 This module contains tests for the functions in multifilerag_utils.py.
 """
 
+import io
 import os
+import asyncio
 import unittest
 from unittest.mock import patch, MagicMock
 import tempfile
@@ -14,44 +16,93 @@ import json
 from pathlib import Path
 
 # Import the module to test
+import multifilerag_utils
 from multifilerag_utils import (
-    get_server_url, get_documents, get_document_counts,
+    get_server_url, get_documents, iter_documents, get_document_counts,
     get_documents_by_status, get_failed_documents,
     get_pipeline_status, delete_document, upload_document,
-    scan_for_documents, get_graph, query,
+    scan_for_documents, get_graph, query, aupload_document,
     check_ollama_status, check_model_status, check_nvidia_gpu,
     ensure_directories, check_graph_file, restart_server,
-    print_document_status, wait_for_processing
+    print_document_status, wait_for_processing, reload_config
 )
 
 
+class FakeResponse:
+    """Minimal stand-in for requests.Response; much cheaper to build than a MagicMock."""
+
+    __slots__ = ("status_code", "content", "text", "raw", "closed")
+
+    def __init__(self, status_code, data=None, text=""):
+        self.status_code = status_code
+        self.content = json.dumps(data).encode() if data is not None else b""
+        self.text = text
+        self.raw = io.BytesIO(self.content)
+        self.closed = False
+
+    def json(self):
+        return json.loads(self.content)
+
+    def close(self):
+        self.closed = True
+
+
 class TestServerUrlFunctions(unittest.TestCase):
     """Test functions related to server URL handling."""
 
+    def tearDown(self):
+        """Restore the configuration from the real environment."""
+        reload_config()
+
     def test_get_server_url_default(self):
         """Test get_server_url with default values."""
         with patch.dict(os.environ, {}, clear=True):
+            reload_config()
             url = get_server_url()
             self.assertEqual(url, "http://localhost:9621")
 
     def test_get_server_url_custom(self):
         """Test get_server_url with custom values."""
         with patch.dict(os.environ, {"HOST": "example.com", "PORT": "8080"}, clear=True):
+            reload_config()
             url = get_server_url()
             self.assertEqual(url, "http://example.com:8080")
 
+    def test_get_server_url_wildcard_host(self):
+        """Test get_server_url connects through localhost when the server binds to all interfaces."""
+        with patch.dict(os.environ, {"HOST": "0.0.0.0", "PORT": "8080"}, clear=True):
+            reload_config()
+            url = get_server_url()
+            self.assertEqual(url, "http://localhost:8080")
+
 
 class TestDocumentFunctions(unittest.TestCase):
     """Test functions related to document handling."""
 
-    @patch('multifilerag_utils.requests.get')
+    # Safe to run in parallel (e.g. pytest -n auto): network calls are patched
+    # per test and the module caches are reset in setUp
+
+    @classmethod
+    def setUpClass(cls):
+        """Build the sample /documents response shared by the status tests."""
+        cls.SAMPLE_STATUSES = {
+            "statuses": {
+                "PENDING": [{"id": "1"}],
+                "PROCESSING": [{"id": "2"}, {"id": "3"}],
+                "PROCESSED": [{"id": "4"}, {"id": "5"}, {"id": "6"}],
+                "FAILED": [{"id": "7"}]
+            }
+        }
+
+    def setUp(self):
+        """Start every test with an empty document cache."""
+        multifilerag_utils._documents_cache.clear()
+
+    @patch('multifilerag_utils._SESSION.get')
     def test_get_documents_success(self, mock_get):
         """Test get_documents with successful response."""
         # Mock response
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {"statuses": {"PROCESSED": [{"id": "1"}]}}
-        mock_get.return_value = mock_response
+        mock_get.return_value = FakeResponse(200, {"statuses": {"PROCESSED": [{"id": "1"}]}})
 
         # Call function
         result = get_documents("http://test-server")
@@ -60,14 +111,42 @@ class TestDocumentFunctions(unittest.TestCase):
         mock_get.assert_called_once_with("http://test-server/documents", timeout=30)
         self.assertEqual(result, {"statuses": {"PROCESSED": [{"id": "1"}]}})
 
-    @patch('multifilerag_utils.requests.get')
+    @patch('multifilerag_utils._SESSION.get')
+    def test_get_documents_cached(self, mock_get):
+        """Test get_documents reuses a recent response unless fresh is set."""
+        # Mock response
+        mock_get.return_value = FakeResponse(200, {"statuses": {}})
+
+        # Call function
+        get_documents("http://test-server")
+        get_documents("http://test-server")
+        self.assertEqual(mock_get.call_count, 1)
+
+        get_documents("http://test-server", fresh=True)
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch('multifilerag_utils._SESSION.get')
+    def test_status_helpers_share_one_fetch(self, mock_get):
+        """Test a burst of status queries makes a single request."""
+        # Mock response
+        mock_get.return_value = FakeResponse(200, {"statuses": {"FAILED": [{"id": "7"}]}})
+
+        # Call functions
+        counts = get_document_counts("http://test-server")
+        failed = get_failed_documents("http://test-server")
+        processed = get_documents_by_status("PROCESSED", "http://test-server")
+
+        # Verify
+        mock_get.assert_called_once()
+        self.assertEqual(counts["FAILED"], 1)
+        self.assertEqual(failed, [{"id": "7"}])
+        self.assertEqual(processed, [])
+
+    @patch('multifilerag_utils._SESSION.get')
     def test_get_documents_error(self, mock_get):
         """Test get_documents with error response."""
         # Mock response
-        mock_response = MagicMock()
-        mock_response.status_code = 500
-        mock_response.text = "Server error"
-        mock_get.return_value = mock_response
+        mock_get.return_value = FakeResponse(500, text="Server error")
 
         # Call function
         result = get_documents("http://test-server")
@@ -75,7 +154,7 @@ class TestDocumentFunctions(unittest.TestCase):
         # Verify
         self.assertIsNone(result)
 
-    @patch('multifilerag_utils.requests.get')
+    @patch('multifilerag_utils._SESSION.get')
     def test_get_documents_exception(self, mock_get):
         """Test get_documents with exception."""
         # Mock exception
@@ -87,18 +166,91 @@ class TestDocumentFunctions(unittest.TestCase):
         # Verify
         self.assertIsNone(result)
 
+    @patch('multifilerag_utils._SESSION.get')
+    def test_iter_documents_filters_by_name(self, mock_get):
+        """Test iter_documents yields matching documents with their status."""
+        data = {"statuses": {
+            "PROCESSED": [{"id": "1", "file_path": "docs/Report.pdf"}, {"id": "2", "file_path": "notes.txt"}],
+            "PENDING": [{"id": "3", "file_path": "report.csv"}]
+        }}
+        # Mock response (raw for the streaming parser, content for the fallback)
+        mock_response = FakeResponse(200, data)
+        mock_get.return_value = mock_response
+
+        # Call function
+        result = list(iter_documents("report", "http://test-server"))
+
+        # Verify
+        mock_get.assert_called_once_with("http://test-server/documents", timeout=30, stream=True)
+        self.assertEqual(result, [
+            ("PROCESSED", {"id": "1", "file_path": "docs/Report.pdf"}),
+            ("PENDING", {"id": "3", "file_path": "report.csv"})
+        ])
+        self.assertTrue(mock_response.closed)
+
+    @patch('multifilerag_utils.multipart_encoder_available', False)
+    @patch('multifilerag_utils._SESSION.post')
+    def test_upload_document_uses_session(self, mock_post):
+        """Test upload_document posts through the shared session."""
+        # Mock response
+        mock_post.return_value = FakeResponse(200)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = os.path.join(temp_dir, "report.txt")
+            with open(file_path, "w") as f:
+                f.write("content")
+
+            # Call function
+            result = upload_document(file_path, "http://test-server")
+
+        # Verify
+        self.assertTrue(result)
+        mock_post.assert_called_once()
+        args, kwargs = mock_post.call_args
+        self.assertEqual(args, ("http://test-server/documents/upload",))
+        self.assertEqual(kwargs["timeout"], 60)
+        self.assertEqual(kwargs["files"]["file"][0], "report.txt")
+
+    def test_aupload_document_concurrent(self):
+        """Test aupload_document uploads overlap when gathered."""
+        in_flight = []
+        max_in_flight = []
+
+        # Mock client whose uploads stay in flight for a moment
+        async def fake_post(*args, **kwargs):
+            in_flight.append(1)
+            max_in_flight.append(len(in_flight))
+            await asyncio.sleep(0.01)
+            in_flight.pop()
+            return FakeResponse(200)
+
+        mock_client = MagicMock()
+        mock_client.post = fake_post
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            paths = []
+            for i in range(3):
+                path = os.path.join(temp_dir, f"doc{i}.txt")
+                with open(path, "w") as f:
+                    f.write("content")
+                paths.append(path)
+
+            async def upload_all():
+                return await asyncio.gather(*(aupload_document(path, "http://test-server") for path in paths))
+
+            # Call function
+            with patch('multifilerag_utils._get_async_client', return_value=mock_client):
+                results = asyncio.run(upload_all())
+
+        # Verify
+        self.assertEqual(results, [True, True, True])
+        self.assertEqual(max(max_in_flight), 3)
+
     @patch('multifilerag_utils.get_documents')
     def test_get_document_counts_success(self, mock_get_documents):
         """Test get_document_counts with successful response."""
         # Mock response
-        mock_get_documents.return_value = {
-            "statuses": {
-                "PENDING": [{"id": "1"}],
-                "PROCESSING": [{"id": "2"}, {"id": "3"}],
-                "PROCESSED": [{"id": "4"}, {"id": "5"}, {"id": "6"}],
-                "FAILED": [{"id": "7"}]
-            }
-        }
+        mock_get_documents.return_value = self.SAMPLE_STATUSES
 
         # Call function
         result = get_document_counts("http://test-server")
@@ -112,6 +264,36 @@ class TestDocumentFunctions(unittest.TestCase):
             "TOTAL": 7
         })
 
+    @patch('multifilerag_utils.get_documents')
+    def test_get_document_counts_single_pass(self, mock_get_documents):
+        """Test get_document_counts looks each status up exactly once."""
+        lookups = []
+
+        class CountingDict(dict):
+            def __getitem__(self, key):
+                lookups.append(key)
+                return super().__getitem__(key)
+
+            def get(self, key, default=None):
+                lookups.append(key)
+                return super().get(key, default)
+
+        # Mock response
+        mock_get_documents.return_value = {
+            "statuses": CountingDict({
+                "PENDING": [{"id": "1"}],
+                "PROCESSED": [{"id": "2"}, {"id": "3"}]
+            })
+        }
+
+        # Call function
+        result = get_document_counts("http://test-server")
+
+        # Verify
+        self.assertEqual(sorted(lookups), sorted(["PENDING", "PROCESSING", "PROCESSED", "FAILED"]))
+        self.assertEqual(result["TOTAL"], 3)
+        self.assertEqual(result["PROCESSING"], 0)
+
     @patch('multifilerag_utils.get_documents')
     def test_get_document_counts_error(self, mock_get_documents):
         """Test get_document_counts with error."""
@@ -128,14 +310,7 @@ class TestDocumentFunctions(unittest.TestCase):
     def test_get_documents_by_status(self, mock_get_documents):
         """Test get_documents_by_status."""
         # Mock response
-        mock_get_documents.return_value = {
-            "statuses": {
-                "PENDING": [{"id": "1"}],
-                "PROCESSING": [{"id": "2"}, {"id": "3"}],
-                "PROCESSED": [{"id": "4"}, {"id": "5"}, {"id": "6"}],
-                "FAILED": [{"id": "7"}]
-            }
-        }
+        mock_get_documents.return_value = self.SAMPLE_STATUSES
 
         # Call function
         result = get_documents_by_status("PROCESSED", "http://test-server")
@@ -147,14 +322,7 @@ class TestDocumentFunctions(unittest.TestCase):
     def test_get_failed_documents(self, mock_get_documents):
         """Test get_failed_documents."""
         # Mock response
-        mock_get_documents.return_value = {
-            "statuses": {
-                "PENDING": [{"id": "1"}],
-                "PROCESSING": [{"id": "2"}, {"id": "3"}],
-                "PROCESSED": [{"id": "4"}, {"id": "5"}, {"id": "6"}],
-                "FAILED": [{"id": "7"}]
-            }
-        }
+        mock_get_documents.return_value = self.SAMPLE_STATUSES
 
         # Call function
         result = get_failed_documents("http://test-server")
@@ -166,30 +334,29 @@ class TestDocumentFunctions(unittest.TestCase):
 class TestOllamaFunctions(unittest.TestCase):
     """Test functions related to Ollama."""
 
-    @patch('multifilerag_utils.requests.get')
+    def setUp(self):
+        """Start every test without remembered Ollama versions."""
+        multifilerag_utils._ollama_versions.clear()
+
+    @patch('multifilerag_utils._PROBE_SESSION.get')
     def test_check_ollama_status_success(self, mock_get):
         """Test check_ollama_status with successful response."""
         # Mock response
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {"version": "0.1.0"}
-        mock_get.return_value = mock_response
+        mock_get.return_value = FakeResponse(200, {"version": "0.1.0"})
 
         # Call function
         is_running, version = check_ollama_status("http://test-ollama")
 
         # Verify
-        mock_get.assert_called_once_with("http://test-ollama/api/version")
+        mock_get.assert_called_once_with("http://test-ollama/api/version", timeout=2.0)
         self.assertTrue(is_running)
         self.assertEqual(version, "0.1.0")
 
-    @patch('multifilerag_utils.requests.get')
+    @patch('multifilerag_utils._PROBE_SESSION.get')
     def test_check_ollama_status_error(self, mock_get):
         """Test check_ollama_status with error response."""
         # Mock response
-        mock_response = MagicMock()
-        mock_response.status_code = 500
-        mock_get.return_value = mock_response
+        mock_get.return_value = FakeResponse(500)
 
         # Call function
         is_running, version = check_ollama_status("http://test-ollama")
@@ -198,7 +365,7 @@ class TestOllamaFunctions(unittest.TestCase):
         self.assertFalse(is_running)
         self.assertEqual(version, "Status code: 500")
 
-    @patch('multifilerag_utils.requests.get')
+    @patch('multifilerag_utils._PROBE_SESSION.get')
     def test_check_ollama_status_exception(self, mock_get):
         """Test check_ollama_status with exception."""
         # Mock exception
@@ -211,15 +378,43 @@ class TestOllamaFunctions(unittest.TestCase):
         self.assertFalse(is_running)
         self.assertEqual(version, "Connection error")
 
+    @patch('multifilerag_utils._PROBE_SESSION.get')
+    def test_check_model_status_uses_tags_cache(self, mock_get):
+        """Test check_model_status reuses the cached model list."""
+        # Mock response
+        mock_get.return_value = FakeResponse(200, {"models": [{"name": "llama3:8b"}]})
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache_file = Path(temp_dir) / "ollama_tags.json"
+            with patch('multifilerag_utils.TAGS_CACHE_FILE', cache_file):
+                # Call function twice
+                first = check_model_status("llama3:8b", "http://test-ollama")
+                second = check_model_status("missing", "http://test-ollama")
+
+                # Verify
+                mock_get.assert_called_once_with("http://test-ollama/api/tags", timeout=2.0)
+                self.assertEqual(first, (True, {"name": "llama3:8b"}))
+                self.assertEqual(second, (False, "Model not found"))
+                self.assertTrue(cache_file.exists())
+
 
 class TestDirectoryFunctions(unittest.TestCase):
     """Test functions related to directory management."""
 
+    def setUp(self):
+        """Start every test with an empty graph check cache."""
+        multifilerag_utils._graph_check_cache.clear()
+
+    def tearDown(self):
+        """Restore the configuration from the real environment."""
+        reload_config()
+
     @patch('multifilerag_utils.Path.mkdir')
     @patch.dict(os.environ, {"INPUT_DIR": "/test/inputs", "WORKING_DIR": "/test/rag_storage"}, clear=True)
     def test_ensure_directories(self, mock_mkdir):
         """Test ensure_directories."""
         # Call function
+        reload_config()
         ensure_directories()
 
         # Verify
@@ -228,26 +423,23 @@ class TestDirectoryFunctions(unittest.TestCase):
 
     def test_check_graph_file_exists(self):
         """Test check_graph_file when file exists."""
-        # Create temporary file
-        with tempfile.NamedTemporaryFile() as temp_file:
-            # Write some content
-            temp_file.write(b"test content")
-            temp_file.flush()
-
-            # Mock environment and path
-            with patch.dict(os.environ, {"WORKING_DIR": os.path.dirname(temp_file.name)}, clear=True):
-                with patch('os.path.join', return_value=temp_file.name):
-                    # Call function
-                    result = check_graph_file()
+        # Mock environment and file size
+        with patch.dict(os.environ, {"WORKING_DIR": "/test/rag_storage"}, clear=True):
+            reload_config()
+            with patch('os.stat', return_value=MagicMock(st_size=12)) as mock_stat:
+                # Call function
+                result = check_graph_file()
 
-                    # Verify
-                    self.assertTrue(result)
+                # Verify
+                mock_stat.assert_called_once_with(os.path.join("/test/rag_storage", "graph_chunk_entity_relation.graphml"))
+                self.assertTrue(result)
 
     def test_check_graph_file_not_exists(self):
         """Test check_graph_file when file does not exist."""
-        # Mock environment and path
+        # Mock environment and missing file
         with patch.dict(os.environ, {"WORKING_DIR": "/nonexistent"}, clear=True):
-            with patch('os.path.exists', return_value=False):
+            reload_config()
+            with patch('os.stat', side_effect=FileNotFoundError):
                 # Call function
                 result = check_graph_file()
 
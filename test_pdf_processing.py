@@ -8,11 +8,11 @@ import os
 import sys
 from pathlib import Path
 
-# Try to import the extract_text_from_pdf function from multifile_processor
+# Try to import the partition_to_file function from multifile_processor
 try:
-    from multifile_processor import extract_text_from_pdf
+    from multifile_processor import partition_to_file
 except ImportError:
-    print("Error: Could not import extract_text_from_pdf from multifile_processor")
+    print("Error: Could not import partition_to_file from multifile_processor")
     sys.exit(1)
 
 def test_pdf_processing(pdf_file):
@@ -23,23 +23,23 @@ def test_pdf_processing(pdf_file):
         print(f"Error: File {pdf_file} does not exist")
         return
     
-    # Try to extract text from the PDF
-    text = extract_text_from_pdf(pdf_file)
+    # Try to extract text from the PDF, streaming it straight to the output
+    # file so the whole document is never held in memory
+    output_file = f"{os.path.splitext(pdf_file)[0]}_extracted.txt"
+    with open(output_file, "w", encoding="utf-8", buffering=1 << 20) as f:
+        written = partition_to_file(pdf_file, f)
     
-    if text:
+    if written:
         print(f"Successfully extracted text from {pdf_file}")
-        print(f"Extracted {len(text)} characters")
+        print(f"Extracted {written} characters")
         print("\nFirst 500 characters of extracted text:")
         print("-" * 80)
-        print(text[:500])
+        with open(output_file, "r", encoding="utf-8") as f:
+            print(f.read(500))
         print("-" * 80)
-        
-        # Save the extracted text to a file
-        output_file = f"{os.path.splitext(pdf_file)[0]}_extracted.txt"
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write(text)
         print(f"Saved extracted text to: {output_file}")
     else:
+        os.remove(output_file)
         print(f"Failed to extract text from {pdf_file}")
 
 def main():
@@ -1,6 +1,9 @@
 #!/usr/bin/env python3
 """
 Test PDF processing with unstructured.
+
+Several PDF files can be given at once; unstructured is imported only once
+for all of them.
 """
 
 import os
@@ -9,49 +12,60 @@ from pathlib import Path
 
 # Check if a file path was provided
 if len(sys.argv) < 2:
-    print("Usage: python test_pdf_unstructured.py <pdf_file>")
+    print("Usage: python test_pdf_unstructured.py <pdf_file> [<pdf_file> ...]")
     sys.exit(1)
 
-pdf_file = sys.argv[1]
+pdf_files = sys.argv[1:]
 
-# Check if the file exists
-if not os.path.exists(pdf_file):
+# Check if the files exist
+missing_files = [pdf_file for pdf_file in pdf_files if not os.path.exists(pdf_file)]
+for pdf_file in missing_files:
     print(f"Error: File {pdf_file} does not exist")
+if missing_files:
     sys.exit(1)
 
-print(f"Processing PDF file: {pdf_file}")
-
 try:
-    # Import unstructured
+    # Import unstructured (once, however many files are processed)
     from unstructured.partition.pdf import partition_pdf
-    
-    # Process the PDF
-    print("Using unstructured.partition.pdf.partition_pdf...")
-    elements = partition_pdf(pdf_file)
-    
-    # Print the number of elements
-    print(f"Extracted {len(elements)} elements from the PDF")
-    
-    # Join all elements into a single text string
-    text_content = "\n\n".join([str(el) for el in elements])
-    
-    # Print the first 500 characters
-    print("\nFirst 500 characters of extracted text:")
-    print("-" * 80)
-    print(text_content[:500])
-    print("-" * 80)
-    
-    # Save the extracted text to a file
-    output_file = f"{os.path.splitext(pdf_file)[0]}_unstructured.txt"
-    with open(output_file, "w", encoding="utf-8") as f:
-        f.write(text_content)
-    
-    print(f"Saved extracted text to: {output_file}")
-    
 except ImportError:
     print("Error: unstructured.partition.pdf module not found")
     print("Please install with: pip install 'unstructured[pdf]'")
     sys.exit(1)
-except Exception as e:
-    print(f"Error processing PDF: {e}")
+
+failed = False
+for pdf_file in pdf_files:
+    print(f"Processing PDF file: {pdf_file}")
+
+    try:
+        # Process the PDF
+        print("Using unstructured.partition.pdf.partition_pdf...")
+        elements = partition_pdf(pdf_file)
+
+        # Print the number of elements
+        print(f"Extracted {len(elements)} elements from the PDF")
+
+        # Write the elements straight to the output file instead of joining them
+        # into one string, keeping just enough text for the preview
+        output_file = f"{os.path.splitext(pdf_file)[0]}_unstructured.txt"
+        preview = ""
+        with open(output_file, "w", encoding="utf-8", buffering=1 << 20) as f:
+            for i, el in enumerate(elements):
+                text = ("\n\n" if i else "") + str(el)
+                f.write(text)
+                if len(preview) < 500:
+                    preview += text[:500 - len(preview)]
+
+        # Print the first 500 characters
+        print("\nFirst 500 characters of extracted text:")
+        print("-" * 80)
+        print(preview)
+        print("-" * 80)
+
+        print(f"Saved extracted text to: {output_file}")
+
+    except Exception as e:
+        print(f"Error processing PDF: {e}")
+        failed = True
+
+if failed:
     sys.exit(1)